@@ -1,27 +1,46 @@
 import json
 import time
-import urllib
+import urllib.parse
 import random
 import string
 import pathlib
+import importlib
 
 from typing import List
 from typing import Dict
+from typing import Tuple
+from typing import Union
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import msal
+
+    from ms_graph.users import Users
+    from ms_graph.drives import Drives
+    from ms_graph.groups import Groups
+    from ms_graph.notes import Notes
+    from ms_graph.drive_items import DriveItems
+    from ms_graph.search import Search
+    from ms_graph.personal_contacts import PersonalContacts
+    from ms_graph.mail import Mail
+
+    from ms_graph.workbooks_and_charts.workbook import Workbooks
+    from ms_graph.workbooks_and_charts.range import Range
+
+# The services of the client, imported the first time they are used.
+SERVICES = {
+    "users": ("ms_graph.users", "Users"),
+    "drives": ("ms_graph.drives", "Drives"),
+    "drive_item": ("ms_graph.drive_items", "DriveItems"),
+    "groups": ("ms_graph.groups", "Groups"),
+    "notes": ("ms_graph.notes", "Notes"),
+    "search": ("ms_graph.search", "Search"),
+    "personal_contacts": ("ms_graph.personal_contacts", "PersonalContacts"),
+    "mail": ("ms_graph.mail", "Mail"),
+    "workbooks": ("ms_graph.workbooks_and_charts.workbook", "Workbooks"),
+    "range": ("ms_graph.workbooks_and_charts.range", "Range"),
+}
 
-import msal
-
-from ms_graph.users import Users
-from ms_graph.drives import Drives
-from ms_graph.groups import Groups
-from ms_graph.notes import Notes
-from ms_graph.session import GraphSession
-from ms_graph.drive_items import DriveItems
-from ms_graph.search import Search
-from ms_graph.personal_contacts import PersonalContacts
-from ms_graph.mail import Mail
-
-from ms_graph.workbooks_and_charts.workbook import Workbooks
-from ms_graph.workbooks_and_charts.range import Range
 
 class MicrosoftGraphClient:
 
@@ -51,6 +70,7 @@ class MicrosoftGraphClient:
         account_type: str = "consumers",
         office365: bool = False,
         credentials: str = None,
+        timeout: Union[float, Tuple[float, float]] = None,
     ):
         """Initializes the Graph Client.
 
@@ -77,6 +97,11 @@ class MicrosoftGraphClient:
 
         office365 : bool, optional
             [description], by default False
+
+        timeout : Union[float, Tuple[float, float]], optional
+            The seconds a request may take to connect and to read,
+            either one number or `(connect, read)`, by default the
+            `DEFAULT_TIMEOUT` of the session.
         """
 
         # printing lowercase
@@ -84,6 +109,7 @@ class MicrosoftGraphClient:
 
         self.credentials = credentials
         self.token_dict = None
+        self.timeout = timeout
 
         self.client_id = client_id
         self.client_secret = client_secret
@@ -105,12 +131,36 @@ class MicrosoftGraphClient:
         self.office365 = office365
         self._redirect_code = None
 
-        # Initialize the Credential App.
-        self.client_app = msal.ConfidentialClientApplication(
-            client_id=self.client_id,
-            authority=self.AUTHORITY_URL + self.account_type,
-            client_credential=self.client_secret,
-        )
+        # The Credential App and the services are built on first use.
+        self._client_app = None
+        self._services = {}
+
+    @property
+    def client_app(self) -> "msal.ConfidentialClientApplication":
+        """The MSAL Credential App, built the first time a token is
+        needed, so a client that reuses a saved token never loads `msal`.
+
+        ### Returns
+        ----
+        msal.ConfidentialClientApplication:
+            The Credential App.
+        """
+
+        if self._client_app is None:
+
+            import msal
+
+            self._client_app = msal.ConfidentialClientApplication(
+                client_id=self.client_id,
+                authority=self.AUTHORITY_URL + self.account_type,
+                client_credential=self.client_secret,
+            )
+
+        return self._client_app
+
+    @client_app.setter
+    def client_app(self, client_app: "msal.ConfidentialClientApplication") -> None:
+        self._client_app = client_app
 
     def _state(self, action: str, token_dict: dict = None) -> bool:
         """Sets the session state for the Client Library.
@@ -253,6 +303,8 @@ class MicrosoftGraphClient:
     def login(self) -> None:
         """Logs the user into the session."""
 
+        from ms_graph.session import GraphSession
+
         # Load the State.
         self._state(action="load")
 
@@ -350,7 +402,7 @@ class MicrosoftGraphClient:
 
         return token_dict
 
-    def users(self) -> Users:
+    def users(self) -> "Users":
         """Used to access the User Services and metadata.
 
         ### Returns
@@ -360,11 +412,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the Users Object for the session.
-        users_object: Users = Users(session=self.graph_session)
-
-        return users_object
+        return self._service(name="users")
 
-    def drives(self) -> Drives:
+    def drives(self) -> "Drives":
         """Used to access the Drives Services and metadata.
 
         ### Returns
@@ -374,11 +424,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the Drives Object for the session.
-        drives_object: Drives = Drives(session=self.graph_session)
+        return self._service(name="drives")
 
-        return drives_object
-
-    def drive_item(self) -> DriveItems:
+    def drive_item(self) -> "DriveItems":
         """Used to access the Drive Items Services and metadata.
 
         ### Returns
@@ -388,11 +436,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the Drive Items Object for the session.
-        drive_items_object: Drives = DriveItems(session=self.graph_session)
-
-        return drive_items_object
+        return self._service(name="drive_item")
 
-    def groups(self) -> Groups:
+    def groups(self) -> "Groups":
         """Used to access the Groups Services and metadata.
 
         ### Returns
@@ -402,11 +448,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Groups` Object for the session.
-        groups_object: Groups = Groups(session=self.graph_session)
+        return self._service(name="groups")
 
-        return groups_object
-
-    def notes(self) -> Notes:
+    def notes(self) -> "Notes":
         """Used to access the OneNotes Services and metadata.
 
         ### Returns
@@ -416,11 +460,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Notes` Object for the session.
-        notes_object: Notes = Notes(session=self.graph_session)
-
-        return notes_object
+        return self._service(name="notes")
 
-    def search(self) -> Search:
+    def search(self) -> "Search":
         """Used to access the Search Services and metadata.
 
         ### Returns
@@ -430,11 +472,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Search` Object for the session.
-        search_object: Search = Search(session=self.graph_session)
-
-        return search_object
+        return self._service(name="search")
 
-    def personal_contacts(self) -> PersonalContacts:
+    def personal_contacts(self) -> "PersonalContacts":
         """Used to access the PersonalContacts Services and metadata.
 
         ### Returns
@@ -444,13 +484,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `PersonalContacts` Object for the session.
-        personal_contacts_object: PersonalContacts = PersonalContacts(
-            session=self.graph_session
-        )
-
-        return personal_contacts_object
+        return self._service(name="personal_contacts")
 
-    def mail(self) -> Mail:
+    def mail(self) -> "Mail":
         """Used to access the Mail Services and metadata.
 
         ### Returns
@@ -460,11 +496,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Mail` Object for the session.
-        mail_service: Mail = Mail(session=self.graph_session)
+        return self._service(name="mail")
 
-        return mail_service
-
-    def workbooks(self) -> Workbooks:
+    def workbooks(self) -> "Workbooks":
         """Used to access the Workbooks Services and metadata.
 
         ### Returns
@@ -474,11 +508,9 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Workbooks` Object for the session.
-        workbook_service: Workbooks = Workbooks(session=self.graph_session)
-
-        return workbook_service
+        return self._service(name="workbooks")
 
-    def range(self) -> Range:
+    def range(self) -> "Range":
         """Used to access the Range Services and metadata.
 
         ### Returns
@@ -488,6 +520,30 @@ class MicrosoftGraphClient:
         """
 
         # Grab the `Range` Object for the session.
-        range_service: Range = Range(session=self.graph_session)
+        return self._service(name="range")
+
+    def _service(self, name: str) -> object:
+        """Imports and builds a service on first use, then reuses it for
+        as long as the session stays the same.
+
+        ### Parameters
+        ----
+        name : str
+            The name of the service, a key of `SERVICES`.
+
+        ### Returns
+        ----
+        object:
+            The service object.
+        """
+
+        service = self._services.get(name)
+
+        if service is None or service.graph_session is not self.graph_session:
+
+            module_name, class_name = SERVICES[name]
+            service_class = getattr(importlib.import_module(module_name), class_name)
+
+            service = self._services[name] = service_class(session=self.graph_session)
 
-        return range_service
+        return service
@@ -0,0 +1,422 @@
+import os
+import time
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Iterable
+
+from ms_graph.models import parse_datetime
+from ms_graph.utils.codec import get_codec
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("auto", "parquet", "arrow", "jsonl")
+
+
+class Column():
+
+    """
+    ## Overview:
+    ----
+    A column of an export, read from a dotted path into each item, for
+    example `from.emailAddress.address`.
+    """
+
+    __slots__ = ("name", "path", "column_type", "_keys")
+
+    TYPES = ("string", "int", "float", "bool", "timestamp", "json")
+
+    def __init__(self, name: str, path: str = None, column_type: str = "string") -> None:
+        """Initializes the `Column` object.
+
+        ### Parameters
+        ----
+        name : str
+            The column name in the output.
+
+        path : str (optional, Default=None)
+            The dotted path of the value, defaults to the name.
+
+        column_type : str (optional, Default="string")
+            One of `string`, `int`, `float`, `bool`, `timestamp`
+            or `json`, the latter keeps lists and objects as a
+            JSON string.
+        """
+
+        if column_type not in self.TYPES:
+            raise ValueError(f"Unknown column type {column_type}, expected one of {self.TYPES}.")
+
+        self.name = name
+        self.path = path or name
+        self.column_type = column_type
+        self._keys = tuple(self.path.split("."))
+
+    def extract(self, item: dict) -> Any:
+        """Reads the value of the column from an item.
+
+        ### Parameters
+        ----
+        item : dict
+            An item of a Graph collection.
+
+        ### Returns
+        ----
+        Any:
+            The value, `None` if any part of the path is missing.
+        """
+
+        value = item
+
+        for key in self._keys:
+
+            if not isinstance(value, dict):
+                return None
+
+            value = value.get(key)
+
+        return value
+
+
+class Schema():
+
+    """
+    ## Overview:
+    ----
+    Maps the nested items of a Graph collection onto flat columns, and
+    derives the `$select` that fetches only what the columns need.
+
+    ### Usage:
+    ----
+        >>> schema = Schema([
+            Column("id"),
+            Column("subject"),
+            Column("sender", "from.emailAddress.address"),
+            Column("received", "receivedDateTime", "timestamp"),
+        ])
+        >>> schema.select
+        'id,subject,from,receivedDateTime'
+    """
+
+    def __init__(self, columns: List[Column]) -> None:
+        """Initializes the `Schema` object.
+
+        ### Parameters
+        ----
+        columns : List[Column]
+            The columns, in output order.
+        """
+
+        self.columns = columns
+
+    @property
+    def names(self) -> List[str]:
+        """The column names."""
+
+        return [column.name for column in self.columns]
+
+    @property
+    def select(self) -> str:
+        """The `$select` of the top level properties the columns read."""
+
+        return ",".join(dict.fromkeys(column.path.split(".")[0] for column in self.columns))
+
+    def arrow_schema(self) -> "pyarrow.Schema":
+        """Builds the matching Arrow schema, requires `pyarrow`."""
+
+        types = {
+            "string": pyarrow.string(),
+            "int": pyarrow.int64(),
+            "float": pyarrow.float64(),
+            "bool": pyarrow.bool_(),
+            "timestamp": pyarrow.timestamp("us", tz="UTC"),
+            "json": pyarrow.string(),
+        }
+
+        return pyarrow.schema([(column.name, types[column.column_type]) for column in self.columns])
+
+
+USER_SCHEMA = Schema([
+    Column("id"),
+    Column("user_principal_name", "userPrincipalName"),
+    Column("display_name", "displayName"),
+    Column("mail"),
+    Column("job_title", "jobTitle"),
+    Column("department"),
+    Column("account_enabled", "accountEnabled", "bool"),
+])
+
+DRIVE_ITEM_SCHEMA = Schema([
+    Column("id"),
+    Column("name"),
+    Column("size", column_type="int"),
+    Column("web_url", "webUrl"),
+    Column("parent_path", "parentReference.path"),
+    Column("mime_type", "file.mimeType"),
+    Column("child_count", "folder.childCount", "int"),
+    Column("created", "createdDateTime", "timestamp"),
+    Column("modified", "lastModifiedDateTime", "timestamp"),
+    Column("modified_by", "lastModifiedBy.user.displayName"),
+])
+
+MESSAGE_SCHEMA = Schema([
+    Column("id"),
+    Column("subject"),
+    Column("sender", "from.emailAddress.address"),
+    Column("to", "toRecipients", "json"),
+    Column("received", "receivedDateTime", "timestamp"),
+    Column("is_read", "isRead", "bool"),
+    Column("has_attachments", "hasAttachments", "bool"),
+    Column("importance"),
+    Column("conversation_id", "conversationId"),
+])
+
+
+class ColumnarExporter():
+
+    """
+    ## Overview:
+    ----
+    Streams the items of Graph collections through a `Schema` into a
+    columnar file. Items are gathered into batches of `batch_size` rows,
+    each batch becomes an Arrow record batch appended to a Parquet or
+    Arrow IPC file, so memory is bounded by the batch size. Without
+    `pyarrow` installed, the rows are written as JSON lines instead.
+
+    ### Usage:
+    ----
+        >>> exporter = ColumnarExporter(schema=MESSAGE_SCHEMA, path="messages.parquet")
+        >>> exporter.export(
+            session=graph_client.graph_session,
+            endpoint="users/8bc6/messages"
+        )
+        {'rows': 250000, 'batches': 25, 'seconds': 41.2, 'rows_per_second': 6067.9}
+    """
+
+    def __init__(self, schema: Schema, path: str, output_format: str = "auto", batch_size: int = 10000) -> None:
+        """Initializes the `ColumnarExporter` object.
+
+        ### Parameters
+        ----
+        schema : Schema
+            The columns to export.
+
+        path : str
+            The output file.
+
+        output_format : str (optional, Default="auto")
+            One of `parquet`, `arrow` or `jsonl`. `auto` picks
+            from the file extension, and falls back to `jsonl`
+            when `pyarrow` is missing.
+
+        batch_size : int (optional, Default=10000)
+            The number of rows per batch.
+        """
+
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown format {output_format}, expected one of {FORMATS}.")
+
+        if output_format == "auto":
+            extension = os.path.splitext(path)[1].lower()
+            if pyarrow is None or extension in (".jsonl", ".json", ".ndjson"):
+                output_format = "jsonl"
+            else:
+                output_format = "arrow" if extension in (".arrow", ".feather", ".ipc") else "parquet"
+
+        if output_format != "jsonl" and pyarrow is None:
+            raise ValueError(f"The `{output_format}` format requires the `pyarrow` package.")
+
+        self.schema = schema
+        self.path = path
+        self.output_format = output_format
+        self.batch_size = batch_size
+
+        self.stats: Dict[str, float] = {"rows": 0, "batches": 0, "seconds": 0.0, "rows_per_second": 0.0}
+
+        self._writer = None
+        self._file = None
+        self._opened = False
+        self._arrow_schema = self.schema.arrow_schema() if output_format != "jsonl" else None
+        self._started = None
+        self._codec = get_codec()
+
+    def export(self, session: object, endpoint: str, params: dict = None) -> Dict[str, float]:
+        """Exports every item of a collection, selecting only the
+        properties the schema reads.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        endpoint : str
+            The collection, for example `users` or
+            `drives/{drive_id}/root/delta`.
+
+        params : dict (optional, Default=None)
+            Extra query params, like a `$filter`.
+
+        ### Returns
+        ----
+        Dict[str, float]:
+            The throughput, see `write`.
+        """
+
+        items = session.iter_items(
+            endpoint=endpoint,
+            params={"$select": self.schema.select, **(params or {})},
+            stream=True
+        )
+
+        with self:
+            self.write(items=items)
+
+        return self.stats
+
+    def write(self, items: Iterable[dict]) -> Dict[str, float]:
+        """Appends items to the file, the file stays open for more until
+        `close` is called.
+
+        ### Parameters
+        ----
+        items : Iterable[dict]
+            The items, for example an `ItemIterator` or the
+            values of a service call.
+
+        ### Returns
+        ----
+        Dict[str, float]:
+            The `rows` and `batches` written so far, the `seconds`
+            spent and the `rows_per_second`.
+        """
+
+        if self._started is None:
+            self._started = time.perf_counter()
+
+        columns = self.schema.columns
+        batch: Tuple[List[Any], ...] = tuple([] for _ in columns)
+        rows = 0
+
+        for item in items:
+
+            for values, column in zip(batch, columns):
+                values.append(_convert(column.extract(item), column.column_type, self._codec, self.output_format))
+
+            rows += 1
+
+            if rows == self.batch_size:
+                self._write_batch(batch=batch, rows=rows)
+                batch = tuple([] for _ in columns)
+                rows = 0
+
+        if rows:
+            self._write_batch(batch=batch, rows=rows)
+
+        return self.stats
+
+    def close(self) -> None:
+        """Finishes the file, an export without rows still leaves a file
+        with the schema.
+        """
+
+        if not self._opened:
+            self._open()
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ColumnarExporter":
+        self._open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _open(self) -> None:
+        """Creates the file and, for Arrow formats, writes its schema."""
+
+        if self._opened:
+            return
+
+        if self.output_format == "jsonl":
+            self._file = open(self.path, "wb")
+        elif self.output_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._arrow_schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(self.path, self._arrow_schema)
+
+        self._opened = True
+
+    def _write_batch(self, batch: Tuple[List[Any], ...], rows: int) -> None:
+        """Writes one batch and updates the throughput."""
+
+        self._open()
+
+        if self.output_format == "jsonl":
+
+            names = self.schema.names
+            dumps = self._codec.dumps
+
+            self._file.write(
+                b"".join(
+                    dumps(dict(zip(names, (values[row] for values in batch)))) + b"\n"
+                    for row in range(rows)
+                )
+            )
+
+        else:
+
+            schema = self._arrow_schema
+            record_batch = pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(batch, schema)],
+                schema=schema
+            )
+
+            if self.output_format == "parquet":
+                self._writer.write_batch(record_batch)
+            else:
+                self._writer.write(record_batch)
+
+        seconds = time.perf_counter() - self._started
+
+        self.stats["rows"] += rows
+        self.stats["batches"] += 1
+        self.stats["seconds"] = round(seconds, 3)
+        self.stats["rows_per_second"] = round(self.stats["rows"] / seconds, 1) if seconds else 0.0
+
+
+def _convert(value: Any, column_type: str, codec: object, output_format: str) -> Any:
+    """Converts a JSON value to the type of its column, JSON lines keep
+    timestamps as ISO strings.
+    """
+
+    if value is None:
+        return None
+
+    if column_type == "string":
+        return value if isinstance(value, str) else str(value)
+
+    if column_type == "json":
+        return codec.dumps(value).decode("utf-8")
+
+    if column_type == "timestamp":
+        return value if output_format == "jsonl" else parse_datetime(value)
+
+    if column_type == "int":
+        return int(value)
+
+    if column_type == "float":
+        return float(value)
+
+    return bool(value)
@@ -0,0 +1,399 @@
+from typing import Dict
+from typing import List
+from typing import Iterable
+from typing import Iterator
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.batch import BatchResult
+from ms_graph.utils.batch import BatchExecutor
+from ms_graph.utils.delta import DeltaEvent
+from ms_graph.utils.delta import DeltaQuery
+from ms_graph.utils.delta import DeltaStore
+from ms_graph.utils.delta import mailbox_prefix
+
+# The outcomes of importing one contact.
+CREATED = "created"
+UPDATED = "updated"
+CONFLICT = "conflict"
+FAILED = "failed"
+
+# The call carrying the request got no response, it may have been applied.
+UNKNOWN = "unknown"
+
+
+class ContactImportResult():
+
+    """
+    ## Overview:
+    ----
+    The outcome of importing one contact with `ContactSync.import_contacts`.
+    """
+
+    __slots__ = ("contact", "email", "action", "contact_id", "result")
+
+    def __init__(self, contact: dict, email: str, action: str, contact_id: str = None, result: BatchResult = None) -> None:
+        """Initializes the `ContactImportResult` object.
+
+        ### Parameters
+        ----
+        contact : dict
+            The contact as passed in.
+
+        email : str
+            The normalised email key of the contact, `None` if
+            it has no address.
+
+        action : str
+            One of `created`, `updated`, `conflict`, `failed`
+            or `unknown`.
+
+        contact_id : str (optional, Default=None)
+            The id of the contact in the mailbox.
+
+        result : BatchResult (optional, Default=None)
+            The result of the request, `None` if none was sent.
+        """
+
+        self.contact = contact
+        self.email = email
+        self.action = action
+        self.contact_id = contact_id
+        self.result = result
+
+    @property
+    def ok(self) -> bool:
+        """Whether the contact was created or updated."""
+
+        return self.action in (CREATED, UPDATED)
+
+    def __repr__(self) -> str:
+        return f"ContactImportResult(email={self.email!r}, action={self.action!r}, contact_id={self.contact_id!r})"
+
+
+class ContactSync():
+
+    """
+    ## Overview:
+    ----
+    Keeps a copy of the personal contacts of a mailbox in sync with
+    delta queries, one per contact folder, with the delta links and ids
+    persisted in a `DeltaStore` under `contacts:<mailbox>:<folder_id>`.
+    Also imports contacts in bulk through `$batch`, matching them to the
+    contacts already in the folder by their email address.
+
+    ### Usage:
+    ----
+        >>> contact_sync = ContactSync(
+            session=graph_client.graph_session,
+            store=SQLiteDeltaStore(path="contacts_sync.db")
+        )
+        >>> for event in contact_sync.sync_contacts(user_id="8bc6"):
+        ...     print(event.kind, event.scope, event.id)
+        >>> results = contact_sync.import_contacts(contacts=crm_contacts, user_id="8bc6")
+        >>> [result for result in results if not result.ok]
+    """
+
+    def __init__(
+        self,
+        session: object,
+        store: DeltaStore = None,
+        params: dict = None,
+        page_size: int = None
+    ) -> None:
+        """Initializes the `ContactSync` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        store : DeltaStore (optional, Default=None)
+            Where the delta links and contact ids are persisted,
+            defaults to a `MemoryDeltaStore`.
+
+        params : dict (optional, Default=None)
+            The query params of the first round of each folder,
+            for example `$select`.
+
+        page_size : int (optional, Default=None)
+            The number of contacts per page, sent as the
+            `odata.maxpagesize` preference.
+        """
+
+        self.graph_session: GraphSession = session
+        self.delta = DeltaQuery(session=session, store=store)
+        self.params = params
+        self.page_size = page_size
+
+    @property
+    def store(self) -> DeltaStore:
+        """The store the sync state is persisted to."""
+
+        return self.delta.store
+
+    def list_folders(self, user_id: str = "me") -> List[dict]:
+        """Lists every contact folder of a mailbox, including the child
+        folders. The default `Contacts` folder is not part of the list.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default="me")
+            The user whose mailbox is listed, `me` for the
+            signed-in user.
+
+        ### Returns
+        ----
+        List[dict]:
+            The `contactFolder` objects.
+        """
+
+        prefix = mailbox_prefix(user_id=user_id)
+        params = {"$select": "id,displayName,parentFolderId"}
+
+        folders = []
+        endpoints = [f"{prefix}/contactFolders"]
+
+        while endpoints:
+
+            for folder in self.graph_session.iter_items(endpoint=endpoints.pop(), params=params):
+                folders.append(folder)
+                endpoints.append(f"{prefix}/contactFolders/{folder['id']}/childFolders")
+
+        return folders
+
+    def sync_folder(self, folder_id: str = None, user_id: str = "me") -> Iterator[DeltaEvent]:
+        """Yields the changes to the contacts of a folder since the
+        last sync. The first sync reports every contact as added, and
+        the contacts a resync after an expired link does not return are
+        reported as removed.
+
+        ### Parameters
+        ----
+        folder_id : str (optional, Default=None)
+            The id of the folder, `None` for the default
+            `Contacts` folder.
+
+        user_id : str (optional, Default="me")
+            The user whose mailbox is synced.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One event per added, updated or removed contact.
+        """
+
+        headers = {"Prefer": f"odata.maxpagesize={self.page_size}"} if self.page_size else None
+
+        yield from self.delta.changes(
+            key=self.folder_key(folder_id=folder_id, user_id=user_id),
+            endpoint=f"{_folder_prefix(folder_id=folder_id, user_id=user_id)}/contacts/delta",
+            params=self.params,
+            additional_headers=headers
+        )
+
+    def sync_contacts(self, user_id: str = "me") -> Iterator[DeltaEvent]:
+        """Yields the changes to the default folder and every contact
+        folder of a mailbox since the last sync. The contacts of a folder
+        that was deleted since are reported as removed.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default="me")
+            The user whose mailbox is synced.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One event per added, updated or removed contact.
+        """
+
+        current = {self.folder_key(folder_id=None, user_id=user_id)}
+
+        yield from self.sync_folder(folder_id=None, user_id=user_id)
+
+        for folder in self.list_folders(user_id=user_id):
+            current.add(self.folder_key(folder_id=folder["id"], user_id=user_id))
+            yield from self.sync_folder(folder_id=folder["id"], user_id=user_id)
+
+        for key in self.store.keys(prefix=self.folder_key(folder_id="", user_id=user_id)):
+            if key not in current:
+                yield from self.delta.forget(key=key)
+
+    def import_contacts(
+        self,
+        contacts: Iterable[dict],
+        user_id: str = "me",
+        folder_id: str = None,
+        update_existing: bool = True,
+        create_without_email: bool = False,
+        max_workers: int = 4,
+        max_concurrency: int = 4
+    ) -> List[ContactImportResult]:
+        """Creates or updates many contacts with `$batch` calls.
+
+        ### Overview:
+        ----
+        The contacts are keyed on their first email address, compared
+        without case. A contact whose key is already in the folder
+        updates that contact, or is reported as a conflict if
+        `update_existing` is `False`. A key repeated in the input is
+        only imported once, the repeats are reported as conflicts.
+        A contact without an address cannot be matched, so it is
+        reported as a conflict unless `create_without_email` is `True`,
+        in which case it is created, even if it is already there.
+
+        Every request gets its own result, a failure or a `$batch` call
+        without a response never takes the other results down with it.
+        The requests of a call without a response are `unknown`, they
+        may have been applied.
+
+        ### Parameters
+        ----
+        contacts : Iterable[dict]
+            The `contact` resources to import.
+
+        user_id : str (optional, Default="me")
+            The user whose mailbox the contacts go to.
+
+        folder_id : str (optional, Default=None)
+            The contact folder, `None` for the default one.
+
+        update_existing : bool (optional, Default=True)
+            Whether a contact already in the folder is updated.
+
+        create_without_email : bool (optional, Default=False)
+            Whether a contact without an address is created.
+
+        max_workers : int (optional, Default=4)
+            The most `$batch` calls in flight.
+
+        max_concurrency : int (optional, Default=4)
+            The number of requests the mailbox runs at once,
+            Outlook throttles above 4.
+
+        ### Returns
+        ----
+        List[ContactImportResult]:
+            One result per contact, in the same order.
+        """
+
+        contacts = list(contacts)
+        prefix = _folder_prefix(folder_id=folder_id, user_id=user_id)
+
+        existing: Dict[str, str] = {}
+
+        for contact in self.graph_session.iter_items(
+            endpoint=f"{prefix}/contacts",
+            params={"$select": "id,emailAddresses", "$top": 1000}
+        ):
+            existing.setdefault(contact_key(contact=contact), contact["id"])
+
+        existing.pop(None, None)
+
+        results: List[ContactImportResult] = []
+        requests = []
+        seen = set()
+
+        for contact in contacts:
+
+            email = contact_key(contact=contact)
+            contact_id = existing.get(email)
+
+            if email is None and not create_without_email:
+                results.append(ContactImportResult(contact=contact, email=email, action=CONFLICT))
+                continue
+
+            if email is not None and email in seen:
+                results.append(ContactImportResult(contact=contact, email=email, action=CONFLICT))
+                continue
+
+            seen.add(email)
+
+            if contact_id is None:
+                action, request = CREATED, {"method": "POST", "url": f"/{prefix}/contacts", "body": contact}
+            elif update_existing:
+                action, request = UPDATED, {"method": "PATCH", "url": f"/{prefix}/contacts/{contact_id}", "body": contact}
+            else:
+                results.append(
+                    ContactImportResult(contact=contact, email=email, action=CONFLICT, contact_id=contact_id)
+                )
+                continue
+
+            result = ContactImportResult(contact=contact, email=email, action=action, contact_id=contact_id)
+            results.append(result)
+            requests.append((result, request))
+
+        executor = BatchExecutor(
+            session=self.graph_session,
+            max_workers=max_workers,
+            max_concurrency=max_concurrency
+        )
+
+        for (result, _), batch_result in zip(
+            requests, executor.execute(batch_requests=[request for _, request in requests])
+        ):
+
+            result.result = batch_result
+
+            if batch_result.status is None:
+                result.action = UNKNOWN
+            elif not batch_result.ok:
+                result.action = FAILED
+            elif isinstance(batch_result.body, dict) and batch_result.body.get("id"):
+                result.contact_id = batch_result.body["id"]
+
+        return results
+
+    def folder_key(self, folder_id: str = None, user_id: str = "me") -> str:
+        """Builds the store key of a folder.
+
+        ### Parameters
+        ----
+        folder_id : str (optional, Default=None)
+            The id of the folder, `None` for the default one.
+
+        user_id : str (optional, Default="me")
+            The user owning the mailbox.
+
+        ### Returns
+        ----
+        str:
+            The key, for example `contacts:me:default`.
+        """
+
+        if folder_id is None:
+            folder_id = "default"
+
+        return f"contacts:{user_id.lower()}:{folder_id}"
+
+
+def contact_key(contact: dict) -> str:
+    """Builds the conflict key of a contact from its first email address.
+
+    ### Parameters
+    ----
+    contact : dict
+        A `contact` resource.
+
+    ### Returns
+    ----
+    str:
+        The address in lower case, `None` if it has none.
+    """
+
+    for email in contact.get("emailAddresses") or []:
+
+        address = (email.get("address") or "").strip().lower()
+
+        if address:
+            return address
+
+    return None
+
+
+def _folder_prefix(folder_id: str, user_id: str) -> str:
+    """Builds the endpoint prefix of a contact folder."""
+
+    prefix = mailbox_prefix(user_id=user_id)
+
+    return f"{prefix}/contactFolders/{folder_id}" if folder_id else prefix
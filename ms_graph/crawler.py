@@ -0,0 +1,492 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import multiprocessing
+
+from typing import Dict
+from typing import List
+from typing import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.throttling import RateLimiter
+from ms_graph.utils.work_queue import WorkItem
+from ms_graph.utils.work_queue import LeaseLost
+from ms_graph.utils.work_queue import WorkQueue
+
+# The collections a crawl can export for each user.
+RESOURCES = {
+    "messages": "users/{user_id}/messages",
+    "mail_folders": "users/{user_id}/mailFolders",
+    "contacts": "users/{user_id}/contacts",
+    "events": "users/{user_id}/events",
+    "drive_items": "users/{user_id}/drive/root/delta",
+    "notebooks": "users/{user_id}/onenote/notebooks",
+}
+
+# The client settings a worker needs to rebuild the client.
+CLIENT_SETTINGS = (
+    "client_id", "client_secret", "redirect_uri", "scope",
+    "account_type", "office365", "credentials", "timeout",
+)
+
+
+class TokenStore():
+
+    """
+    ## Overview:
+    ----
+    Shares one token between the processes of a crawl. The token lives
+    in the crawl database, and refreshes happen inside an exclusive
+    transaction, so only one process refreshes at a time and the others
+    pick up its token.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes the `TokenStore` object.
+
+        ### Parameters
+        ----
+        path : str
+            The path of the SQLite database file.
+        """
+
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tokens (name TEXT PRIMARY KEY, token TEXT NOT NULL)"
+        )
+
+    def load(self) -> dict:
+        """Grabs the shared token.
+
+        ### Returns
+        ----
+        dict:
+            The token dictionary, or `None`.
+        """
+
+        with self._lock:
+            return self._load()
+
+    def save(self, token_dict: dict) -> None:
+        """Replaces the shared token.
+
+        ### Parameters
+        ----
+        token_dict : dict
+            A token dictionary, as saved by the client.
+        """
+
+        with self._lock:
+            self._save(token_dict=token_dict)
+
+    def sync(self, client: object, min_seconds: int = 300) -> None:
+        """Makes sure the client holds a token valid for `min_seconds`,
+        adopting the shared token or refreshing it.
+
+        ### Parameters
+        ----
+        client : MicrosoftGraphClient
+            The client of the calling process.
+
+        min_seconds : int (optional, Default=300)
+            The number of seconds the token must stay valid.
+        """
+
+        with self._lock:
+
+            token_dict = self._load()
+
+            if token_dict and token_dict["access_token"] != client.access_token:
+                _adopt_token(client=client, token_dict=token_dict)
+
+            if client._token_seconds(token_type="access_token") >= min_seconds:
+                return
+
+            self._connection.execute("BEGIN IMMEDIATE")
+
+            try:
+
+                # Another process may have refreshed while we waited for the lock.
+                token_dict = self._load()
+
+                if token_dict:
+                    _adopt_token(client=client, token_dict=token_dict)
+
+                if client._token_seconds(token_type="access_token") < min_seconds:
+                    client.grab_refresh_token()
+                    self._save(token_dict=client.token_dict)
+
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    def _load(self) -> dict:
+        """Reads the token, the lock must be held."""
+
+        row = self._connection.execute(
+            "SELECT token FROM tokens WHERE name = 'default'"
+        ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def _save(self, token_dict: dict) -> None:
+        """Writes the token, the lock must be held."""
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO tokens (name, token) VALUES ('default', ?)",
+            (json.dumps(token_dict),)
+        )
+
+
+def _adopt_token(client: object, token_dict: dict) -> None:
+    """Loads a token dictionary into a client."""
+
+    client.token_dict = token_dict
+    client.access_token = token_dict["access_token"]
+    client.refresh_token = token_dict.get("refresh_token")
+    client.id_token = token_dict.get("id_token")
+
+
+class Crawler():
+
+    """
+    ## Overview:
+    ----
+    Exports whole collections for many users with a pool of processes.
+    The work is sharded into one unit per user and resource, for example
+    `8bc6:messages`, and kept in a SQLite queue next to the shared token.
+    Each worker writes a shard to `<output>/<resource>/<user_id>.jsonl`
+    and checkpoints the next page link after every page, so a crawl that
+    crashed resumes mid shard and never redoes finished ones. Shards
+    that keep failing end up in the dead letters.
+
+    ### Usage:
+    ----
+        >>> graph_client.login()
+        >>> crawler = Crawler(
+            client=graph_client,
+            database="crawl.db",
+            output_directory="export",
+            processes=8
+        )
+        >>> crawler.add_shards(user_ids=user_ids, resources=["messages", "contacts"])
+        >>> crawler.run()
+        {'pending': 0, 'leased': 0, 'done': 2000, 'dead': 3}
+    """
+
+    def __init__(
+        self,
+        client: object,
+        database: str,
+        output_directory: str,
+        processes: int = 4,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 5,
+        tenant_rate: float = 200.0,
+    ) -> None:
+        """Initializes the `Crawler` object.
+
+        ### Parameters
+        ----
+        client : MicrosoftGraphClient
+            A logged in client, the workers rebuild it from
+            its settings and the shared token.
+
+        database : str
+            The path of the SQLite database holding the queue
+            and the shared token.
+
+        output_directory : str
+            The directory the shards are written to.
+
+        processes : int (optional, Default=4)
+            The number of worker processes.
+
+        lease_seconds : float (optional, Default=300.0)
+            How long a worker may go without checkpointing
+            before its shard is handed to another worker.
+
+        max_attempts : int (optional, Default=5)
+            The number of attempts before a shard is moved
+            to the dead letters.
+
+        tenant_rate : float (optional, Default=200.0)
+            The requests per second allowed across all the
+            workers, split evenly between them.
+        """
+
+        self.client = client
+        self.database = database
+        self.output_directory = output_directory
+        self.processes = processes
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.tenant_rate = tenant_rate
+
+        self.queue = WorkQueue(
+            path=database, lease_seconds=lease_seconds, max_attempts=max_attempts
+        )
+        self.token_store = TokenStore(path=database)
+
+    def add_shards(self, user_ids: Iterable[str], resources: Iterable[str], params: dict = None) -> int:
+        """Queues one shard per user and resource, skipping the shards
+        already queued, so it is safe to call again on resume.
+
+        ### Parameters
+        ----
+        user_ids : Iterable[str]
+            The ids of the users to export.
+
+        resources : Iterable[str]
+            The names of the resources to export, keys of
+            `RESOURCES`.
+
+        params : dict (optional, Default=None)
+            Query parameters sent with the first page of every
+            shard, for example `$select`.
+
+        ### Returns
+        ----
+        int:
+            The number of shards added.
+        """
+
+        resources = list(resources)
+
+        for resource in resources:
+            if resource not in RESOURCES:
+                raise ValueError(f"Unknown resource {resource}, expected one of {list(RESOURCES)}.")
+
+        return self.queue.add_many(
+            items=(
+                (
+                    f"{user_id}:{resource}",
+                    {
+                        "user_id": user_id,
+                        "resource": resource,
+                        "endpoint": RESOURCES[resource].format(user_id=user_id),
+                        "params": params,
+                    }
+                )
+                for user_id in user_ids
+                for resource in resources
+            )
+        )
+
+    def run(self) -> Dict[str, int]:
+        """Runs the workers until every shard is done or dead.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of shards in each state.
+        """
+
+        # Anything still leased belongs to a crawl that crashed.
+        self.queue.release_leases()
+
+        if self.client.token_dict:
+            self.token_store.save(token_dict=self.client.token_dict)
+
+        settings = {
+            "database": self.database,
+            "output_directory": self.output_directory,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+            "tenant_rate": self.tenant_rate / self.processes,
+            "client": {name: getattr(self.client, name) for name in CLIENT_SETTINGS},
+        }
+
+        with ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+
+            futures = [
+                executor.submit(_run_worker, settings, f"worker-{number}")
+                for number in range(self.processes)
+            ]
+
+            for future in futures:
+                future.result()
+
+        return self.queue.counts()
+
+    def status(self) -> Dict[str, int]:
+        """Counts the shards in each state.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of `pending`, `leased`, `done` and `dead` shards.
+        """
+
+        return self.queue.counts()
+
+    def dead_letters(self) -> List[dict]:
+        """Lists the shards that ran out of attempts.
+
+        ### Returns
+        ----
+        List[dict]:
+            The key, payload, attempts and last error of each shard.
+        """
+
+        return self.queue.dead_letters()
+
+
+def _run_worker(settings: dict, worker: str) -> Dict[str, int]:
+    """Leases and crawls shards until the queue is drained, runs in a
+    worker process.
+    """
+
+    from ms_graph.client import MicrosoftGraphClient
+
+    queue = WorkQueue(
+        path=settings["database"],
+        lease_seconds=settings["lease_seconds"],
+        max_attempts=settings["max_attempts"],
+    )
+    token_store = TokenStore(path=settings["database"])
+
+    client = MicrosoftGraphClient(**settings["client"])
+    token_store.sync(client=client)
+
+    client.graph_session = GraphSession(client=client)
+    client.graph_session.enable_rate_limiter(RateLimiter(tenant_rate=settings["tenant_rate"]))
+
+    stats = {"shards": 0, "items": 0, "failed": 0, "lost": 0}
+
+    try:
+
+        while True:
+
+            item = queue.lease(worker=worker)
+
+            if item is None:
+
+                # Other workers may still hand their shards back.
+                if not queue.unfinished():
+                    break
+
+                time.sleep(1.0)
+                continue
+
+            try:
+                stats["items"] += _crawl_shard(
+                    client=client,
+                    queue=queue,
+                    token_store=token_store,
+                    item=item,
+                    worker=worker,
+                    output_directory=settings["output_directory"],
+                )
+            except LeaseLost:
+                # The shard belongs to another worker now, leave it alone.
+                stats["lost"] += 1
+            except requests.HTTPError as error:
+                stats["failed"] += 1
+                status = error.response.status_code if error.response is not None else None
+                queue.fail(key=item.key, worker=worker, error=str(error), retry=_retryable(status))
+            except Exception as error:
+                stats["failed"] += 1
+                queue.fail(key=item.key, worker=worker, error=repr(error))
+            else:
+                if queue.complete(key=item.key, worker=worker):
+                    stats["shards"] += 1
+                else:
+                    stats["lost"] += 1
+
+    finally:
+        queue.close()
+        token_store.close()
+
+    return stats
+
+
+def _crawl_shard(
+    client: object,
+    queue: WorkQueue,
+    token_store: TokenStore,
+    item: WorkItem,
+    worker: str,
+    output_directory: str
+) -> int:
+    """Pages through a shard, appending the items to its file and
+    checkpointing after every page. Raises `LeaseLost` as soon as the
+    shard was handed to another worker, so the two never write the
+    same file.
+    """
+
+    session: GraphSession = client.graph_session
+    checkpoint = dict(item.checkpoint)
+
+    path = os.path.join(output_directory, item.payload["resource"], item.payload["user_id"] + ".jsonl")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # A missing `next_link` key means the shard never started.
+    if "next_link" in checkpoint:
+        link, params = checkpoint["next_link"], None
+    else:
+        link, params = item.payload["endpoint"], item.payload["params"]
+
+    written = 0
+
+    with open(path, "ab") as output:
+
+        # Drop whatever the last attempt wrote after its checkpoint.
+        output.truncate(checkpoint.get("offset", 0))
+        output.seek(0, os.SEEK_END)
+
+        while link:
+
+            token_store.sync(client=client)
+
+            content = session.make_request(method="get", endpoint=link, params=params)
+            params = None
+
+            for value in content.get("value", []):
+                output.write(session.codec.dumps(value) + b"\n")
+                written += 1
+
+            output.flush()
+            os.fsync(output.fileno())
+
+            link = content.get("@odata.nextLink")
+
+            checkpoint = {
+                "next_link": link,
+                "delta_link": content.get("@odata.deltaLink"),
+                "offset": output.tell(),
+                "items": checkpoint.get("items", 0) + len(content.get("value", [])),
+            }
+            if not queue.checkpoint(key=item.key, worker=worker, checkpoint=checkpoint):
+                raise LeaseLost(f"The lease of {item.key} was handed to another worker.")
+
+    return written
+
+
+def _retryable(status: int) -> bool:
+    """Whether a failed shard is worth another attempt."""
+
+    if status is None or status >= 500:
+        return True
+
+    return status in (408, 409, 423, 429)
@@ -0,0 +1,441 @@
+import json
+import sqlite3
+import threading
+
+from typing import Dict
+from typing import List
+from typing import Callable
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.delta import REMOVED
+from ms_graph.utils.delta import DeltaEvent
+from ms_graph.utils.delta import DeltaQuery
+from ms_graph.utils.delta import SQLiteDeltaStore
+
+# The properties kept for every user and group, `members` turns on membership changes.
+USER_FIELDS = [
+    "id", "displayName", "userPrincipalName", "mail", "givenName", "surname",
+    "jobTitle", "department", "officeLocation", "accountEnabled",
+]
+GROUP_FIELDS = [
+    "id", "displayName", "mail", "mailNickname", "mailEnabled",
+    "securityEnabled", "groupTypes", "members",
+]
+
+
+class DirectorySync():
+
+    """
+    ## Overview:
+    ----
+    Keeps a local snapshot of the directory, its users, groups and group
+    memberships, in a SQLite database updated from `/users/delta` and
+    `/groups/delta`. The first sync reads the whole directory, every
+    later sync only reads the changes. Each page of changes is applied
+    in one transaction, and the link to resume from is saved right
+    after it, so a crash in between applies that page again on the
+    next sync. Pages are safe to apply twice, which makes delivery
+    at least once.
+
+    When the saved link has expired, a full round reads the directory
+    again. Every object it returns is marked as seen, and once the
+    round completes, the objects and memberships it did not return are
+    swept from the snapshot. Lookups are answered from the indexed
+    snapshot.
+
+    ### Usage:
+    ----
+        >>> directory = DirectorySync(session=graph_client.graph_session, path="directory.db")
+        >>> directory.sync()
+        {'users': 10250, 'groups': 830}
+        >>> directory.user("adele@contoso.com")["displayName"]
+        'Adele Vance'
+        >>> directory.groups_of(member_id=user_id)
+    """
+
+    def __init__(
+        self,
+        session: object,
+        path: str,
+        user_fields: List[str] = None,
+        group_fields: List[str] = None,
+        page_size: int = None
+    ) -> None:
+        """Initializes the `DirectorySync` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        path : str
+            The SQLite file holding the snapshot and the delta
+            links.
+
+        user_fields : List[str] (optional, Default=None)
+            The user properties to `$select`, defaults to
+            `USER_FIELDS`.
+
+        group_fields : List[str] (optional, Default=None)
+            The group properties to `$select`, defaults to
+            `GROUP_FIELDS`. Leave out `members` to skip the
+            memberships.
+
+        page_size : int (optional, Default=None)
+            The number of objects per page.
+        """
+
+        self.graph_session: GraphSession = session
+        self.path = path
+        self.user_fields = user_fields or USER_FIELDS
+        self.group_fields = group_fields or GROUP_FIELDS
+        self.page_size = page_size
+
+        self.delta = DeltaQuery(session=session, store=SQLiteDeltaStore(path=path))
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                user_principal_name TEXT COLLATE NOCASE,
+                mail TEXT COLLATE NOCASE,
+                display_name TEXT,
+                data TEXT NOT NULL,
+                seen INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS users_upn ON users (user_principal_name);
+            CREATE INDEX IF NOT EXISTS users_mail ON users (mail);
+
+            CREATE TABLE IF NOT EXISTS groups (
+                id TEXT PRIMARY KEY,
+                mail TEXT COLLATE NOCASE,
+                display_name TEXT,
+                data TEXT NOT NULL,
+                seen INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS groups_mail ON groups (mail);
+
+            CREATE TABLE IF NOT EXISTS memberships (
+                group_id TEXT NOT NULL,
+                member_id TEXT NOT NULL,
+                member_type TEXT,
+                seen INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (group_id, member_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS memberships_member ON memberships (member_id);
+
+            -- The full rounds in progress, kept across crashes.
+            CREATE TABLE IF NOT EXISTS full_rounds (key TEXT PRIMARY KEY);
+            """
+        )
+
+    def sync(self) -> Dict[str, int]:
+        """Brings users and groups up to date.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of changed `users` and `groups`.
+        """
+
+        return {"users": self.sync_users(), "groups": self.sync_groups()}
+
+    def sync_users(self) -> int:
+        """Applies the user changes since the last sync.
+
+        ### Returns
+        ----
+        int:
+            The number of changed users.
+        """
+
+        return self._sync(
+            key="directory:users",
+            endpoint="users/delta",
+            fields=self.user_fields,
+            apply=self._apply_user,
+            tables=("users",)
+        )
+
+    def sync_groups(self) -> int:
+        """Applies the group and membership changes since the last sync.
+
+        ### Returns
+        ----
+        int:
+            The number of changed groups.
+        """
+
+        return self._sync(
+            key="directory:groups",
+            endpoint="groups/delta",
+            fields=self.group_fields,
+            apply=self._apply_group,
+            tables=("groups", "memberships")
+        )
+
+    def user(self, key: str) -> dict:
+        """Looks up a user by id, user principal name or mail.
+
+        ### Parameters
+        ----
+        key : str
+            The id, user principal name or mail address.
+
+        ### Returns
+        ----
+        dict:
+            The user, or `None`.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM users WHERE id = ? OR user_principal_name = ? OR mail = ? LIMIT 1",
+                (key, key, key)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def group(self, key: str) -> dict:
+        """Looks up a group by id or mail.
+
+        ### Parameters
+        ----
+        key : str
+            The id or mail address.
+
+        ### Returns
+        ----
+        dict:
+            The group, or `None`.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM groups WHERE id = ? OR mail = ? LIMIT 1", (key, key)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def members(self, group_id: str) -> List[str]:
+        """Lists the direct members of a group.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+
+        ### Returns
+        ----
+        List[str]:
+            The ids of the members.
+        """
+
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute(
+                    "SELECT member_id FROM memberships WHERE group_id = ?", (group_id,)
+                )
+            ]
+
+    def groups_of(self, member_id: str) -> List[str]:
+        """Lists the groups an object is a direct member of.
+
+        ### Parameters
+        ----
+        member_id : str
+            The id of a user, group or device.
+
+        ### Returns
+        ----
+        List[str]:
+            The ids of the groups.
+        """
+
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute(
+                    "SELECT group_id FROM memberships WHERE member_id = ?", (member_id,)
+                )
+            ]
+
+    def counts(self) -> Dict[str, int]:
+        """Counts the objects in the snapshot.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of `users`, `groups` and `memberships`.
+        """
+
+        with self._lock:
+            return {
+                table: self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("users", "groups", "memberships")
+            }
+
+    def close(self) -> None:
+        """Closes the snapshot database."""
+
+        with self._lock:
+            self._connection.close()
+
+        self.delta.store.close()
+
+    def _sync(self, key: str, endpoint: str, fields: List[str], apply, tables: tuple) -> int:
+        """Applies a delta query page by page, sweeping what a full round
+        did not return.
+        """
+
+        headers = {"Prefer": f"odata.maxpagesize={self.page_size}"} if self.page_size else None
+        changed = 0
+
+        if self.delta.store.get_link(key) is None:
+            self._start_round(key=key, tables=tables)
+
+        for events in self.delta.pages(
+            key=key,
+            endpoint=endpoint,
+            params={"$select": ",".join(fields)},
+            additional_headers=headers,
+            on_resync=lambda: self._start_round(key=key, tables=tables)
+        ):
+
+            def apply_page() -> None:
+                for event in events:
+                    apply(event)
+
+            self._transaction(apply_page)
+            changed += len(events)
+
+        return changed + self._sweep(key=key, tables=tables)
+
+    def _transaction(self, work: Callable[[], None]) -> None:
+        """Runs `work` in one transaction."""
+
+        with self._lock:
+
+            self._connection.execute("BEGIN")
+
+            try:
+                work()
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+
+    def _start_round(self, key: str, tables: tuple) -> None:
+        """Records a full round and clears the seen marks of its tables."""
+
+        def start() -> None:
+            self._connection.execute("INSERT OR IGNORE INTO full_rounds (key) VALUES (?)", (key,))
+            for table in tables:
+                self._connection.execute(f"UPDATE {table} SET seen = 0")
+
+        self._transaction(start)
+
+    def _sweep(self, key: str, tables: tuple) -> int:
+        """Deletes the rows a completed full round did not return.
+
+        ### Returns
+        ----
+        int:
+            The number of users or groups removed.
+        """
+
+        swept = []
+
+        def sweep() -> None:
+
+            if self._connection.execute("SELECT 1 FROM full_rounds WHERE key = ?", (key,)).fetchone() is None:
+                return
+
+            for table in tables:
+
+                if table == "memberships":
+                    self._connection.execute("DELETE FROM memberships WHERE seen = 0")
+                    continue
+
+                column = "member_id" if table == "users" else "group_id"
+                ids = [row[0] for row in self._connection.execute(f"SELECT id FROM {table} WHERE seen = 0")]
+
+                self._connection.executemany(
+                    f"DELETE FROM memberships WHERE {column} = ?", ((object_id,) for object_id in ids)
+                )
+                self._connection.executemany(
+                    f"DELETE FROM {table} WHERE id = ?", ((object_id,) for object_id in ids)
+                )
+                swept.extend(ids)
+
+            self._connection.execute("DELETE FROM full_rounds WHERE key = ?", (key,))
+
+        self._transaction(sweep)
+
+        return len(swept)
+
+    def _apply_user(self, event: DeltaEvent) -> None:
+        """Applies a user change, the lock must be held."""
+
+        if event.kind == REMOVED:
+            self._connection.execute("DELETE FROM users WHERE id = ?", (event.id,))
+            self._connection.execute("DELETE FROM memberships WHERE member_id = ?", (event.id,))
+            return
+
+        data = self._merge(table="users", item=event.item)
+
+        self._connection.execute(
+            """
+            INSERT OR REPLACE INTO users (id, user_principal_name, mail, display_name, data)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (data["id"], data.get("userPrincipalName"), data.get("mail"), data.get("displayName"), json.dumps(data))
+        )
+
+    def _apply_group(self, event: DeltaEvent) -> None:
+        """Applies a group change and its membership changes, the lock
+        must be held.
+        """
+
+        if event.kind == REMOVED:
+            self._connection.execute("DELETE FROM groups WHERE id = ?", (event.id,))
+            self._connection.execute("DELETE FROM memberships WHERE group_id = ?", (event.id,))
+            return
+
+        item = dict(event.item)
+        members = item.pop("members@delta", [])
+        data = self._merge(table="groups", item=item)
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO groups (id, mail, display_name, data) VALUES (?, ?, ?, ?)",
+            (data["id"], data.get("mail"), data.get("displayName"), json.dumps(data))
+        )
+
+        self._connection.executemany(
+            "DELETE FROM memberships WHERE group_id = ? AND member_id = ?",
+            ((data["id"], member["id"]) for member in members if "@removed" in member)
+        )
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO memberships (group_id, member_id, member_type) VALUES (?, ?, ?)",
+            (
+                (data["id"], member["id"], member.get("@odata.type", "").rpartition(".")[2] or None)
+                for member in members if "@removed" not in member
+            )
+        )
+
+    def _merge(self, table: str, item: dict) -> dict:
+        """Merges a change into the stored object, delta rounds after the
+        first may only carry the changed properties.
+        """
+
+        row = self._connection.execute(f"SELECT data FROM {table} WHERE id = ?", (item["id"],)).fetchone()
+
+        data = json.loads(row[0]) if row else {}
+        data.update((name, value) for name, value in item.items() if not name.startswith("@"))
+
+        return data
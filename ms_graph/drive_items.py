@@ -1,4 +1,5 @@
 from ms_graph.session import GraphSession
+from ms_graph.utils.pagination import ItemIterator
 
 
 class DriveItems():
@@ -294,3 +295,43 @@ class DriveItems():
         )
 
         return content
+
+    def iter_drive_item_children(
+        self, drive_id: str, item_id: str, params: dict = None, stream: bool = True,
+        model: type = None
+    ) -> ItemIterator:
+        """Iterates over the children of a DriveItem Resource, following
+        the pagination links.
+
+        ### Parameters
+        ----
+        drive_id : str
+            The Drive ID in which the resource exist.
+
+        item_id : str
+            The item ID of the folder whose children you
+            want to return.
+
+        params : dict (optional, Default=None)
+            The OData query params, for example `{"$top": 999}`.
+
+        stream : bool (optional, Default=True)
+            If `True` each page is decoded item by item as it
+            is read.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each item, for
+            example `ms_graph.models.DriveItem`.
+
+        ### Returns
+        ----
+        ItemIterator :
+            An iterator over the DriveItem resource objects.
+        """
+
+        return self.graph_session.iter_items(
+            endpoint=self.collections_endpoint + f"/{drive_id}/items/{item_id}/children",
+            params=params,
+            stream=stream,
+            model=model
+        )
@@ -0,0 +1,199 @@
+import threading
+
+from typing import Any
+from typing import Tuple
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from concurrent.futures import Future
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from ms_graph.utils.deadline import Deadline
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import call_with_deadline
+
+
+class FanOut():
+
+    """
+    ## Overview:
+    ----
+    Runs a service method across many users, groups or sites with a
+    bounded thread pool, and streams back `(key, result)` pairs in the
+    order they complete. If a call fails, the exception is returned in
+    place of the result so one bad mailbox does not stop a sweep.
+
+    Requests still go through the `GraphSession`, so the session rate
+    limiter keeps every mailbox under its own throttling budget.
+
+    ### Usage:
+    ----
+        >>> fan_out = FanOut(max_workers=16)
+        >>> for user_id, messages in fan_out.run(
+            method=graph_client.mail().list_user_messages,
+            keys=user_ids
+        ):
+        ...     if isinstance(messages, Exception):
+        ...         print(user_id, messages)
+    """
+
+    def __init__(self, max_workers: int = 8, max_pending: int = None) -> None:
+        """Initializes the `FanOut` object.
+
+        ### Parameters
+        ----
+        max_workers : int (optional, Default=8)
+            The number of calls run at the same time.
+
+        max_pending : int (optional, Default=None)
+            The number of calls submitted ahead of the results
+            being consumed, defaults to twice `max_workers`.
+            The keys are read lazily, so a generator of millions
+            of users is never held in memory.
+        """
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+
+        # Every run has its own flag, so starting a run never clears
+        # the cancel of another one.
+        self._lock = threading.Lock()
+        self._runs = set()
+        self._cancelled = threading.Event()
+
+    def run(
+        self,
+        method: Callable,
+        keys: Iterable,
+        key_argument: str = "user_id",
+        **kwargs: Any
+    ) -> Iterator[Tuple[Any, Any]]:
+        """Calls `method` once per key.
+
+        ### Parameters
+        ----
+        method : Callable
+            A service method, for example `Mail.list_user_messages`.
+
+        keys : Iterable
+            The user, group or site ids to run the method for.
+
+        key_argument : str (optional, Default="user_id")
+            The name of the argument the key is passed as, for
+            example `group_id` or `site_id`.
+
+        **kwargs : Any
+            Any other arguments passed to every call.
+
+        ### Yields
+        ----
+        Tuple[Any, Any]:
+            The key and the result of the call, or the
+            exception it raised.
+
+        ### Raises
+        ----
+        DeadlineExceeded:
+            If the deadline of the consumer passes while it
+            waits for a result.
+        """
+
+        cancelled = threading.Event()
+
+        # The calls run under the deadline of the consumer.
+        deadline = current_deadline()
+
+        with self._lock:
+            self._runs.add(cancelled)
+            self._cancelled = cancelled
+
+        keys = iter(keys)
+        pending = {}
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="ms_graph_fan_out"
+        )
+
+        try:
+
+            self._submit(executor, pending, keys, method, key_argument, kwargs, cancelled, deadline)
+
+            while pending:
+
+                done, _ = wait(
+                    list(pending),
+                    timeout=None if deadline is None else deadline.remaining(),
+                    return_when=FIRST_COMPLETED
+                )
+
+                if not done and deadline is not None:
+                    deadline.check()
+
+                for future in done:
+
+                    key = pending.pop(future)
+
+                    if future.cancelled():
+                        continue
+
+                    error = future.exception()
+
+                    yield key, error if error is not None else future.result()
+
+                if cancelled.is_set():
+                    break
+
+                self._submit(executor, pending, keys, method, key_argument, kwargs, cancelled, deadline)
+
+        finally:
+
+            # Runs on cancel and when the consumer stops iterating early.
+            for future in pending:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
+            with self._lock:
+                self._runs.discard(cancelled)
+
+    def cancel(self) -> None:
+        """Stops submitting calls and cancels the ones not started yet,
+        for every run in progress. Calls already in flight finish, but
+        their results are dropped. Runs started afterwards are not
+        affected.
+        """
+
+        with self._lock:
+            for cancelled in self._runs:
+                cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether `cancel` was called during the latest run."""
+
+        return self._cancelled.is_set()
+
+    def _submit(
+        self,
+        executor: ThreadPoolExecutor,
+        pending: dict,
+        keys: Iterator,
+        method: Callable,
+        key_argument: str,
+        kwargs: dict,
+        cancelled: threading.Event,
+        deadline: Deadline
+    ) -> None:
+        """Tops up the pending calls from the keys."""
+
+        while len(pending) < self.max_pending and not cancelled.is_set():
+
+            try:
+                key = next(keys)
+            except StopIteration:
+                return
+
+            future: Future = executor.submit(call_with_deadline, deadline, method, **{key_argument: key}, **kwargs)
+            pending[future] = key
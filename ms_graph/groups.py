@@ -1,4 +1,13 @@
+from typing import List
+from typing import Iterable
+
+from requests import HTTPError
+
 from ms_graph.session import GraphSession
+from ms_graph.utils.batch import BatchExecutor
+from ms_graph.utils.pagination import ItemIterator
+from ms_graph.utils.membership import MembershipIndex
+from ms_graph.utils.membership import member_kind
 
 
 class Groups():
@@ -49,3 +58,127 @@ class Groups():
         )
 
         return content
+
+    def iter_group_members(
+        self,
+        group_id: str,
+        select: List[str] = None,
+        transitive: bool = False,
+        model: type = None
+    ) -> ItemIterator:
+        """Iterates over the members of a group, following the pagination
+        links.
+
+        ### Parameters
+        ----
+        group_id : str
+            The ID of the group.
+
+        select : List[str] (optional, Default=None)
+            The properties to return, defaults to `id` only.
+
+        transitive : bool (optional, Default=False)
+            If `True` the members of nested groups are included,
+            through `/transitiveMembers`.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each member.
+
+        ### Returns
+        ----
+        ItemIterator
+            An iterator over the `directoryObject` members.
+        """
+
+        relationship = "transitiveMembers" if transitive else "members"
+
+        return self.graph_session.iter_items(
+            endpoint=f"{self.collections_endpoint}/{group_id}/{relationship}",
+            params={"$select": ",".join(select or ["id"]), "$top": 999},
+            model=model
+        )
+
+    def load_memberships(
+        self,
+        group_ids: Iterable[str],
+        index: MembershipIndex = None,
+        transitive: bool = False,
+        expand_nested: bool = True,
+        max_workers: int = 4
+    ) -> MembershipIndex:
+        """Loads, or refreshes, the members of many groups into an index.
+        The first page of every group is read through `$batch` calls of
+        20, and the following pages one request at a time.
+
+        ### Parameters
+        ----
+        group_ids : Iterable[str]
+            The IDs of the groups.
+
+        index : MembershipIndex (optional, Default=None)
+            The index to refresh, a new one by default.
+
+        transitive : bool (optional, Default=False)
+            If `True` the transitive members are read from Graph
+            instead of being computed from the nested groups.
+
+        expand_nested : bool (optional, Default=True)
+            If `True` the nested groups found along the way are
+            loaded too, so the computed transitive members are
+            complete.
+
+        max_workers : int (optional, Default=4)
+            The number of `$batch` calls in flight.
+
+        ### Returns
+        ----
+        MembershipIndex
+            The index holding the memberships.
+        """
+
+        index = index or MembershipIndex()
+        relationship = "transitiveMembers" if transitive else "members"
+        batch = BatchExecutor(
+            session=self.graph_session, max_workers=max_workers, max_concurrency=max_workers * 20
+        )
+
+        group_ids = list(dict.fromkeys(group_ids))
+
+        while group_ids:
+
+            results = batch.execute(
+                batch_requests=[
+                    {"method": "GET", "url": f"/groups/{group_id}/{relationship}?$select=id&$top=999"}
+                    for group_id in group_ids
+                ]
+            )
+
+            for group_id, result in zip(group_ids, results):
+
+                if result.status == 404:
+                    index.remove_group(group_id=group_id)
+                    continue
+
+                if not result.ok:
+                    raise HTTPError(f"{result.status} Error for the members of group {group_id}: {result.error}")
+
+                members = [
+                    (member["id"], member_kind(member.get("@odata.type")))
+                    for member in result.body.get("value", [])
+                ]
+
+                next_link = result.body.get("@odata.nextLink")
+                if next_link:
+                    members.extend(
+                        (member["id"], member_kind(member.get("@odata.type")))
+                        for member in self.graph_session.iter_items(endpoint=next_link)
+                    )
+
+                if transitive:
+                    index.set_transitive_members(group_id=group_id, members=members)
+                else:
+                    index.set_members(group_id=group_id, members=members)
+
+            group_ids = index.nested_groups() if expand_nested and not transitive else []
+
+        return index
@@ -1,4 +1,24 @@
+import os
+import base64
+import mimetypes
+
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import BinaryIO
+from typing import Iterable
+
 from ms_graph.session import GraphSession
+from ms_graph.utils.pagination import ItemIterator
+from ms_graph.utils.batch import BatchResult
+from ms_graph.utils.batch import BatchExecutor
+from ms_graph.utils.upload import upload_in_chunks
+
+# Attachments above this go through an upload session.
+INLINE_ATTACHMENT_LIMIT = 3 * 1024 * 1024
+
+# The attachment fields listed by default, everything but `contentBytes`.
+ATTACHMENT_FIELDS = "id,name,contentType,size,isInline,lastModifiedDateTime"
 
 
 class Mail:
@@ -66,6 +86,67 @@ class Mail:
 
         return content
 
+    def iter_my_messages(
+        self, params: dict = None, stream: bool = True, model: type = None
+    ) -> ItemIterator:
+        """Iterates over every message in the signed-in user"s mailbox,
+        following the pagination links.
+
+        ### Parameters
+        ----
+        params : dict (optional, Default=None)
+            The OData query params, for example `{"$top": 999}`.
+
+        stream : bool (optional, Default=True)
+            If `True` each page is decoded message by message
+            as it is read.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each message, for
+            example `ms_graph.models.Message`.
+
+        ### Returns
+        ----
+        ItemIterator
+            An iterator over the `Message` objects.
+        """
+
+        return self.graph_session.iter_items(
+            endpoint="/me/messages", params=params, stream=stream, model=model
+        )
+
+    def iter_user_messages(
+        self, user_id: str, params: dict = None, stream: bool = True, model: type = None
+    ) -> ItemIterator:
+        """Iterates over every message in the user"s mailbox, following
+        the pagination links.
+
+        ### Parameters
+        ----
+        user_id : str
+            The user for which to query messages for.
+
+        params : dict (optional, Default=None)
+            The OData query params, for example `{"$top": 999}`.
+
+        stream : bool (optional, Default=True)
+            If `True` each page is decoded message by message
+            as it is read.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each message, for
+            example `ms_graph.models.Message`.
+
+        ### Returns
+        ----
+        ItemIterator
+            An iterator over the `Message` objects.
+        """
+
+        return self.graph_session.iter_items(
+            endpoint=f"/users/{user_id}/messages", params=params, stream=stream, model=model
+        )
+
     def create_my_message(self, message: dict) -> dict:
         """Use this API to create a draft of a new message.
 
@@ -241,7 +322,7 @@ class Mail:
         """
 
         content = self.graph_session.make_request(
-            method="get", endpoint=f"me/messages/{message_id}"
+            method="delete", endpoint=f"/me/messages/{message_id}"
         )
 
         return content
@@ -458,6 +539,129 @@ class Mail:
 
         return content
 
+    def bulk_move_messages(
+        self, message_ids: Iterable[str], destination_id: str, user_id: str = "me"
+    ) -> Dict[str, BatchResult]:
+        """Moves many messages to another folder with `$batch` calls.
+
+        ### Parameters
+        ----
+        message_ids : Iterable[str]
+            The IDs of the messages you wish to move.
+
+        destination_id : str
+            The ID or well known name of the destination folder.
+
+        user_id : str (optional, Default="me")
+            The user ID of the mailbox, `me` for the default user.
+
+        ### Returns
+        ----
+        Dict[str, BatchResult]
+            The result of each move by message ID.
+        """
+
+        return self._bulk(
+            user_id=user_id,
+            message_ids=message_ids,
+            method="POST",
+            path="/move",
+            body={"destinationId": destination_id}
+        )
+
+    def bulk_delete_messages(self, message_ids: Iterable[str], user_id: str = "me") -> Dict[str, BatchResult]:
+        """Deletes many messages with `$batch` calls.
+
+        ### Parameters
+        ----
+        message_ids : Iterable[str]
+            The IDs of the messages you wish to delete.
+
+        user_id : str (optional, Default="me")
+            The user ID of the mailbox, `me` for the default user.
+
+        ### Returns
+        ----
+        Dict[str, BatchResult]
+            The result of each delete by message ID.
+        """
+
+        return self._bulk(user_id=user_id, message_ids=message_ids, method="DELETE")
+
+    def bulk_mark_read(
+        self, message_ids: Iterable[str], is_read: bool = True, user_id: str = "me"
+    ) -> Dict[str, BatchResult]:
+        """Marks many messages as read, or unread, with `$batch` calls.
+
+        ### Parameters
+        ----
+        message_ids : Iterable[str]
+            The IDs of the messages you wish to update.
+
+        is_read : bool (optional, Default=True)
+            `False` marks the messages as unread.
+
+        user_id : str (optional, Default="me")
+            The user ID of the mailbox, `me` for the default user.
+
+        ### Returns
+        ----
+        Dict[str, BatchResult]
+            The result of each update by message ID.
+        """
+
+        return self._bulk(
+            user_id=user_id, message_ids=message_ids, method="PATCH", body={"isRead": is_read}
+        )
+
+    def bulk_categorize(
+        self, message_ids: Iterable[str], categories: List[str], user_id: str = "me"
+    ) -> Dict[str, BatchResult]:
+        """Sets the categories of many messages with `$batch` calls.
+
+        ### Parameters
+        ----
+        message_ids : Iterable[str]
+            The IDs of the messages you wish to update.
+
+        categories : List[str]
+            The categories, they replace the current ones.
+
+        user_id : str (optional, Default="me")
+            The user ID of the mailbox, `me` for the default user.
+
+        ### Returns
+        ----
+        Dict[str, BatchResult]
+            The result of each update by message ID.
+        """
+
+        return self._bulk(
+            user_id=user_id, message_ids=message_ids, method="PATCH", body={"categories": categories}
+        )
+
+    def _bulk(
+        self,
+        user_id: str,
+        message_ids: Iterable[str],
+        method: str,
+        path: str = "",
+        body: dict = None
+    ) -> Dict[str, BatchResult]:
+        """Runs the same request for many messages of a mailbox."""
+
+        prefix = "/me" if user_id == "me" else f"/users/{user_id}"
+        message_ids = list(dict.fromkeys(message_ids))
+
+        results = BatchExecutor(session=self.graph_session).execute(
+            batch_requests=[
+                {"method": method, "url": f"{prefix}/messages/{message_id}{path}", "body": body}
+                for message_id in message_ids
+            ]
+        )
+
+        return dict(zip(message_ids, results))
+
     def create_reply_my_message(self, message_id: str) -> dict:
         """Create a draft of the reply to the specified message. For
         the default user.
@@ -851,7 +1055,8 @@ class Mail:
             It does not return anything in the response body.
         """
 
-        message["saveToSentItems"] = save_to_send_items
+        # Copy it, so the caller can send the same message again.
+        message = {**message, "saveToSentItems": save_to_send_items}
 
         content = self.graph_session.make_request(
             method="post", endpoint="/me/sendMail", json=message
@@ -889,7 +1094,8 @@ class Mail:
             It does not return anything in the response body.
         """
 
-        message["saveToSentItems"] = save_to_send_items
+        # Copy it, so the caller can send the same message again.
+        message = {**message, "saveToSentItems": save_to_send_items}
 
         content = self.graph_session.make_request(
             method="post", endpoint=f"/users/{user_id}/sendMail", json=message
@@ -897,7 +1103,7 @@ class Mail:
 
         return content
 
-    def list_my_attachements(self, message_id: str) -> dict:
+    def list_my_attachements(self, message_id: str, include_content: bool = False) -> dict:
         """Retrieve a list of `attachment` objects attached to a message.
 
         ### Parameters
@@ -906,6 +1112,11 @@ class Mail:
             The message Id of the mailItem resource that
             you want to query attachments for.
 
+        include_content : bool (optional, Default=False)
+            If `True` the base64 `contentBytes` of every attachment
+            are returned as well. Leave it off and use
+            `download_my_attachment` for the content instead.
+
         ### Returns
         ----
         dict
@@ -913,28 +1124,263 @@ class Mail:
             and collection of Attachment objects in the response body.
         """
         content = self.graph_session.make_request(
-            method="get", endpoint=f"/me/messages/{message_id}/attachments"
+            method="get",
+            endpoint=f"/me/messages/{message_id}/attachments",
+            params=None if include_content else {"$select": ATTACHMENT_FIELDS}
         )
 
         return content
 
-    def list_user_attachements(self, user_id: str, message_id: str) -> dict:
-        """Get all the `messageRule` objects defined for the user"s Inbox. For
-        the default user.
+    def list_user_attachements(self, user_id: str, message_id: str, include_content: bool = False) -> dict:
+        """Retrieve a list of `attachment` objects attached to a message
+        of the specified user.
+
+        ### Parameters
+        ----
+        user_id : str
+            The user for which to query attachments for.
+
+        message_id : str
+            The message Id of the mailItem resource that
+            you want to query attachments for.
+
+        include_content : bool (optional, Default=False)
+            If `True` the base64 `contentBytes` of every attachment
+            are returned as well.
 
         ### Returns
         ----
         dict
             If successful, this method returns a 200 OK response code
-            and collection of messageRule objects in the response body.
+            and collection of Attachment objects in the response body.
         """
 
         content = self.graph_session.make_request(
-            method="get", endpoint=f"/users/{user_id}/messages/{message_id}/attachments"
+            method="get",
+            endpoint=f"/users/{user_id}/messages/{message_id}/attachments",
+            params=None if include_content else {"$select": ATTACHMENT_FIELDS}
         )
 
         return content
 
+    def download_my_attachment(
+        self,
+        message_id: str,
+        attachment_id: str,
+        file: Union[str, BinaryIO],
+        chunk_size: int = 65536
+    ) -> int:
+        """Streams the raw content of an attachment into a file.
+
+        ### Parameters
+        ----
+        message_id : str
+            The message Id the attachment belongs to.
+
+        attachment_id : str
+            The attachment Id.
+
+        file : Union[str, BinaryIO]
+            A path, or a file opened in binary mode.
+
+        chunk_size : int (optional, Default=65536)
+            The number of bytes read at a time.
+
+        ### Returns
+        ----
+        int
+            The number of bytes written.
+        """
+
+        return self._download_attachment(
+            endpoint=f"/me/messages/{message_id}/attachments/{attachment_id}/$value",
+            file=file,
+            chunk_size=chunk_size
+        )
+
+    def download_user_attachment(
+        self,
+        user_id: str,
+        message_id: str,
+        attachment_id: str,
+        file: Union[str, BinaryIO],
+        chunk_size: int = 65536
+    ) -> int:
+        """Streams the raw content of an attachment of the specified user
+        into a file.
+
+        ### Parameters
+        ----
+        user_id : str
+            The user the message belongs to.
+
+        message_id : str
+            The message Id the attachment belongs to.
+
+        attachment_id : str
+            The attachment Id.
+
+        file : Union[str, BinaryIO]
+            A path, or a file opened in binary mode.
+
+        chunk_size : int (optional, Default=65536)
+            The number of bytes read at a time.
+
+        ### Returns
+        ----
+        int
+            The number of bytes written.
+        """
+
+        return self._download_attachment(
+            endpoint=f"/users/{user_id}/messages/{message_id}/attachments/{attachment_id}/$value",
+            file=file,
+            chunk_size=chunk_size
+        )
+
+    def add_my_attachment(
+        self,
+        message_id: str,
+        file_path: str,
+        name: str = None,
+        content_type: str = None
+    ) -> dict:
+        """Attaches a file to a draft message. Files up to 3 MB are sent
+        inline, larger ones go through an upload session in chunks.
+
+        ### Parameters
+        ----
+        message_id : str
+            The Id of the draft message.
+
+        file_path : str
+            The path of the file to attach.
+
+        name : str (optional, Default=None)
+            The attachment name, defaults to the file name.
+
+        content_type : str (optional, Default=None)
+            The MIME type, guessed from the name by default.
+
+        ### Returns
+        ----
+        dict
+            The created attachment for inline uploads, otherwise
+            the response to the last chunk.
+        """
+
+        return self._add_attachment(
+            endpoint=f"/me/messages/{message_id}/attachments",
+            file_path=file_path,
+            name=name,
+            content_type=content_type
+        )
+
+    def add_user_attachment(
+        self,
+        user_id: str,
+        message_id: str,
+        file_path: str,
+        name: str = None,
+        content_type: str = None
+    ) -> dict:
+        """Attaches a file to a draft message of the specified user. Files
+        up to 3 MB are sent inline, larger ones go through an upload session
+        in chunks.
+
+        ### Parameters
+        ----
+        user_id : str
+            The user the draft belongs to.
+
+        message_id : str
+            The Id of the draft message.
+
+        file_path : str
+            The path of the file to attach.
+
+        name : str (optional, Default=None)
+            The attachment name, defaults to the file name.
+
+        content_type : str (optional, Default=None)
+            The MIME type, guessed from the name by default.
+
+        ### Returns
+        ----
+        dict
+            The created attachment for inline uploads, otherwise
+            the response to the last chunk.
+        """
+
+        return self._add_attachment(
+            endpoint=f"/users/{user_id}/messages/{message_id}/attachments",
+            file_path=file_path,
+            name=name,
+            content_type=content_type
+        )
+
+    def _download_attachment(self, endpoint: str, file: Union[str, BinaryIO], chunk_size: int) -> int:
+        """Streams an attachment `$value` into a path or a file."""
+
+        written = 0
+
+        with self.graph_session.stream_request(method="get", endpoint=endpoint) as response:
+
+            output = open(file, "wb") if isinstance(file, str) else file
+
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    output.write(chunk)
+                    written += len(chunk)
+            finally:
+                if output is not file:
+                    output.close()
+
+        return written
+
+    def _add_attachment(self, endpoint: str, file_path: str, name: str, content_type: str) -> dict:
+        """Attaches a file inline, or through an upload session when it is
+        too large to send in one request.
+        """
+
+        name = name or os.path.basename(file_path)
+        content_type = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        size = os.path.getsize(file_path)
+
+        with open(file_path, "rb") as file:
+
+            if size <= INLINE_ATTACHMENT_LIMIT:
+                return self.graph_session.make_request(
+                    method="post",
+                    endpoint=endpoint,
+                    json={
+                        "@odata.type": "#microsoft.graph.fileAttachment",
+                        "name": name,
+                        "contentType": content_type,
+                        "contentBytes": base64.b64encode(file.read()).decode("ascii"),
+                    }
+                )
+
+            upload_session = self.graph_session.make_request(
+                method="post",
+                endpoint=f"{endpoint}/createUploadSession",
+                json={
+                    "AttachmentItem": {
+                        "attachmentType": "file",
+                        "name": name,
+                        "size": size,
+                        "contentType": content_type,
+                    }
+                }
+            )
+
+            return upload_in_chunks(
+                session=self.graph_session,
+                upload_url=upload_session["uploadUrl"],
+                file=file,
+                size=size
+            )
+
     def list_my_rules(self) -> dict:
         """Get all the `messageRule` objects defined for the user"s Inbox. For
         the default user.
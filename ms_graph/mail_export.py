@@ -0,0 +1,521 @@
+import os
+import re
+import zlib
+import queue
+import sqlite3
+import hashlib
+import threading
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Iterable
+from typing import Iterator
+
+from ms_graph.models import parse_datetime
+from ms_graph.session import GraphSession
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import call_with_deadline
+
+# Lines that need an extra `>` in the mboxrd format.
+_FROM_LINE = re.compile(rb"^>*From ")
+
+FORMATS = ("mbox", "eml")
+
+
+class MimeExporter():
+
+    """
+    ## Overview:
+    ----
+    Archives mailboxes as raw MIME, read from `/messages/{id}/$value`.
+    Each message is streamed chunk by chunk straight into the archive,
+    so no message is ever held in memory. Messages are either appended
+    to `mbox` files, one file per worker rotated once it reaches
+    `max_file_bytes`, or written to one `eml` file each, and can be gzip
+    compressed as they are written.
+
+    Every exported message is recorded in a SQLite checkpoint next to
+    the archive, so an interrupted export resumes where it stopped, and
+    any message half written by the interrupted run is cut off the end
+    of its file.
+
+    ### Usage:
+    ----
+        >>> exporter = MimeExporter(
+            session=graph_client.graph_session,
+            output_directory="archive",
+            compress=True
+        )
+        >>> exporter.export_mailbox(user_id="8bc6")
+        {'exported': 5120, 'skipped': 0, 'failed': 0, 'bytes': 412316860}
+    """
+
+    def __init__(
+        self,
+        session: object,
+        output_directory: str,
+        format: str = "mbox",
+        compress: bool = False,
+        max_file_bytes: int = 1 << 30,
+        max_workers: int = 4,
+        chunk_size: int = 65536,
+        checkpoint_path: str = None,
+    ) -> None:
+        """Initializes the `MimeExporter` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        output_directory : str
+            The directory the archives are written to, one
+            sub directory per mailbox.
+
+        format : str (optional, Default="mbox")
+            Either `mbox` or `eml`.
+
+        compress : bool (optional, Default=False)
+            If `True` the archives are gzip compressed. Every
+            message is its own gzip member, which standard
+            tools read as one stream.
+
+        max_file_bytes : int (optional, Default=1 << 30)
+            The size an `mbox` file is rotated at.
+
+        max_workers : int (optional, Default=4)
+            The number of messages downloaded at the same time,
+            Outlook allows 4 concurrent requests per mailbox.
+
+        chunk_size : int (optional, Default=65536)
+            The number of bytes read at a time.
+
+        checkpoint_path : str (optional, Default=None)
+            The SQLite checkpoint, defaults to `export.db` in
+            the output directory.
+        """
+
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format}, expected one of {FORMATS}.")
+
+        self.graph_session: GraphSession = session
+        self.output_directory = output_directory
+        self.format = format
+        self.compress = compress
+        self.max_file_bytes = max_file_bytes
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+        self.failures: List[Tuple[str, str]] = []
+
+        os.makedirs(output_directory, exist_ok=True)
+
+        self.checkpoint = _ExportCheckpoint(
+            path=checkpoint_path or os.path.join(output_directory, "export.db")
+        )
+
+    def export_mailbox(self, user_id: str = "me", folder_id: str = None, params: dict = None) -> Dict[str, int]:
+        """Exports every message of a mailbox, or of one folder,
+        skipping the messages exported by earlier runs.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default="me")
+            The user whose mailbox is exported.
+
+        folder_id : str (optional, Default=None)
+            Only export this folder, for example `inbox`.
+
+        params : dict (optional, Default=None)
+            Extra query params for the message listing, for
+            example a `$filter` on `receivedDateTime`.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of messages `exported`, `skipped` and
+            `failed`, and the `bytes` downloaded.
+        """
+
+        prefix = "me" if user_id == "me" else f"users/{user_id}"
+        mailbox = user_id.lower()
+        directory = os.path.join(self.output_directory, re.sub(r"[^\w.@-]", "_", mailbox))
+
+        os.makedirs(directory, exist_ok=True)
+        self._repair(mailbox=mailbox, directory=directory)
+
+        listing = self.graph_session.iter_items(
+            endpoint=f"{prefix}/mailFolders/{folder_id}/messages" if folder_id else f"{prefix}/messages",
+            params={"$select": "id,receivedDateTime", "$top": 1000, **(params or {})},
+            stream=True
+        )
+
+        stats = {"exported": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        failures: List[Tuple[str, str]] = []
+        lock = threading.Lock()
+        work: "queue.Queue" = queue.Queue(maxsize=self.max_workers * 4)
+
+        # The workers download under the deadline of the caller.
+        deadline = current_deadline()
+
+        workers = [
+            threading.Thread(
+                target=call_with_deadline,
+                args=(deadline, self._work, work, prefix, mailbox, directory, number, stats, failures, lock),
+                name=f"ms_graph_mime_export_{number}",
+                daemon=True
+            )
+            for number in range(self.max_workers)
+        ]
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            for page in _pages(listing, size=500):
+
+                done = self.checkpoint.exported(mailbox=mailbox, message_ids=[item["id"] for item in page])
+
+                for item in page:
+                    if item["id"] in done:
+                        stats["skipped"] += 1
+                    else:
+                        work.put(item)
+
+        finally:
+
+            for _ in workers:
+                work.put(None)
+
+            for worker in workers:
+                worker.join()
+
+        self.failures = failures
+
+        return stats
+
+    def close(self) -> None:
+        """Closes the checkpoint database."""
+
+        self.checkpoint.close()
+
+    def _work(
+        self,
+        work: "queue.Queue",
+        prefix: str,
+        mailbox: str,
+        directory: str,
+        number: int,
+        stats: dict,
+        failures: list,
+        lock: threading.Lock
+    ) -> None:
+        """Downloads messages until the listing is exhausted, runs in a
+        worker thread with its own archive file.
+        """
+
+        writer = _MboxWriter(
+            directory=directory,
+            worker=number,
+            compress=self.compress,
+            max_file_bytes=self.max_file_bytes
+        ) if self.format == "mbox" else None
+
+        try:
+
+            while True:
+
+                item = work.get()
+
+                if item is None:
+                    return
+
+                try:
+
+                    response = self.graph_session.stream_request(
+                        method="get", endpoint=f"{prefix}/messages/{item['id']}/$value"
+                    )
+
+                    with response:
+
+                        chunks = _Counted(response.iter_content(chunk_size=self.chunk_size))
+
+                        if writer is not None:
+                            path, offset = writer.write(
+                                chunks=chunks, received=item.get("receivedDateTime")
+                            )
+                        else:
+                            path, offset = self._write_eml(
+                                directory=directory, message_id=item["id"], chunks=chunks
+                            )
+
+                except Exception as error:
+                    with lock:
+                        stats["failed"] += 1
+                        failures.append((item["id"], repr(error)))
+                    continue
+
+                self.checkpoint.record(
+                    mailbox=mailbox, message_id=item["id"], path=os.path.basename(path), offset=offset
+                )
+
+                with lock:
+                    stats["exported"] += 1
+                    stats["bytes"] += chunks.count
+
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _write_eml(self, directory: str, message_id: str, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        """Streams a message into its own file, renamed into place once
+        it is complete.
+        """
+
+        path = os.path.join(directory, _safe_name(message_id) + (".eml.gz" if self.compress else ".eml"))
+        partial = path + ".partial"
+
+        with open(partial, "wb") as output:
+
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress else None
+
+            for chunk in chunks:
+                output.write(compressor.compress(chunk) if compressor else chunk)
+
+            if compressor:
+                output.write(compressor.flush())
+
+            offset = output.tell()
+
+        os.replace(partial, path)
+
+        return path, offset
+
+    def _repair(self, mailbox: str, directory: str) -> None:
+        """Cuts whatever an interrupted run wrote after the last
+        recorded message off the end of each archive. An archive with
+        no recorded message is left alone, it may not be ours.
+        """
+
+        offsets = self.checkpoint.offsets(mailbox=mailbox)
+
+        for name in os.listdir(directory):
+
+            path = os.path.join(directory, name)
+
+            if name.endswith(".partial"):
+                os.remove(path)
+            elif ".mbox" in name and name in offsets and os.path.getsize(path) > offsets[name]:
+                with open(path, "r+b") as archive:
+                    archive.truncate(offsets[name])
+
+
+class _MboxWriter():
+
+    """Appends messages to the rotating `mbox` files of one worker."""
+
+    def __init__(self, directory: str, worker: int, compress: bool, max_file_bytes: int) -> None:
+
+        self.directory = directory
+        self.worker = worker
+        self.compress = compress
+        self.max_file_bytes = max_file_bytes
+
+        self._file = None
+        self._path = None
+        self._sequence = 0
+
+    def write(self, chunks: Iterable[bytes], received: str = None) -> Tuple[str, int]:
+        """Appends a message, returns the file and the offset it ends at."""
+
+        if self._file is None or self._file.tell() >= self.max_file_bytes:
+            self._rotate()
+
+        when = parse_datetime(received).ctime() if received else "Thu Jan  1 00:00:00 1970"
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress else None
+        start = self._file.tell()
+
+        try:
+
+            for data in _mboxrd(chunks=chunks, separator=f"From MAILER-DAEMON {when}\n".encode()):
+                self._file.write(compressor.compress(data) if compressor else data)
+
+            if compressor:
+                self._file.write(compressor.flush())
+
+        except BaseException:
+
+            # Never leave half a message in front of the next one.
+            self._file.truncate(start)
+            self._file.seek(start)
+            raise
+
+        self._file.flush()
+
+        return self._path, self._file.tell()
+
+    def close(self) -> None:
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self) -> None:
+        """Moves on to the next file that does not exist yet."""
+
+        self.close()
+
+        extension = ".mbox.gz" if self.compress else ".mbox"
+
+        while True:
+
+            self._sequence += 1
+            self._path = os.path.join(
+                self.directory, f"worker-{self.worker}-{self._sequence:05d}{extension}"
+            )
+
+            if not os.path.exists(self._path) or os.path.getsize(self._path) < self.max_file_bytes:
+                break
+
+        self._file = open(self._path, "ab")
+
+
+class _ExportCheckpoint():
+
+    """Records the exported messages of each mailbox in SQLite, with the
+    name of their file in the mailbox directory, so the archive can be
+    moved or reached through another path.
+    """
+
+    def __init__(self, path: str) -> None:
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS exported (
+                mailbox TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                PRIMARY KEY (mailbox, message_id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def record(self, mailbox: str, message_id: str, path: str, offset: int) -> None:
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO exported (mailbox, message_id, path, offset) VALUES (?, ?, ?, ?)",
+                (mailbox, message_id, path, offset)
+            )
+
+    def exported(self, mailbox: str, message_ids: List[str]) -> set:
+
+        found = set()
+
+        with self._lock:
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start:start + 500]
+                found.update(
+                    row[0] for row in self._connection.execute(
+                        f"SELECT message_id FROM exported WHERE mailbox = ? AND message_id IN ({', '.join('?' * len(chunk))})",
+                        [mailbox] + chunk
+                    )
+                )
+
+        return found
+
+    def offsets(self, mailbox: str) -> Dict[str, int]:
+        """Grabs the end of the last recorded message of each file, by
+        file name. Older checkpoints recorded full paths.
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, MAX(offset) FROM exported WHERE mailbox = ? GROUP BY path", (mailbox,)
+            ).fetchall()
+
+        offsets: Dict[str, int] = {}
+
+        for path, offset in rows:
+            name = os.path.basename(path)
+            offsets[name] = max(offset, offsets.get(name, 0))
+
+        return offsets
+
+    def close(self) -> None:
+
+        with self._lock:
+            self._connection.close()
+
+
+class _Counted():
+
+    """Counts the bytes of an iterable of chunks as it is consumed."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+
+        self.chunks = chunks
+        self.count = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+
+        for chunk in self.chunks:
+            self.count += len(chunk)
+            yield chunk
+
+
+def _mboxrd(chunks: Iterable[bytes], separator: bytes) -> Iterator[bytes]:
+    """Streams a message in the mboxrd format, escaping the lines
+    starting with `From ` across chunk boundaries.
+    """
+
+    yield separator
+
+    pending = b""
+
+    for chunk in chunks:
+
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+
+        yield b"".join(
+            (b">" + line if _FROM_LINE.match(line) else line) + b"\n" for line in lines
+        )
+
+    if pending:
+        yield (b">" + pending if _FROM_LINE.match(pending) else pending) + b"\n"
+
+    # A blank line ends the message.
+    yield b"\n"
+
+
+def _pages(items: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Groups items into lists of `size`."""
+
+    page = []
+
+    for item in items:
+
+        page.append(item)
+
+        if len(page) == size:
+            yield page
+            page = []
+
+    if page:
+        yield page
+
+
+def _safe_name(value: str) -> str:
+    """Turns an id into a file name that is safe on every file system,
+    Graph ids contain `/` and differ only by case.
+    """
+
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
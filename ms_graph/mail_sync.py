@@ -0,0 +1,184 @@
+from typing import List
+from typing import Iterator
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.delta import DeltaEvent
+from ms_graph.utils.delta import DeltaQuery
+from ms_graph.utils.delta import DeltaStore
+from ms_graph.utils.delta import mailbox_prefix
+
+
+class MailSync():
+
+    """
+    ## Overview:
+    ----
+    Keeps a copy of a mailbox in sync with delta queries, one per mail
+    folder, so every run only transfers what changed since the last one.
+    The delta links and the ids seen in each folder are persisted in a
+    `DeltaStore` under `mail:<mailbox>:<folder_id>`, and the changes are
+    reported as added, updated and removed events.
+
+    ### Usage:
+    ----
+        >>> mail_sync = MailSync(
+            session=graph_client.graph_session,
+            store=SQLiteDeltaStore(path="mail_sync.db"),
+            params={"$select": "subject,from,receivedDateTime,isRead"}
+        )
+        >>> for event in mail_sync.sync_mailbox(user_id="8bc6"):
+        ...     print(event.kind, event.scope, event.id)
+    """
+
+    def __init__(
+        self,
+        session: object,
+        store: DeltaStore = None,
+        params: dict = None,
+        page_size: int = None
+    ) -> None:
+        """Initializes the `MailSync` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        store : DeltaStore (optional, Default=None)
+            Where the delta links and message ids are persisted,
+            defaults to a `MemoryDeltaStore`.
+
+        params : dict (optional, Default=None)
+            The query params of the first round of each folder,
+            for example `$select`. Later rounds reuse them through
+            the delta links.
+
+        page_size : int (optional, Default=None)
+            The number of messages per page, sent as the
+            `odata.maxpagesize` preference.
+        """
+
+        self.graph_session: GraphSession = session
+        self.delta = DeltaQuery(session=session, store=store)
+        self.params = params
+        self.page_size = page_size
+
+    @property
+    def store(self) -> DeltaStore:
+        """The store the sync state is persisted to."""
+
+        return self.delta.store
+
+    def list_folders(self, user_id: str = "me") -> List[dict]:
+        """Lists every mail folder of a mailbox, including the child
+        and hidden folders.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default="me")
+            The user whose mailbox is listed, `me` for the
+            signed-in user.
+
+        ### Returns
+        ----
+        List[dict]:
+            The `mailFolder` objects, with their `id`, `displayName`
+            and `parentFolderId`.
+        """
+
+        prefix = mailbox_prefix(user_id=user_id)
+        params = {
+            "includeHiddenFolders": "true",
+            "$select": "id,displayName,parentFolderId,childFolderCount",
+            "$top": 250,
+        }
+
+        folders = []
+        endpoints = [f"{prefix}/mailFolders"]
+
+        while endpoints:
+
+            for folder in self.graph_session.iter_items(endpoint=endpoints.pop(), params=params):
+
+                folders.append(folder)
+
+                if folder.get("childFolderCount"):
+                    endpoints.append(f"{prefix}/mailFolders/{folder['id']}/childFolders")
+
+        return folders
+
+    def sync_folder(self, folder_id: str, user_id: str = "me") -> Iterator[DeltaEvent]:
+        """Yields the changes to the messages of a folder since the
+        last sync. The first sync reports every message as added, and
+        the messages a resync after an expired link does not return are
+        reported as removed.
+
+        ### Parameters
+        ----
+        folder_id : str
+            The id of the folder, or a well known name like
+            `inbox`.
+
+        user_id : str (optional, Default="me")
+            The user whose mailbox is synced.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One event per added, updated or removed message.
+        """
+
+        prefix = mailbox_prefix(user_id=user_id)
+        headers = {"Prefer": f"odata.maxpagesize={self.page_size}"} if self.page_size else None
+
+        yield from self.delta.changes(
+            key=self.folder_key(folder_id=folder_id, user_id=user_id),
+            endpoint=f"{prefix}/mailFolders/{folder_id}/messages/delta",
+            params=self.params,
+            additional_headers=headers
+        )
+
+    def sync_mailbox(self, user_id: str = "me") -> Iterator[DeltaEvent]:
+        """Yields the changes to every folder of a mailbox since the
+        last sync. The messages of a folder that was deleted since are
+        reported as removed, and the folder is dropped from the store.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default="me")
+            The user whose mailbox is synced.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One event per added, updated or removed message.
+        """
+
+        current = set()
+
+        for folder in self.list_folders(user_id=user_id):
+            current.add(self.folder_key(folder_id=folder["id"], user_id=user_id))
+            yield from self.sync_folder(folder_id=folder["id"], user_id=user_id)
+
+        for key in self.store.keys(prefix=self.folder_key(folder_id="", user_id=user_id)):
+            if key not in current:
+                yield from self.delta.forget(key=key)
+
+    def folder_key(self, folder_id: str, user_id: str = "me") -> str:
+        """Builds the store key of a folder.
+
+        ### Parameters
+        ----
+        folder_id : str
+            The id of the folder.
+
+        user_id : str (optional, Default="me")
+            The user owning the mailbox.
+
+        ### Returns
+        ----
+        str:
+            The key, for example `mail:me:AAMkAG`.
+        """
+
+        return f"mail:{user_id.lower()}:{folder_id}"
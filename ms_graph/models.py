@@ -0,0 +1,415 @@
+import datetime
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Callable
+from typing import Iterable
+
+from ms_graph.utils.codec import get_codec
+
+# Buffers are decoded with the fastest installed JSON library.
+_CODEC = get_codec()
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parses a Microsoft Graph `DateTimeOffset` string.
+
+    ### Parameters
+    ----
+    value : str
+        A timestamp like `2021-01-01T10:00:00Z`, Graph may
+        return up to seven fractional digits.
+
+    ### Returns
+    ----
+    datetime.datetime:
+        A timezone aware datetime.
+    """
+
+    if not isinstance(value, str):
+        return value
+
+    value = value.replace("Z", "+00:00")
+
+    # `fromisoformat` only accepts up to six fractional digits.
+    if "." in value:
+        head, _, tail = value.partition(".")
+        digits = ""
+        while tail and tail[0].isdigit():
+            digits, tail = digits + tail[0], tail[1:]
+        value = head + "." + digits[:6].ljust(6, "0") + tail
+
+    return datetime.datetime.fromisoformat(value)
+
+
+class Field():
+
+    """
+    ## Overview:
+    ----
+    Describes a property of a `GraphModel`. The value is looked up
+    in the underlying resource and converted the first time the
+    attribute is read, then cached on the instance.
+    """
+
+    __slots__ = ("graph_name", "converter", "name", "_slot")
+
+    def __init__(self, graph_name: str, converter: Callable = None) -> None:
+        """Initializes the `Field` object.
+
+        ### Parameters
+        ----
+        graph_name : str
+            The property name used by the Microsoft Graph API.
+
+        converter : Callable (optional, Default=None)
+            A function used to convert the raw value, for
+            example a datetime parser or another model.
+        """
+
+        self.graph_name = graph_name
+        self.converter = converter
+        self.name = None
+        self._slot = None
+
+    def __get__(self, instance: object, owner: type) -> Any:
+
+        if instance is None:
+            return self
+
+        try:
+            return self._slot.__get__(instance, owner)
+        except AttributeError:
+            pass
+
+        value = instance._resource().get(self.graph_name)
+
+        if value is not None and self.converter is not None:
+            value = self.converter(value)
+
+        self._slot.__set__(instance, value)
+
+        return value
+
+
+class _ModelMeta(type):
+
+    """Gives every `Field` of a model its own cache slot."""
+
+    def __new__(mcs, name: str, bases: tuple, namespace: dict):
+
+        model_fields = {
+            key: value for key, value in namespace.items() if isinstance(value, Field)
+        }
+
+        namespace["__slots__"] = tuple(namespace.get("__slots__", ())) + tuple(
+            "_" + key for key in model_fields
+        )
+
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        for key, model_field in model_fields.items():
+            model_field.name = key
+            model_field._slot = cls.__dict__["_" + key]
+
+        cls._fields = {
+            **getattr(cls, "_fields", {}),
+            **{key: model_field.graph_name for key, model_field in model_fields.items()}
+        }
+
+        return cls
+
+
+class GraphModel(metaclass=_ModelMeta):
+
+    """
+    ## Overview:
+    ----
+    The base class for typed Microsoft Graph resources. A model wraps
+    either the raw JSON bytes of a resource or an already decoded
+    `dict`. Bytes are only decoded when a field is first read, and
+    each field is only converted once.
+
+    ### Usage:
+    ----
+        >>> message = Message.from_json(raw_bytes)
+        >>> message.id
+    """
+
+    __slots__ = ("_buffer", "_data")
+
+    id = Field("id")
+    odata_etag = Field("@odata.etag")
+
+    def __init__(self, resource: Union[bytes, str, dict]) -> None:
+        """Initializes the `GraphModel` object.
+
+        ### Parameters
+        ----
+        resource : Union[bytes, str, dict]
+            The raw JSON of the resource or a decoded `dict`.
+        """
+
+        if isinstance(resource, dict):
+            self._buffer = None
+            self._data = resource
+        else:
+            self._buffer = resource
+            self._data = None
+
+    @classmethod
+    def from_json(cls, buffer: Union[bytes, str]) -> "GraphModel":
+        """Builds a model from the raw JSON of a single resource.
+
+        ### Parameters
+        ----
+        buffer : Union[bytes, str]
+            The JSON encoded resource.
+
+        ### Returns
+        ----
+        GraphModel:
+            The model, the buffer is not decoded yet.
+        """
+
+        return cls(resource=buffer)
+
+    @classmethod
+    def from_page(cls, content: dict) -> List["GraphModel"]:
+        """Wraps each resource of a collection response.
+
+        ### Parameters
+        ----
+        content : dict
+            A collection response with a `value` list.
+
+        ### Returns
+        ----
+        List[GraphModel]:
+            A model for each resource in the page.
+        """
+
+        return [cls(resource=item) for item in content.get("value", [])]
+
+    @classmethod
+    def from_items(cls, items: Iterable) -> Iterable["GraphModel"]:
+        """Lazily wraps each resource yielded by an iterable.
+
+        ### Parameters
+        ----
+        items : Iterable
+            Resources as `dict`, `bytes` or `str`.
+
+        ### Yields
+        ----
+        GraphModel:
+            A model for each resource.
+        """
+
+        for item in items:
+            yield cls(resource=item)
+
+    def _resource(self) -> dict:
+        """Returns the decoded resource, decoding the buffer if needed."""
+
+        if self._data is None:
+            self._data = _CODEC.loads(self._buffer)
+            self._buffer = None
+
+        return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Grabs a raw property that does not have a `Field`.
+
+        ### Parameters
+        ----
+        key : str
+            The Microsoft Graph property name.
+
+        default : Any (optional, Default=None)
+            Returned if the property is missing.
+
+        ### Returns
+        ----
+        Any:
+            The raw property value.
+        """
+
+        return self._resource().get(key, default)
+
+    def to_dict(self) -> dict:
+        """Returns the raw resource as a `dict`.
+
+        ### Returns
+        ----
+        dict:
+            The decoded resource.
+        """
+
+        return self._resource()
+
+    def __getitem__(self, key: str) -> Any:
+        return self._resource()[key]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id!r})"
+
+
+def _model_list(model: type) -> Callable:
+    """Builds a converter that wraps a list of resources."""
+
+    def convert(items: list) -> List[GraphModel]:
+        return [model(resource=item) for item in items]
+
+    return convert
+
+
+class EmailAddress(GraphModel):
+
+    """Represents an `emailAddress` resource."""
+
+    name = Field("name")
+    address = Field("address")
+
+
+class Recipient(GraphModel):
+
+    """Represents a `recipient` resource."""
+
+    email_address = Field("emailAddress", EmailAddress)
+
+
+class User(GraphModel):
+
+    """Represents a `user` resource."""
+
+    display_name = Field("displayName")
+    given_name = Field("givenName")
+    surname = Field("surname")
+    user_principal_name = Field("userPrincipalName")
+    mail = Field("mail")
+    job_title = Field("jobTitle")
+    office_location = Field("officeLocation")
+    mobile_phone = Field("mobilePhone")
+    business_phones = Field("businessPhones")
+
+
+class Group(GraphModel):
+
+    """Represents a `group` resource."""
+
+    display_name = Field("displayName")
+    description = Field("description")
+    mail = Field("mail")
+    mail_enabled = Field("mailEnabled")
+    mail_nickname = Field("mailNickname")
+    security_enabled = Field("securityEnabled")
+    group_types = Field("groupTypes")
+    created_date_time = Field("createdDateTime", parse_datetime)
+
+
+class Message(GraphModel):
+
+    """Represents a `message` resource."""
+
+    change_key = Field("changeKey")
+    subject = Field("subject")
+    body_preview = Field("bodyPreview")
+    body = Field("body")
+    importance = Field("importance")
+    is_read = Field("isRead")
+    is_draft = Field("isDraft")
+    has_attachments = Field("hasAttachments")
+    conversation_id = Field("conversationId")
+    internet_message_id = Field("internetMessageId")
+    parent_folder_id = Field("parentFolderId")
+    categories = Field("categories")
+    sender = Field("sender", Recipient)
+    from_ = Field("from", Recipient)
+    to_recipients = Field("toRecipients", _model_list(Recipient))
+    cc_recipients = Field("ccRecipients", _model_list(Recipient))
+    bcc_recipients = Field("bccRecipients", _model_list(Recipient))
+    received_date_time = Field("receivedDateTime", parse_datetime)
+    sent_date_time = Field("sentDateTime", parse_datetime)
+    last_modified_date_time = Field("lastModifiedDateTime", parse_datetime)
+
+
+class DriveItem(GraphModel):
+
+    """Represents a `driveItem` resource."""
+
+    e_tag = Field("eTag")
+    c_tag = Field("cTag")
+    name = Field("name")
+    size = Field("size")
+    web_url = Field("webUrl")
+    file = Field("file")
+    folder = Field("folder")
+    parent_reference = Field("parentReference")
+    created_date_time = Field("createdDateTime", parse_datetime)
+    last_modified_date_time = Field("lastModifiedDateTime", parse_datetime)
+
+
+class Notebook(GraphModel):
+
+    """Represents a OneNote `notebook` resource."""
+
+    display_name = Field("displayName")
+    is_default = Field("isDefault")
+    is_shared = Field("isShared")
+    links = Field("links")
+    sections_url = Field("sectionsUrl")
+    section_groups_url = Field("sectionGroupsUrl")
+    created_date_time = Field("createdDateTime", parse_datetime)
+    last_modified_date_time = Field("lastModifiedDateTime", parse_datetime)
+
+
+class Contact(GraphModel):
+
+    """Represents a `contact` resource."""
+
+    change_key = Field("changeKey")
+    display_name = Field("displayName")
+    given_name = Field("givenName")
+    surname = Field("surname")
+    company_name = Field("companyName")
+    job_title = Field("jobTitle")
+    mobile_phone = Field("mobilePhone")
+    business_phones = Field("businessPhones")
+    parent_folder_id = Field("parentFolderId")
+    email_addresses = Field("emailAddresses", _model_list(EmailAddress))
+    last_modified_date_time = Field("lastModifiedDateTime", parse_datetime)
+
+
+class WorkbookRange(GraphModel):
+
+    """Represents a `workbookRange` resource."""
+
+    address = Field("address")
+    address_local = Field("addressLocal")
+    cell_count = Field("cellCount")
+    column_count = Field("columnCount")
+    column_index = Field("columnIndex")
+    row_count = Field("rowCount")
+    row_index = Field("rowIndex")
+    values = Field("values")
+    text = Field("text")
+    formulas = Field("formulas")
+    number_format = Field("numberFormat")
+    value_types = Field("valueTypes")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(address={self.address!r})"
+
+
+MODELS: Dict[str, type] = {
+    "user": User,
+    "group": Group,
+    "message": Message,
+    "driveItem": DriveItem,
+    "notebook": Notebook,
+    "contact": Contact,
+    "workbookRange": WorkbookRange,
+}
@@ -1,4 +1,20 @@
+from typing import List
+from typing import Tuple
+from typing import Iterator
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+
 from ms_graph.session import GraphSession
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import DeadlineExceeded
+from ms_graph.utils.deadline import call_with_deadline
+
+# Expands the sections of a notebook and of its section groups, at any depth.
+HIERARCHY_EXPAND = "sections,sectionGroups($expand=sections,sectionGroups($levels=max;$expand=sections))"
+
+# The largest page of OneNote pages.
+MAX_PAGE_SIZE = 100
 
 
 class Notes():
@@ -28,6 +44,9 @@ class Notes():
         # Set the endpoint.
         self.endpoint = "onenote"
 
+        # The pages whose content the last crawl could not download.
+        self.failures: List[Tuple[str, str]] = []
+
     def list_my_notebooks(self) -> dict:
         """Retrieve a list of your notebook objects.
 
@@ -62,7 +81,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint =f"users/{user_id}" + self.endpoint + "/notebooks"
+        endpoint = f"users/{user_id}/" + self.endpoint + "/notebooks"
 
         content = self.graph_session.make_request(
             method="get",
@@ -86,7 +105,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = f"groups/{group_id}" + self.endpoint + "/notebooks"
+        endpoint = f"groups/{group_id}/" + self.endpoint + "/notebooks"
 
         content = self.graph_session.make_request(
             method="get",
@@ -110,7 +129,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = f"sites/{site_id}" + self.endpoint + "/notebooks"
+        endpoint = f"sites/{site_id}/" + self.endpoint + "/notebooks"
 
         content = self.graph_session.make_request(
             method="get",
@@ -161,7 +180,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = f"users/{user_id}" + self.endpoint + f"/notebooks/{notebook_id}"
+        endpoint = f"users/{user_id}/" + self.endpoint + f"/notebooks/{notebook_id}"
 
         content = self.graph_session.make_request(
             method="get",
@@ -188,7 +207,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = f"groups/{group_id}" + self.endpoint + f"/notebooks/{notebook_id}"
+        endpoint = f"groups/{group_id}/" + self.endpoint + f"/notebooks/{notebook_id}"
 
         content = self.graph_session.make_request(
             method="get",
@@ -215,7 +234,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = f"sites/{site_id}" + self.endpoint + f"/notebooks/{notebook_id}"
+        endpoint = f"sites/{site_id}/" + self.endpoint + f"/notebooks/{notebook_id}"
 
         content = self.graph_session.make_request(
             method="get",
@@ -239,7 +258,7 @@ class Notes():
         """
 
         # Define the endpoint.
-        endpoint = endpoint = "me/" + self.endpoint + f"/notebooks/{notebook_id}/sections"
+        endpoint = "me/" + self.endpoint + f"/notebooks/{notebook_id}/sections"
 
         content = self.graph_session.make_request(
             method="get",
@@ -249,24 +268,21 @@ class Notes():
         return content
 
     def list_my_notebook_pages(self, section_id: str) -> dict:
-        """Retrieve a list of onenoteSection objects from one of your notebooks.
+        """Retrieve a list of onenotePage objects from one of your sections.
 
         ### Parameters
         ----
-        notebook_id (str): The Notebook ID that you
-        want to pull.
-
-        section (str): The Section ID that you
+        section_id (str): The Section ID that you
         want to pull.
 
         ### Returns
         ----
         dict :
-            A List of `Notebook` Resource Object.
+            A List of `Page` Resource Object.
         """
 
         # Define the endpoint.
-        endpoint = endpoint = f"me/{self.endpoint}/" + f"/sections/{section_id}"
+        endpoint = "me/" + self.endpoint + f"/sections/{section_id}/pages"
 
         content = self.graph_session.make_request(
             method="get",
@@ -274,3 +290,267 @@ class Notes():
         )
 
         return content
+
+    def iter_notebooks(self, user_id: str = None, group_id: str = None, site_id: str = None) -> Iterator[dict]:
+        """Iterates over the notebooks of an owner, each with its sections
+        and section groups expanded, so the whole hierarchy down to the
+        sections is read in one paged call.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default=None)
+            The user that owns the notebooks.
+
+        group_id : str (optional, Default=None)
+            The group that owns the notebooks.
+
+        site_id : str (optional, Default=None)
+            The SharePoint site that owns the notebooks. Leave
+            all three out for your own notebooks.
+
+        ### Yields
+        ----
+        dict:
+            A `Notebook` resource, with `sections` and
+            `sectionGroups`.
+        """
+
+        prefix = self._owner_prefix(user_id=user_id, group_id=group_id, site_id=site_id)
+
+        yield from self.graph_session.iter_items(
+            endpoint=f"{prefix}/{self.endpoint}/notebooks",
+            params={"$expand": HIERARCHY_EXPAND}
+        )
+
+    def iter_sections(self, user_id: str = None, group_id: str = None, site_id: str = None) -> Iterator[Tuple[dict, dict]]:
+        """Iterates over every section of every notebook of an owner,
+        including the sections inside section groups.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default=None)
+            The user that owns the notebooks.
+
+        group_id : str (optional, Default=None)
+            The group that owns the notebooks.
+
+        site_id : str (optional, Default=None)
+            The SharePoint site that owns the notebooks.
+
+        ### Yields
+        ----
+        Tuple[dict, dict]:
+            The notebook and the section.
+        """
+
+        for notebook in self.iter_notebooks(user_id=user_id, group_id=group_id, site_id=site_id):
+
+            containers = [notebook]
+
+            while containers:
+
+                container = containers.pop(0)
+
+                for section in container.get("sections") or []:
+                    yield notebook, section
+
+                containers.extend(container.get("sectionGroups") or [])
+
+    def iter_pages(
+        self,
+        section_id: str,
+        user_id: str = None,
+        group_id: str = None,
+        site_id: str = None,
+        select: List[str] = None
+    ) -> Iterator[dict]:
+        """Iterates over the pages of a section, following every page of
+        results.
+
+        ### Parameters
+        ----
+        section_id : str
+            The ID of the section.
+
+        user_id : str (optional, Default=None)
+            The user that owns the notebook.
+
+        group_id : str (optional, Default=None)
+            The group that owns the notebook.
+
+        site_id : str (optional, Default=None)
+            The SharePoint site that owns the notebook.
+
+        select : List[str] (optional, Default=None)
+            The page properties to return.
+
+        ### Yields
+        ----
+        dict:
+            A `Page` resource.
+        """
+
+        prefix = self._owner_prefix(user_id=user_id, group_id=group_id, site_id=site_id)
+        params = {"$top": MAX_PAGE_SIZE}
+
+        if select:
+            params["$select"] = ",".join(select)
+
+        yield from self.graph_session.iter_items(
+            endpoint=f"{prefix}/{self.endpoint}/sections/{section_id}/pages",
+            params=params
+        )
+
+    def get_page_content(self, page_id: str, user_id: str = None, group_id: str = None, site_id: str = None) -> bytes:
+        """Downloads the HTML content of a page.
+
+        ### Parameters
+        ----
+        page_id : str
+            The ID of the page.
+
+        user_id : str (optional, Default=None)
+            The user that owns the notebook.
+
+        group_id : str (optional, Default=None)
+            The group that owns the notebook.
+
+        site_id : str (optional, Default=None)
+            The SharePoint site that owns the notebook.
+
+        ### Returns
+        ----
+        bytes:
+            The HTML of the page.
+        """
+
+        prefix = self._owner_prefix(user_id=user_id, group_id=group_id, site_id=site_id)
+
+        with self.graph_session.stream_request(
+            method="get",
+            endpoint=f"{prefix}/{self.endpoint}/pages/{page_id}/content"
+        ) as response:
+            return response.content
+
+    def crawl(
+        self,
+        user_id: str = None,
+        group_id: str = None,
+        site_id: str = None,
+        include_content: bool = True,
+        max_workers: int = 4
+    ) -> Iterator[Tuple[dict, dict, dict, bytes]]:
+        """Walks every notebook, section and page of an owner, and
+        downloads the page contents concurrently.
+
+        ### Overview:
+        ----
+        The notebooks and their sections come from one expanded call,
+        the pages of each section are listed page by page, and the
+        HTML of the pages is fetched by a pool of threads a few pages
+        ahead of the consumer. Results come back in listing order, so
+        memory stays bounded however large the notebooks are.
+
+        A page whose content fails to download is yielded with `None`
+        as its HTML and the crawl goes on. Its id and error are kept
+        in `failures`. Only the deadline of the caller stops the crawl.
+
+        ### Parameters
+        ----
+        user_id : str (optional, Default=None)
+            The user that owns the notebooks.
+
+        group_id : str (optional, Default=None)
+            The group that owns the notebooks.
+
+        site_id : str (optional, Default=None)
+            The SharePoint site that owns the notebooks.
+
+        include_content : bool (optional, Default=True)
+            If `False` the contents are not downloaded.
+
+        max_workers : int (optional, Default=4)
+            The number of contents downloaded at the same time.
+
+        ### Yields
+        ----
+        Tuple[dict, dict, dict, bytes]:
+            The notebook, section, page and the HTML of the page,
+            `None` if `include_content` is `False` or the download
+            failed.
+
+        ### Usage:
+        ----
+            >>> notes_service = graph_client.notes()
+            >>> for notebook, section, page, html in notes_service.crawl(user_id=user_id):
+            ...     backup(notebook["displayName"], section["displayName"], page["title"], html)
+        """
+
+        owner = {"user_id": user_id, "group_id": group_id, "site_id": site_id}
+        self.failures = []
+
+        listing = (
+            (notebook, section, page)
+            for notebook, section in self.iter_sections(**owner)
+            for page in self.iter_pages(section_id=section["id"], **owner)
+        )
+
+        if not include_content:
+            for notebook, section, page in listing:
+                yield notebook, section, page, None
+            return
+
+        pending = deque()
+        deadline = current_deadline()
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ms_graph_notes")
+
+        try:
+
+            for notebook, section, page in listing:
+
+                future = executor.submit(
+                    call_with_deadline, deadline, self.get_page_content, page_id=page["id"], **owner
+                )
+                pending.append((notebook, section, page, future))
+
+                if len(pending) >= max_workers * 2:
+                    notebook, section, page, future = pending.popleft()
+                    yield notebook, section, page, self._content(page=page, future=future)
+
+            while pending:
+                notebook, section, page, future = pending.popleft()
+                yield notebook, section, page, self._content(page=page, future=future)
+
+        finally:
+
+            for *_, future in pending:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
+    def _content(self, page: dict, future: Future) -> bytes:
+        """Grabs the downloaded content of a page, recording a failure
+        instead of raising it.
+        """
+
+        try:
+            return future.result()
+        except DeadlineExceeded:
+            raise
+        except Exception as error:
+            self.failures.append((page["id"], repr(error)))
+            return None
+
+    def _owner_prefix(self, user_id: str = None, group_id: str = None, site_id: str = None) -> str:
+        """Builds the path of the owner of the notebooks."""
+
+        owners = [
+            f"{kind}/{owner_id}"
+            for kind, owner_id in (("users", user_id), ("groups", group_id), ("sites", site_id))
+            if owner_id
+        ]
+
+        if len(owners) > 1:
+            raise ValueError("Only one of `user_id`, `group_id` or `site_id` can be specified.")
+
+        return owners[0] if owners else "me"
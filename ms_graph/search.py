@@ -1,4 +1,22 @@
+import json
+import heapq
+import queue
+import threading
+
+from typing import List
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
 from ms_graph.session import GraphSession
+from ms_graph.utils.cache import CoalescingCache
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import call_with_deadline
+
+# The entity types `iter_hits` can search, each one is queried on its own.
+ENTITY_TYPES = ["driveItem", "message", "event", "site", "listItem"]
+
+# The largest page Microsoft Search returns.
+MAX_PAGE_SIZE = 500
 
 
 class Search():
@@ -26,6 +44,50 @@ class Search():
         # Set the endpoint.
         self.endpoint = "search"
 
+        self.cache: CoalescingCache = None
+
+    def enable_cache(self, ttl: float = 60.0, max_entries: int = 256, cache: CoalescingCache = None) -> CoalescingCache:
+        """Turns on the result cache of `query`.
+
+        ### Overview:
+        ----
+        Requests are keyed on their normalised form, so the same
+        query with its entity types or fields in another order,
+        or with different spacing, is answered from the cache.
+        Identical queries made at the same time share one call.
+
+        ### Parameters
+        ----
+        ttl : float (optional, Default=60.0)
+            The number of seconds a result is kept.
+
+        max_entries : int (optional, Default=256)
+            The maximum number of results kept.
+
+        cache : CoalescingCache (optional, Default=None)
+            A cache to share with other `Search` objects.
+
+        ### Returns
+        ----
+        CoalescingCache:
+            The active cache, its `stats` has the hits and
+            misses.
+
+        ### Usage:
+        ----
+            >>> search_service = graph_client.search()
+            >>> search_service.enable_cache(ttl=30)
+        """
+
+        self.cache = cache or CoalescingCache(max_entries=max_entries, ttl=ttl)
+
+        return self.cache
+
+    def disable_cache(self) -> None:
+        """Turns off the result cache of `query`."""
+
+        self.cache = None
+
     def query(self, search_request: dict) -> dict:
         """Runs the query specified in the request body. Search
         results are provided in the response.
@@ -39,10 +101,297 @@ class Search():
         # define the endpoints.
         endpoint = self.endpoint + "/query"
 
-        content = self.graph_session.make_request(
-            method="post",
-            endpoint=endpoint,
-            json=search_request
+        def load() -> dict:
+            return self.graph_session.make_request(
+                method="post",
+                endpoint=endpoint,
+                json=search_request
+            )
+
+        if self.cache is None:
+            return load()
+
+        # A cache can be shared by searches of different callers.
+        key = normalize_search_request(search_request=search_request) + "@" + self.graph_session.identity()
+
+        return self.cache.fetch(key=key, load=load)
+
+    def build_request(
+        self,
+        query_string: str,
+        entity_type: str,
+        start: int = 0,
+        size: int = 25,
+        fields: List[str] = None,
+        region: str = None
+    ) -> dict:
+        """Builds a `searchRequest` for one entity type.
+
+        ### Parameters
+        ----
+        query_string : str
+            The KQL query, for example `contoso AND filetype:docx`.
+
+        entity_type : str
+            One of `driveItem`, `message`, `event`, `site` or
+            `listItem`.
+
+        start : int (optional, Default=0)
+            The offset of the first hit, sent as `from`.
+
+        size : int (optional, Default=25)
+            The number of hits per page.
+
+        fields : List[str] (optional, Default=None)
+            The properties of the resources to return.
+
+        region : str (optional, Default=None)
+            The region to search, required with application
+            permissions.
+
+        ### Returns
+        ----
+        dict:
+            The `searchRequest`.
+
+        ### Usage:
+        ----
+            >>> search_service = graph_client.search()
+            >>> search_service.build_request(query_string="contoso", entity_type="message")
+        """
+
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Unknown entity type {entity_type}, expected one of {ENTITY_TYPES}.")
+
+        if not 0 < size <= MAX_PAGE_SIZE:
+            raise ValueError(f"The page size must be between 1 and {MAX_PAGE_SIZE}.")
+
+        request = {
+            "entityTypes": [entity_type],
+            "query": {"queryString": query_string},
+            "from": start,
+            "size": size,
+        }
+
+        if fields:
+            request["fields"] = fields
+
+        if region:
+            request["region"] = region
+
+        return request
+
+    def iter_hits(
+        self,
+        query_string: str,
+        entity_types: List[str] = None,
+        limit: int = None,
+        page_size: int = 25,
+        fields: List[str] = None,
+        region: str = None
+    ) -> Iterator[dict]:
+        """Searches several entity types at once and streams their hits
+        as one ranked stream. Each entity type is paged with `from` and
+        `size` in its own thread, a page ahead of the consumer, and the
+        hits are merged by their `rank`. Once `limit` hits were yielded,
+        or the iterator is closed, no more pages are requested.
+
+        ### Parameters
+        ----
+        query_string : str
+            The KQL query.
+
+        entity_types : List[str] (optional, Default=None)
+            The entity types to search, defaults to
+            `ENTITY_TYPES`.
+
+        limit : int (optional, Default=None)
+            The number of hits to stop after.
+
+        page_size : int (optional, Default=25)
+            The number of hits per page and entity type.
+
+        fields : List[str] (optional, Default=None)
+            The properties of the resources to return.
+
+        region : str (optional, Default=None)
+            The region to search, required with application
+            permissions.
+
+        ### Yields
+        ----
+        dict:
+            A `searchHit`, with its `entityType` added.
+
+        ### Usage:
+        ----
+            >>> search_service = graph_client.search()
+            >>> for hit in search_service.iter_hits(
+                query_string="quarterly report",
+                entity_types=["driveItem", "message"],
+                limit=100
+            ):
+            ...     print(hit["entityType"], hit["resource"]["id"])
+        """
+
+        entity_types = entity_types or ENTITY_TYPES
+
+        # A type never needs to give more hits than the whole stream.
+        if limit is not None:
+            page_size = min(page_size, max(limit, 1))
+
+        requests = [
+            self.build_request(
+                query_string=query_string,
+                entity_type=entity_type,
+                size=page_size,
+                fields=fields,
+                region=region
+            )
+            for entity_type in entity_types
+        ]
+
+        if limit is not None and limit <= 0:
+            return
+
+        stop = threading.Event()
+        pages = [queue.Queue(maxsize=1) for _ in requests]
+        deadline = current_deadline()
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(requests), thread_name_prefix="ms_graph_search"
         )
 
-        return content
+        try:
+
+            for request, buffer in zip(requests, pages):
+                executor.submit(call_with_deadline, deadline, self._fetch_pages, request, buffer, stop, limit)
+
+            streams = [
+                ((hit.get("rank", position), order, hit) for position, hit in enumerate(_drain(buffer), 1))
+                for order, buffer in enumerate(pages)
+            ]
+
+            yielded = 0
+
+            for _, _, hit in heapq.merge(*streams, key=lambda entry: entry[:2]):
+
+                yield hit
+                yielded += 1
+
+                if limit is not None and yielded >= limit:
+                    return
+
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def _fetch_pages(self, request: dict, buffer: "queue.Queue", stop: threading.Event, limit: int) -> None:
+        """Pages one entity type into a buffer, runs in a worker thread.
+        The buffer ends with `None`, or the exception that was raised.
+        """
+
+        request = dict(request)
+        fetched = 0
+
+        try:
+
+            while not stop.is_set():
+
+                content = self.query(search_request={"requests": [request]})
+
+                containers = [
+                    container
+                    for response in content.get("value", [])
+                    for container in response.get("hitsContainers", [])
+                ]
+
+                hits = [hit for container in containers for hit in container.get("hits") or []]
+
+                for hit in hits:
+                    hit["entityType"] = request["entityTypes"][0]
+
+                if hits and not _put(buffer, hits, stop):
+                    return
+
+                fetched += len(hits)
+                more = any(container.get("moreResultsAvailable") for container in containers)
+
+                if not hits or not more or (limit is not None and fetched >= limit):
+                    break
+
+                request["from"] = request["from"] + len(hits)
+
+            _put(buffer, None, stop)
+
+        except Exception as error:
+            _put(buffer, error, stop)
+
+
+def normalize_search_request(search_request: dict) -> str:
+    """Builds the cache key of a search, the same for requests that only
+    differ in the order of their entity types and fields, the spacing of
+    their query string or in leaving the paging window at its default.
+
+    ### Parameters
+    ----
+    search_request : dict
+        The body sent to `search/query`.
+
+    ### Returns
+    ----
+    str:
+        The cache key.
+    """
+
+    requests = []
+
+    for request in search_request.get("requests", []):
+
+        request = dict(request)
+        query = dict(request.get("query") or {})
+
+        query["queryString"] = " ".join(str(query.get("queryString", "")).split())
+
+        request["query"] = query
+        request["entityTypes"] = sorted(request.get("entityTypes") or [])
+        request["from"] = request.get("from") or 0
+        request["size"] = request.get("size") or 25
+
+        if request.get("fields"):
+            request["fields"] = sorted(set(request["fields"]))
+
+        requests.append(request)
+
+    return json.dumps({**search_request, "requests": requests}, sort_keys=True, separators=(",", ":"))
+
+
+def _put(buffer: "queue.Queue", entry: object, stop: threading.Event) -> bool:
+    """Puts an entry in a buffer unless the consumer went away."""
+
+    while not stop.is_set():
+        try:
+            buffer.put(entry, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+def _drain(buffer: "queue.Queue") -> Iterator[dict]:
+    """Yields the hits of a buffer page by page, raising what the worker
+    raised.
+    """
+
+    while True:
+
+        entry = buffer.get()
+
+        if entry is None:
+            return
+
+        if isinstance(entry, Exception):
+            raise entry
+
+        yield from entry
@@ -0,0 +1,449 @@
+import copy
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from typing import Dict
+from typing import List
+from collections import deque
+
+import requests
+
+from requests import HTTPError
+from urllib3.exceptions import NewConnectionError
+
+from ms_graph.mail import Mail
+from ms_graph.session import GraphSession
+from ms_graph.utils.deadline import DeadlineExceeded
+from ms_graph.utils.throttling import retry_after_seconds
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+# The send may or may not have gone through, so it is never tried again.
+UNKNOWN = "unknown"
+
+
+class SendQueue():
+
+    """
+    ## Overview:
+    ----
+    A queue for sending large volumes of mail through `sendMail`. Any
+    number of threads can `put` messages, and a pool of workers sends
+    them concurrently across sender mailboxes while pacing each sender
+    under the Exchange limit of 30 messages a minute. Messages carry a
+    client key and a key is only ever sent once. The queue is kept in
+    SQLite, so unsent messages survive a restart and are picked up by
+    the next `SendQueue` opened on the same file.
+
+    A message is only tried again when it surely was not sent, after a
+    429 or when the connection could not be made. A message rejected
+    with another 4xx is `failed`, and one whose send ended in a 5xx, a
+    read timeout or a dropped connection is `unknown`, as Exchange may
+    have delivered it. Neither is ever sent again. A message is marked
+    `sending` before its request goes out, so one left in flight by a
+    crash is `unknown` on restart rather than sent twice.
+
+    ### Usage:
+    ----
+        >>> with SendQueue(session=graph_client.graph_session, path="outbox.db") as outbox:
+        ...     for user in users:
+        ...         outbox.put(
+                    sender="alerts@contoso.com",
+                    message=build_message(user),
+                    key=f"outage-42:{user['id']}"
+                )
+        ...     outbox.join()
+        >>> outbox.stats()
+        {'queued': 0, 'in_flight': 0, 'sent': 1200, 'failed': 0, 'unknown': 0, 'sent_per_second': 1.5, 'senders': 3}
+    """
+
+    def __init__(
+        self,
+        session: object,
+        path: str,
+        max_workers: int = 8,
+        messages_per_minute: float = 30.0,
+        max_attempts: int = 5
+    ) -> None:
+        """Initializes the `SendQueue` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        path : str
+            The SQLite file the queue is persisted to.
+
+        max_workers : int (optional, Default=8)
+            The number of messages sent at the same time, each
+            from a different sender.
+
+        messages_per_minute : float (optional, Default=30.0)
+            The pace of each sender mailbox.
+
+        max_attempts : int (optional, Default=5)
+            The number of times a message is tried before it
+            is marked as failed.
+        """
+
+        if not path or path == ":memory:":
+            raise ValueError("The queue needs a file, an in memory queue loses its messages on exit.")
+
+        # A send is never retried blindly, a 503 or 504 may have been delivered.
+        if isinstance(session, GraphSession):
+            session = copy.copy(session)
+            session.max_retries = 0
+
+        self.mail = Mail(session=session)
+        self.path = path
+        self.max_workers = max_workers
+        self.interval = 60.0 / messages_per_minute
+        self.max_attempts = max_attempts
+
+        self._condition = threading.Condition()
+        self._pending: Dict[str, deque] = {}
+        self._next_at: Dict[str, float] = {}
+        self._busy = set()
+        self._sent_at = deque()
+        self._counts = {SENT: 0, FAILED: 0, UNKNOWN: 0}
+        self._workers: List[threading.Thread] = []
+        self._closed = False
+
+        self._connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                key TEXT PRIMARY KEY,
+                sender TEXT NOT NULL,
+                body TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                sent_at REAL
+            )
+            """
+        )
+
+        # A send cut short by a crash may have gone through.
+        self._connection.execute(
+            "UPDATE outbox SET state = ?, error = ? WHERE state = ?",
+            (UNKNOWN, "The queue stopped while the message was being sent.", SENDING)
+        )
+
+        # Pick up what an earlier run left unsent, oldest first.
+        for key, sender in self._connection.execute(
+            "SELECT key, sender FROM outbox WHERE state = ? ORDER BY created_at", (PENDING,)
+        ).fetchall():
+            self._pending.setdefault(sender, deque()).append(key)
+
+    def put(self, sender: str, message: dict, key: str = None, save_to_sent_items: bool = True) -> bool:
+        """Queues a message.
+
+        ### Parameters
+        ----
+        sender : str
+            The user ID or principal name of the sending mailbox.
+
+        message : dict
+            The `message` resource, with its `subject`, `body`
+            and `toRecipients`.
+
+        key : str (optional, Default=None)
+            The client key of the message, a message whose key
+            was queued before is dropped. Defaults to a random
+            key.
+
+        save_to_sent_items : bool (optional, Default=True)
+            Whether to save the message in Sent Items.
+
+        ### Returns
+        ----
+        bool:
+            `False` if the key was a duplicate.
+        """
+
+        key = key or uuid.uuid4().hex
+        body = json.dumps({"message": message, "saveToSentItems": save_to_sent_items})
+
+        with self._condition:
+
+            if self._closed:
+                raise ValueError("The queue is closed.")
+
+            added = self._connection.execute(
+                "INSERT OR IGNORE INTO outbox (key, sender, body, state, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sender, body, PENDING, time.time())
+            ).rowcount == 1
+
+            if added:
+                self._pending.setdefault(sender, deque()).append(key)
+                self._condition.notify()
+
+        return added
+
+    def start(self) -> None:
+        """Starts the workers, `put` works before and after."""
+
+        with self._condition:
+
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work, name=f"ms_graph_send_queue_{len(self._workers)}", daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+
+    def join(self, timeout: float = None) -> bool:
+        """Waits until every queued message was sent or failed.
+
+        ### Parameters
+        ----
+        timeout : float (optional, Default=None)
+            The maximum number of seconds to wait.
+
+        ### Returns
+        ----
+        bool:
+            `True` if the queue drained in time.
+        """
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._busy and not any(self._pending.values()), timeout=timeout
+            )
+
+    def close(self, wait: bool = True) -> None:
+        """Stops the workers, unsent messages stay on disk.
+
+        ### Parameters
+        ----
+        wait : bool (optional, Default=True)
+            If `True` the queue is drained first.
+        """
+
+        if wait and self._workers:
+            self.join()
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        for worker in self._workers:
+            worker.join()
+
+        self._connection.close()
+
+    def stats(self) -> Dict[str, float]:
+        """Reports the throughput and the depth of the queue.
+
+        ### Returns
+        ----
+        Dict[str, float]:
+            The messages `queued`, `in_flight`, `sent`, `failed`
+            and `unknown`, the `sent_per_second` over the last
+            minute, and the number of `senders` with queued
+            messages.
+        """
+
+        with self._condition:
+
+            self._trim(now=time.monotonic())
+
+            return {
+                "queued": sum(len(keys) for keys in self._pending.values()),
+                "in_flight": len(self._busy),
+                "sent": self._counts[SENT],
+                "failed": self._counts[FAILED],
+                "unknown": self._counts[UNKNOWN],
+                "sent_per_second": round(len(self._sent_at) / 60.0, 3),
+                "senders": sum(1 for keys in self._pending.values() if keys),
+            }
+
+    def failures(self) -> List[dict]:
+        """Lists the messages that could not be sent, or may not have
+        been.
+
+        ### Returns
+        ----
+        List[dict]:
+            The key, sender, state, attempts and last error of
+            each one.
+        """
+
+        with self._condition:
+            rows = self._connection.execute(
+                "SELECT key, sender, state, attempts, error FROM outbox WHERE state IN (?, ?)", (FAILED, UNKNOWN)
+            ).fetchall()
+
+        return [
+            {"key": key, "sender": sender, "state": state, "attempts": attempts, "error": error}
+            for key, sender, state, attempts, error in rows
+        ]
+
+    def __enter__(self) -> "SendQueue":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close(wait=args[0] is None)
+
+    def _work(self) -> None:
+        """Sends messages until the queue is closed."""
+
+        while True:
+
+            claimed = self._claim()
+
+            if claimed is None:
+                return
+
+            sender, key = claimed
+
+            with self._condition:
+                body = json.loads(
+                    self._connection.execute("SELECT body FROM outbox WHERE key = ?", (key,)).fetchone()[0]
+                )
+
+            try:
+                self.mail.send_user_mail(
+                    user_id=sender, message=body, save_to_send_items=body["saveToSentItems"]
+                )
+            except Exception as error:
+                self._failed(sender=sender, key=key, error=error)
+            else:
+                self._sent(sender=sender, key=key)
+
+    def _claim(self) -> tuple:
+        """Waits for a sender that is idle, paced and has mail queued."""
+
+        with self._condition:
+
+            while not self._closed:
+
+                now = time.monotonic()
+                soonest = None
+
+                for sender, keys in self._pending.items():
+
+                    if not keys or sender in self._busy:
+                        continue
+
+                    next_at = self._next_at.get(sender, 0.0)
+
+                    if next_at <= now:
+
+                        key = keys.popleft()
+                        self._busy.add(sender)
+                        self._next_at[sender] = now + self.interval
+
+                        # Persisted before the request, so a crash never sends it twice.
+                        self._connection.execute("UPDATE outbox SET state = ? WHERE key = ?", (SENDING, key))
+
+                        return sender, key
+
+                    soonest = next_at if soonest is None else min(soonest, next_at)
+
+                self._condition.wait(timeout=None if soonest is None else soonest - now)
+
+            return None
+
+    def _sent(self, sender: str, key: str) -> None:
+        """Records a sent message."""
+
+        with self._condition:
+
+            self._connection.execute(
+                "UPDATE outbox SET state = ?, attempts = attempts + 1, sent_at = ? WHERE key = ?",
+                (SENT, time.time(), key)
+            )
+
+            self._counts[SENT] += 1
+            self._sent_at.append(time.monotonic())
+            self._release(sender=sender)
+
+    def _failed(self, sender: str, key: str, error: Exception) -> None:
+        """Requeues a message that was not sent, or marks it as failed
+        or unknown for good.
+        """
+
+        with self._condition:
+
+            self._connection.execute(
+                "UPDATE outbox SET attempts = attempts + 1, error = ? WHERE key = ?", (repr(error), key)
+            )
+            attempts = self._connection.execute(
+                "SELECT attempts FROM outbox WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+            state = _outcome(error=error)
+
+            if state == PENDING and attempts < self.max_attempts:
+
+                # Back off the sender, keeping the message at the front.
+                self._connection.execute("UPDATE outbox SET state = ? WHERE key = ?", (PENDING, key))
+                self._pending[sender].appendleft(key)
+
+                retry_after = None
+                if isinstance(error, HTTPError) and error.response is not None:
+                    retry_after = retry_after_seconds(error.response.headers.get("Retry-After"))
+
+                self._next_at[sender] = time.monotonic() + (retry_after or self.interval * 2 ** attempts)
+
+            else:
+                state = FAILED if state == PENDING else state
+                self._connection.execute("UPDATE outbox SET state = ? WHERE key = ?", (state, key))
+                self._counts[state] += 1
+
+            self._release(sender=sender)
+
+    def _release(self, sender: str) -> None:
+        """Frees a sender, the lock must be held."""
+
+        self._busy.discard(sender)
+        self._trim(now=time.monotonic())
+        self._condition.notify_all()
+
+    def _trim(self, now: float) -> None:
+        """Forgets sends older than the throughput window."""
+
+        while self._sent_at and self._sent_at[0] < now - 60.0:
+            self._sent_at.popleft()
+
+
+def _outcome(error: Exception) -> str:
+    """Tells from the error of a send whether the message can be tried
+    again, `pending`, was rejected, `failed`, or may have been sent,
+    `unknown`.
+    """
+
+    if isinstance(error, HTTPError):
+
+        status = error.response.status_code if error.response is not None else None
+
+        if status == 429:
+            return PENDING
+
+        return FAILED if status is not None and status < 500 else UNKNOWN
+
+    # Nothing went out when the deadline passed before the request was sent.
+    if isinstance(error, DeadlineExceeded):
+        return UNKNOWN if error.request_sent else PENDING
+
+    # Or when the connection was never made.
+    if isinstance(error, requests.ConnectTimeout):
+        return PENDING
+
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", error.args[0]) if error.args else None
+        return PENDING if isinstance(reason, NewConnectionError) else UNKNOWN
+
+    return UNKNOWN
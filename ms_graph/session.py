@@ -1,19 +1,59 @@
-import json as json_lib
+import copy
+import time
+import hashlib
+import random
 import logging
-import pathlib
+import threading
 
 from typing import Dict
 from typing import List
 from typing import Union
+from typing import Iterator
+from typing import ContextManager
 
 import requests
 
+from ms_graph.utils.cache import MemoryCache
+from ms_graph.utils.cache import ResponseCache
+from ms_graph.utils.codec import JsonCodec
+from ms_graph.utils.codec import get_codec
+from ms_graph.utils.logs import logger
+from ms_graph.utils.metrics import Instrumentation
+from ms_graph.utils.metrics import THROTTLE_STATUS_CODES
+from ms_graph.utils.endpoints import endpoint_template
+from ms_graph.utils.throttling import RateLimiter
+from ms_graph.utils.throttling import IDEMPOTENT_METHODS
+from ms_graph.utils.throttling import RETRY_STATUS_CODES
+from ms_graph.utils.throttling import retry_after_seconds
+from ms_graph.utils.pagination import ItemIterator
+from ms_graph.utils.deadline import DEFAULT_TIMEOUT
+from ms_graph.utils.deadline import Deadline
+from ms_graph.utils.deadline import DeadlineExceeded
+from ms_graph.utils.deadline import Timeout
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import deadline_scope
+from ms_graph.utils.deadline import sleep
+
+# Request headers that are never written to a log.
+SENSITIVE_HEADERS = frozenset(["authorization", "cookie", "proxy-authorization"])
+
+# Request headers that change the response, and so the cache key.
+CACHE_KEY_HEADERS = frozenset(["accept", "accept-language", "consistencylevel", "prefer"])
+
+
 class GraphSession():
 
     """Serves as the Session for the Current Microsoft
     Graph API."""
 
-    def __init__(self, client: object) -> None:
+    def __init__(
+        self,
+        client: object,
+        codec: Union[str, JsonCodec] = "auto",
+        log_sample_rate: float = 1.0,
+        max_retries: int = 3,
+        timeout: Timeout = None
+    ) -> None:
         """Initializes the `GraphSession` client.
 
         ### Overview:
@@ -25,6 +65,19 @@ class GraphSession():
         ----
         client (str): The Microsoft Graph API Python Client.
 
+        codec (Union[str, JsonCodec]): The JSON codec used for request
+        and response bodies, `auto` picks the fastest one installed.
+
+        log_sample_rate (float): The share of successful requests that
+        are logged, failed requests are always logged.
+
+        max_retries (int): The number of times a throttled (429) or
+        unavailable (503, 504) request is retried, honoring `Retry-After`.
+
+        timeout (Timeout): The seconds a request may take to connect and
+        to read, either one number or `(connect, read)`. Defaults to the
+        `timeout` of the client, or `DEFAULT_TIMEOUT`.
+
         ### Usage:
         ----
             >>> graph_session = GraphSession()
@@ -32,20 +85,166 @@ class GraphSession():
 
         from ms_graph.client import MicrosoftGraphClient
 
-        # We can also add custom formatting to our log messages.
-        log_format = "%(asctime)-15s|%(filename)s|%(message)s"
+        self.client: MicrosoftGraphClient = client
+        self.codec: JsonCodec = get_codec(codec=codec)
+        self.log_sample_rate = log_sample_rate
+        self.instrumentation: Instrumentation = None
+        self.cache: ResponseCache = None
+        self.rate_limiter: RateLimiter = None
+        self.max_retries = max_retries
+
+        if timeout is None:
+            timeout = getattr(client, "timeout", None) or DEFAULT_TIMEOUT
 
-        if not pathlib.Path("logs").exists():
-            pathlib.Path("logs").mkdir()
-            pathlib.Path("logs/log_file_custom.log").touch()
+        self.timeout: Timeout = timeout
 
-        self.client: MicrosoftGraphClient = client
-        logging.basicConfig(
-            filename="logs/log_file_custom.log",
-            level=logging.INFO,
-            encoding="utf-8",
-            format=log_format
-        )
+        # One connection pool per thread, so concurrent callers reuse connections.
+        self._local = threading.local()
+
+    def with_timeout(self, timeout: Timeout) -> "GraphSession":
+        """Makes a copy of the session with other timeouts, to hand to a
+        service. The copy shares the connections, cache, rate limiter
+        and instrumentation of the session.
+
+        ### Parameters
+        ----
+        timeout : Timeout
+            The seconds a request may take to connect and to
+            read, either one number or `(connect, read)`.
+
+        ### Returns
+        ----
+        GraphSession:
+            The copy.
+
+        ### Usage:
+        ----
+            >>> mail_service = Mail(session=graph_session.with_timeout((3.05, 10)))
+        """
+
+        session = copy.copy(self)
+        session.timeout = timeout
+
+        return session
+
+    def deadline(self, seconds: float = None) -> ContextManager[Deadline]:
+        """Bounds the time a block of work takes, every request, retry,
+        page and rate limit wait in it shares the deadline.
+
+        ### Overview:
+        ----
+        Each request is given the time left as its timeout, retries
+        that would wait past the deadline are not made, and once the
+        time is up the next request raises `DeadlineExceeded`. The
+        deadline can be cancelled from another thread with `cancel`.
+        Deadlines nest, an inner one never outlives the outer one.
+
+        ### Parameters
+        ----
+        seconds : float (optional, Default=None)
+            The number of seconds the block has, `None` to only
+            allow cancelling it.
+
+        ### Returns
+        ----
+        ContextManager[Deadline]:
+            Enters the deadline for the current thread.
+
+        ### Usage:
+        ----
+            >>> with graph_session.deadline(30) as deadline:
+            ...     users = list(graph_session.iter_items(endpoint="users"))
+        """
+
+        return deadline_scope(seconds=seconds)
+
+    def enable_instrumentation(self, instrumentation: Instrumentation = None) -> Instrumentation:
+        """Turns on the request hooks and built in metrics.
+
+        ### Parameters
+        ----
+        instrumentation : Instrumentation (optional, Default=None)
+            The instrumentation to use, a new one is created
+            if not specified. An instrumentation can be shared
+            by several sessions.
+
+        ### Returns
+        ----
+        Instrumentation:
+            The active instrumentation.
+        """
+
+        self.instrumentation = instrumentation or Instrumentation()
+
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Turns off the request hooks and built in metrics."""
+
+        self.instrumentation = None
+
+    def enable_cache(self, cache: ResponseCache = None) -> ResponseCache:
+        """Turns on the conditional GET cache.
+
+        ### Overview:
+        ----
+        Responses that carry an `ETag` are stored, repeat GET requests
+        send `If-None-Match`, and a `304 Not Modified` is answered with
+        the cached body. Entries are keyed by the URL, the headers in
+        `CACHE_KEY_HEADERS` and a digest of the access token, so a
+        token refresh starts from an empty cache.
+
+        ### Parameters
+        ----
+        cache : ResponseCache (optional, Default=None)
+            The cache backend, a `MemoryCache` or `SQLiteCache`.
+            A `MemoryCache` is created if not specified.
+
+        ### Returns
+        ----
+        ResponseCache:
+            The active cache.
+        """
+
+        self.cache = cache or MemoryCache()
+
+        return self.cache
+
+    def disable_cache(self) -> None:
+        """Turns off the conditional GET cache."""
+
+        self.cache = None
+
+    def enable_rate_limiter(self, rate_limiter: RateLimiter = None) -> RateLimiter:
+        """Turns on the client side rate limiter.
+
+        ### Overview:
+        ----
+        Every request waits for the tenant wide limit, and mailbox
+        requests also wait for the limit of their mailbox. The limits
+        adapt from the 429s and `Retry-After` values they observe. A
+        limiter can be shared by several sessions of the same app.
+
+        ### Parameters
+        ----
+        rate_limiter : RateLimiter (optional, Default=None)
+            The limiter to use, one with the default budgets is
+            created if not specified.
+
+        ### Returns
+        ----
+        RateLimiter:
+            The active rate limiter.
+        """
+
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        return self.rate_limiter
+
+    def disable_rate_limiter(self) -> None:
+        """Turns off the client side rate limiter."""
+
+        self.rate_limiter = None
 
     def build_headers(self, additional_args: dict = None) -> Dict:
         """Used to build the headers needed to make the request.
@@ -86,6 +285,10 @@ class GraphSession():
             The full URL with the endpoint needed.
         """
 
+        # Next links and delta links are already full URLs.
+        if endpoint.startswith("https://"):
+            return endpoint
+
         url = self.client.RESOURCE + self.client.api_version + "/" + endpoint
 
         return url
@@ -98,7 +301,8 @@ class GraphSession():
         data: dict = None,
         json: dict = None,
         additional_headers: dict = None,
-        expect_no_response: bool = False
+        expect_no_response: bool = False,
+        timeout: Timeout = None
     ) -> Union[Dict, List]:
         """Handles all the requests in the library.
 
@@ -131,25 +335,272 @@ class GraphSession():
             so if this is set to True it will only return
             the status code.
 
+        timeout : Timeout (optional, Default=None)
+            The connect and read timeouts of this request,
+            defaults to the `timeout` of the session.
+
         ### Returns:
         ----
         Union[List, Dict]:
             The resource object or objects.
         """
 
+        # Revalidate cached GET responses with their ETag.
+        cache_key = None
+        cache_entry = None
+
+        if self.cache is not None and method.lower() == "get" and not expect_no_response:
+            cache_key = self._cache_key(
+                endpoint=endpoint,
+                params=params,
+                additional_headers=additional_headers
+            )
+            cache_entry = self.cache.lookup(key=cache_key)
+
+            if cache_entry is not None:
+                additional_headers = {
+                    **(additional_headers or {}),
+                    "If-None-Match": cache_entry.etag
+                }
+
+        response = self._send(
+            method=method,
+            endpoint=endpoint,
+            params=params,
+            data=data,
+            json=json,
+            additional_headers=additional_headers,
+            timeout=timeout
+        )
+
+        if cache_key is not None:
+
+            if response.status_code == 304 and cache_entry is not None:
+                self.cache.hit()
+                return self.codec.loads(cache_entry.body)
+
+            etag = response.headers.get("ETag")
+            if response.status_code == 200 and etag and response.content:
+                self.cache.store(key=cache_key, etag=etag, body=response.content)
+
+        # If it"s okay and no details.
+        if response.ok and expect_no_response:
+            return {"status_code": response.status_code}
+        elif response.ok and len(response.content) > 0:
+            return self.codec.loads(response.content)
+        elif len(response.content) == 0 and response.ok:
+            return {
+                "message": "Request was successful, status code provided.",
+                "status_code": response.status_code
+            }
+        elif not response.ok:
+            self._raise_for_error(response=response)
+
+    def stream_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: dict = None,
+        json: dict = None,
+        additional_headers: dict = None,
+        timeout: Timeout = None
+    ) -> requests.Response:
+        """Makes a request without reading the response body.
+
+        ### Overview:
+        ---
+        Works like `make_request`, but the body is left on the wire so
+        it can be consumed in chunks with `Response.iter_content`. The
+        caller is responsible for closing the response. Under a deadline,
+        reading the body raises `DeadlineExceeded` once it passes.
+
+        ### Arguments:
+        ----
+        method : str
+            The Request method, can be one of the
+            following: ["get","post","put","delete","patch"]
+
+        endpoint : str
+            The API URL endpoint, example is "quotes"
+
+        params : dict (optional, Default=None)
+            The URL params for the request.
+
+        data : dict (optional, Default=None)
+            A data payload for a request.
+
+        json : dict (optional, Default=None)
+            A json data payload for a request
+
+        additional_headers : dict (optional, Default=None)
+            Any additional headers that need to be sent in the
+            request.
+
+        timeout : Timeout (optional, Default=None)
+            The connect and read timeouts of this request, the
+            read timeout applies to each chunk.
+
+        ### Returns:
+        ----
+        requests.Response:
+            The streamed response.
+        """
+
+        response = self._send(
+            method=method,
+            endpoint=endpoint,
+            params=params,
+            data=data,
+            json=json,
+            additional_headers=additional_headers,
+            stream=True,
+            timeout=timeout
+        )
+
+        if not response.ok:
+            self._raise_for_error(response=response)
+
+        return response
+
+    def iter_items(
+        self,
+        endpoint: str,
+        params: dict = None,
+        additional_headers: dict = None,
+        stream: bool = False,
+        chunk_size: int = 65536,
+        model: type = None,
+        max_pages: int = None,
+        timeout: Timeout = None
+    ) -> ItemIterator:
+        """Iterates over every item of a collection, following
+        `@odata.nextLink` across pages.
+
+        ### Arguments:
+        ----
+        endpoint : str
+            The collection endpoint, example is "me/messages"
+
+        params : dict (optional, Default=None)
+            The URL params for the first request.
+
+        additional_headers : dict (optional, Default=None)
+            Any additional headers that need to be sent in the
+            request.
+
+        stream : bool (optional, Default=False)
+            If `True` each page is decoded item by item as it
+            is read, instead of decoding the whole page.
+
+        chunk_size : int (optional, Default=65536)
+            The number of bytes read at a time when streaming.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each item.
+
+        max_pages : int (optional, Default=None)
+            Stop after this many pages.
+
+        timeout : Timeout (optional, Default=None)
+            The connect and read timeouts of each page request.
+
+        ### Returns:
+        ----
+        ItemIterator:
+            An iterator over the items of the collection.
+        """
+
+        return ItemIterator(
+            session=self,
+            endpoint=endpoint,
+            params=params,
+            additional_headers=additional_headers,
+            stream=stream,
+            chunk_size=chunk_size,
+            model=model,
+            max_pages=max_pages,
+            timeout=timeout
+        )
+
+    def _cache_key(self, endpoint: str, params: dict = None, additional_headers: dict = None) -> str:
+        """Builds the cache key of a GET request from its URL, its params,
+        the headers that change the response and the caller's identity,
+        so users never share each other's responses.
+        """
+
+        key = self.build_url(endpoint=endpoint)
+
+        if params:
+            key += "?" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+        headers = {
+            name.lower(): value for name, value in (additional_headers or {}).items()
+            if name.lower() in CACHE_KEY_HEADERS
+        }
+
+        if headers:
+            key += "#" + "&".join(f"{name}={headers[name]}" for name in sorted(headers))
+
+        return f"{key}@{self.identity()}"
+
+    def identity(self) -> str:
+        """Identifies the caller in cache keys, so a cache shared between
+        sessions never serves one caller's responses to another.
+
+        ### Returns
+        ----
+        str:
+            A digest of the access token, never the token itself.
+        """
+
+        return hashlib.sha256(str(self.client.access_token).encode("utf-8")).hexdigest()[:16]
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: dict = None,
+        json: dict = None,
+        additional_headers: dict = None,
+        stream: bool = False,
+        timeout: Timeout = None
+    ) -> requests.Response:
+        """Builds and sends a request, returning the raw response."""
+
+        deadline = current_deadline()
+
+        if timeout is None:
+            timeout = self.timeout
+
         # Build the URL.
         url = self.build_url(endpoint=endpoint)
 
         # Define the headers.
         headers = self.build_headers(additional_args=additional_headers)
 
-        logging.info(
-            f"URL: {url}"
-        )
-
-        # Define a new session.
-        request_session = requests.Session()
-        request_session.verify = True
+        # Pre-authenticated URLs, like upload sessions, must not get our token.
+        if not url.startswith(self.client.RESOURCE):
+            headers.pop("Authorization", None)
+
+        # Encode JSON payloads ourselves, straight to bytes.
+        if json is not None:
+            data = self.codec.dumps(json)
+            json = None
+
+            if not any(key.lower() == "content-type" for key in headers):
+                headers["Content-Type"] = "application/json"
+
+        # Only pay for the hooks when they are turned on.
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            info = instrumentation.before_request(
+                method=method,
+                endpoint=endpoint,
+                url=url,
+                headers=headers
+            )
 
         # Define a new request.
         request_request = requests.Request(
@@ -161,38 +612,236 @@ class GraphSession():
             json=json
         ).prepare()
 
-        # Send the request.
-        response: requests.Response = request_session.send(
-            request=request_request
+        retries = 0
+        throttled = 0
+        start = time.perf_counter()
+
+        try:
+
+            while True:
+
+                if deadline is not None:
+                    deadline.check()
+
+                # Wait for the client side rate limit, if there is one.
+                limits = None
+                if self.rate_limiter is not None:
+                    try:
+                        limits = self.rate_limiter.acquire(
+                            endpoint=endpoint,
+                            timeout=None if deadline is None else deadline.remaining()
+                        )
+                    except TimeoutError as error:
+                        raise DeadlineExceeded(str(error)) from error
+
+                request_session = self._http_session()
+
+                # Send the request.
+                try:
+                    response: requests.Response = request_session.send(
+                        request=request_request,
+                        stream=stream,
+                        timeout=timeout if deadline is None else deadline.clamp(timeout)
+                    )
+                except requests.RequestException as error:
+                    if limits is not None:
+                        self.rate_limiter.release(limits=limits)
+                    if deadline is not None and deadline.expired and not isinstance(error, DeadlineExceeded):
+                        exceeded = DeadlineExceeded(f"The deadline passed during the request: {error}")
+                        exceeded.request_sent = not isinstance(error, requests.ConnectTimeout)
+                        raise exceeded from error
+                    raise
+
+                retry_after = retry_after_seconds(value=response.headers.get("Retry-After"))
+
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    throttled += 1
+
+                if limits is not None:
+                    self.rate_limiter.observe(
+                        limits=limits,
+                        status=response.status_code,
+                        retry_after=retry_after
+                    )
+
+                if response.status_code not in RETRY_STATUS_CODES or retries >= self.max_retries:
+                    break
+
+                # A 503 or 504 may come after the request was applied, only repeat it
+                # when that is harmless or the service asked for it with `Retry-After`.
+                if (
+                    response.status_code != 429
+                    and request_request.method not in IDEMPOTENT_METHODS
+                    and "Retry-After" not in response.headers
+                ):
+                    break
+
+                if retry_after is None:
+                    retry_after = min(2 ** (retries + 1), 30) * random.uniform(0.5, 1.0)
+
+                # A retry that cannot finish in time is not made, the caller gets the throttled response.
+                remaining = None if deadline is None else deadline.remaining()
+                if remaining is not None and retry_after >= remaining:
+                    break
+
+                # Drop the throttled response and back off before trying again.
+                response.close()
+                retries += 1
+
+                if limits is not None:
+                    self.rate_limiter.release(limits=limits)
+
+                sleep(retry_after, deadline=deadline)
+
+        except Exception as error:
+
+            # Every request that went through `before_request` gets its `after_request`.
+            if instrumentation is not None:
+                instrumentation.after_request(
+                    info=info,
+                    latency=time.perf_counter() - start,
+                    error=error,
+                    retries=retries,
+                    throttled=throttled
+                )
+            raise
+
+        # A streamed body keeps its slot until it is read and closed.
+        if limits is not None:
+            if stream:
+                self._release_on_close(response=response, limits=limits)
+            else:
+                self.rate_limiter.release(limits=limits)
+
+        if stream and deadline is not None:
+            self._read_within(response=response, deadline=deadline)
+
+        latency = time.perf_counter() - start
+
+        if instrumentation is not None:
+            instrumentation.after_request(
+                info=info,
+                response=response,
+                latency=latency,
+                retries=retries,
+                throttled=throttled,
+                body_bytes=None if stream else len(response.content)
+            )
+
+        self._log_request(
+            method=method,
+            endpoint=endpoint,
+            response=response,
+            latency=latency,
+            retries=retries
         )
 
-        # Close the session.
-        request_session.close()
+        return response
 
-        # If it"s okay and no details.
-        if response.ok and expect_no_response:
-            return {"status_code": response.status_code}
-        elif response.ok and len(response.content) > 0:
-            return response.json()
-        elif len(response.content) == 0 and response.ok:
-            return {
-                "message": "Request was successful, status code provided.",
-                "status_code": response.status_code
-            }
-        elif not response.ok:
+    def _release_on_close(self, response: requests.Response, limits: tuple) -> None:
+        """Hands the rate limits of a streamed response back once it is
+        closed, so reading its body counts against the concurrency."""
 
-            # Define the error dict.
-            error_dict = {
-                "error_code": response.status_code,
-                "response_url": response.url,
-                "response_body": json_lib.loads(response.content.decode("ascii")),
-                "response_request": dict(response.request.headers),
-                "response_method": response.request.method,
-            }
+        close = response.close
+        rate_limiter = self.rate_limiter
+        released = []
 
-            # Log the error.
-            logging.error(
-                msg=json_lib.dumps(obj=error_dict, indent=4)
-            )
+        def close_and_release() -> None:
+            try:
+                close()
+            finally:
+                if not released:
+                    released.append(True)
+                    rate_limiter.release(limits=limits)
+
+        response.close = close_and_release
+
+    def _read_within(self, response: requests.Response, deadline: Deadline) -> None:
+        """Checks the deadline before every chunk of a streamed body, each
+        chunk read is already bounded by the clamped read timeout."""
+
+        iter_content = response.iter_content
+
+        def iter_content_within(*args, **kwargs) -> Iterator[bytes]:
+            for chunk in iter_content(*args, **kwargs):
+                deadline.check()
+                yield chunk
+
+        response.iter_content = iter_content_within
+
+    def _http_session(self) -> requests.Session:
+        """Grabs the `requests.Session` of the current thread, so its
+        connections are kept alive between requests."""
+
+        request_session = getattr(self._local, "session", None)
+
+        if request_session is None:
+            request_session = requests.Session()
+            request_session.verify = True
+            self._local.session = request_session
+
+        return request_session
+
+    def _log_request(
+        self,
+        method: str,
+        endpoint: str,
+        response: requests.Response,
+        latency: float,
+        retries: int = 0
+    ) -> None:
+        """Logs a structured, sampled record of a request."""
+
+        level = logging.INFO if response.ok else logging.WARNING
+
+        if not logger.isEnabledFor(level):
+            return
+
+        if response.ok and self.log_sample_rate < 1.0 and random.random() >= self.log_sample_rate:
+            return
+
+        fields = {
+            "method": method.upper(),
+            "endpoint": endpoint_template(endpoint),
+            "status": response.status_code,
+            "latency_ms": round(latency * 1000, 2),
+            "bytes": int(response.headers.get("Content-Length", 0) or 0),
+            "retries": retries,
+        }
+
+        # The message is only formatted by the handler, off the request path.
+        logger.log(
+            level,
+            "%(method)s %(endpoint)s %(status)s %(latency_ms)sms",
+            fields,
+            extra={"graph_request": fields}
+        )
+
+    def _raise_for_error(self, response: requests.Response) -> None:
+        """Logs the details of a failed request and raises."""
+
+        # Define the error dict, the body is logged as it was received.
+        error_dict = {
+            "error_code": response.status_code,
+            "response_url": response.url,
+            "response_body": response.content.decode("utf-8", errors="replace"),
+            "response_request": _redact(headers=response.request.headers),
+            "response_method": response.request.method,
+        }
+
+        # Log the error, the message is only formatted if it is emitted.
+        logger.error("Request failed: %s", error_dict)
+
+        raise requests.HTTPError(
+            f"{response.status_code} Error for url: {response.url}",
+            response=response
+        )
+
+
+def _redact(headers: Dict[str, str]) -> Dict[str, str]:
+    """Copies request headers for a log, masking the credentials."""
 
-            raise requests.HTTPError()
+    return {
+        key: "[REDACTED]" if key.lower() in SENSITIVE_HEADERS else value
+        for key, value in headers.items()
+    }
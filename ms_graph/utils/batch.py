@@ -0,0 +1,288 @@
+import random
+
+from typing import List
+from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import HTTPError
+from requests import RequestException
+
+from ms_graph.utils.throttling import RETRY_STATUS_CODES
+from ms_graph.utils.throttling import retry_after_seconds
+from ms_graph.utils.deadline import sleep
+from ms_graph.utils.deadline import DeadlineExceeded
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import call_with_deadline
+
+# Graph accepts at most 20 requests per batch.
+MAX_BATCH_SIZE = 20
+
+# Graph runs up to 4 requests of a batch against a mailbox at once.
+BATCH_CONCURRENCY = 4
+
+
+class BatchResult():
+
+    """
+    ## Overview:
+    ----
+    The outcome of one request sent through a `$batch` call.
+    """
+
+    __slots__ = ("request", "status", "headers", "body", "attempts")
+
+    def __init__(self, request: dict, status: int, headers: dict, body: object, attempts: int) -> None:
+        """Initializes the `BatchResult` object.
+
+        ### Parameters
+        ----
+        request : dict
+            The request, as passed to `BatchExecutor.execute`.
+
+        status : int
+            The status code of the request, `None` if the call
+            carrying it got no response.
+
+        headers : dict
+            The response headers of the request.
+
+        body : object
+            The response body, a dictionary for JSON bodies.
+
+        attempts : int
+            The number of times the request was sent.
+        """
+
+        self.request = request
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.attempts = attempts
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+
+        return self.status is not None and 200 <= self.status < 300
+
+    @property
+    def error(self) -> dict:
+        """The Graph error of a failed request, `None` if it succeeded."""
+
+        if self.ok:
+            return None
+
+        if self.status is None:
+            return {"code": "noResponse", "message": str(self.body)}
+
+        if isinstance(self.body, dict) and "error" in self.body:
+            return self.body["error"]
+
+        return {"code": str(self.status), "message": str(self.body)}
+
+    def __repr__(self) -> str:
+        return f"BatchResult(url={self.request.get('url')!r}, status={self.status!r})"
+
+
+class BatchExecutor():
+
+    """
+    ## Overview:
+    ----
+    Sends any number of independent requests through `$batch` calls of
+    20, several calls at a time. Graph runs up to 4 requests of a call
+    at once, so only as many calls are in flight as keep no more than
+    `max_concurrency` requests running, which keeps a single mailbox
+    under the 4 concurrent requests Outlook allows. Throttled requests
+    are sent again in a later round after the `Retry-After`. A call
+    that gets no response at all fails the requests it carried, with a
+    `status` of `None`, without stopping the others.
+
+    ### Usage:
+    ----
+        >>> batch = BatchExecutor(session=graph_client.graph_session)
+        >>> results = batch.execute(
+            batch_requests=[
+                {"method": "DELETE", "url": f"/me/messages/{message_id}"}
+                for message_id in message_ids
+            ]
+        )
+        >>> failed = [result for result in results if not result.ok]
+    """
+
+    def __init__(
+        self,
+        session: object,
+        max_workers: int = 4,
+        max_concurrency: int = 4,
+        max_retries: int = 5
+    ) -> None:
+        """Initializes the `BatchExecutor` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        max_workers : int (optional, Default=4)
+            The most `$batch` calls in flight.
+
+        max_concurrency : int (optional, Default=4)
+            The number of requests running at once across the
+            calls in flight, which caps the calls in flight to
+            one per 4 requests.
+
+        max_retries : int (optional, Default=5)
+            The number of times a throttled request is sent
+            again.
+        """
+
+        self.graph_session = session
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    @property
+    def calls_in_flight(self) -> int:
+        """The number of `$batch` calls sent at once."""
+
+        return max(1, min(self.max_workers, self.max_concurrency // BATCH_CONCURRENCY))
+
+    def execute(self, batch_requests: Iterable[dict]) -> List[BatchResult]:
+        """Sends the requests and waits for all of them.
+
+        ### Parameters
+        ----
+        batch_requests : Iterable[dict]
+            The requests, each with a `method` and a `url`
+            relative to the API version, like `/me/messages`,
+            and optionally a `body` and `headers`.
+
+        ### Returns
+        ----
+        List[BatchResult]:
+            One result per request, in the same order.
+        """
+
+        batch_requests = list(batch_requests)
+        results: List[BatchResult] = [None] * len(batch_requests)
+        attempts = [0] * len(batch_requests)
+        pending = list(range(len(batch_requests)))
+
+        # The calls run in worker threads, under the deadline of the caller.
+        deadline = current_deadline()
+
+        with ThreadPoolExecutor(
+            max_workers=self.calls_in_flight, thread_name_prefix="ms_graph_batch"
+        ) as executor:
+
+            while pending:
+
+                chunks = [
+                    pending[start:start + MAX_BATCH_SIZE]
+                    for start in range(0, len(pending), MAX_BATCH_SIZE)
+                ]
+
+                for indexes in chunks:
+                    for index in indexes:
+                        attempts[index] += 1
+
+                pending = []
+                throttled = False
+                wait = 0.0
+
+                for indexes, responses in zip(
+                    chunks, executor.map(
+                        lambda indexes: call_with_deadline(deadline, self._send, batch_requests, indexes), chunks
+                    )
+                ):
+
+                    for index in indexes:
+
+                        response = responses[str(index)]
+                        status = response.get("status", 500)
+                        headers = response.get("headers") or {}
+
+                        results[index] = BatchResult(
+                            request=batch_requests[index],
+                            status=status,
+                            headers=headers,
+                            body=response.get("body"),
+                            attempts=attempts[index]
+                        )
+
+                        if status in RETRY_STATUS_CODES and attempts[index] <= self.max_retries:
+                            pending.append(index)
+                            throttled = True
+                            wait = max(wait, retry_after_seconds(_header(headers, "Retry-After")) or 0.0)
+
+                if throttled:
+                    round_number = max(attempts[index] for index in pending)
+
+                    # Out of time, the throttled requests keep their last result.
+                    try:
+                        sleep(wait or min(2 ** round_number, 30) * random.uniform(0.5, 1.0), deadline=deadline)
+                    except DeadlineExceeded:
+                        break
+
+        return results
+
+    def _send(self, batch_requests: List[dict], indexes: List[int]) -> dict:
+        """Sends one `$batch` call, returning the responses by id."""
+
+        payload = []
+
+        for index in indexes:
+
+            request = batch_requests[index]
+            entry = {"id": str(index), "method": request["method"].upper(), "url": request["url"]}
+
+            if request.get("body") is not None:
+                entry["body"] = request["body"]
+                entry["headers"] = {"Content-Type": "application/json", **request.get("headers", {})}
+            elif request.get("headers"):
+                entry["headers"] = request["headers"]
+
+            payload.append(entry)
+
+        try:
+            content = self.graph_session.make_request(
+                method="post", endpoint="$batch", json={"requests": payload}
+            )
+        except HTTPError as error:
+
+            # The whole call failed, so every request in it did.
+            response = error.response
+            status = response.status_code if response is not None else 500
+            headers = dict(response.headers) if response is not None else {}
+
+            return {
+                entry["id"]: {"id": entry["id"], "status": status, "headers": headers, "body": str(error)}
+                for entry in payload
+            }
+
+        except RequestException as error:
+
+            # No response, the requests may or may not have run, so they are not sent again.
+            return {
+                entry["id"]: {"id": entry["id"], "status": None, "headers": {}, "body": str(error)}
+                for entry in payload
+            }
+
+        responses = {response["id"]: response for response in content.get("responses", [])}
+
+        # Graph drops nothing, but never trust a missing id to have worked.
+        for entry in payload:
+            responses.setdefault(entry["id"], {"id": entry["id"], "status": 500, "body": "Missing from the batch."})
+
+        return responses
+
+
+def _header(headers: dict, name: str) -> str:
+    """Looks up a header without minding its case."""
+
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+
+    return None
@@ -0,0 +1,480 @@
+import abc
+import time
+import sqlite3
+import threading
+
+from typing import Any
+from typing import Dict
+from typing import Callable
+from collections import OrderedDict
+
+from ms_graph.utils.codec import get_codec
+
+
+class CacheEntry():
+
+    """
+    ## Overview:
+    ----
+    A cached response body along with the `ETag` it was served with.
+    """
+
+    __slots__ = ("etag", "body", "stored_at", "expires_at")
+
+    def __init__(self, etag: str, body: bytes, stored_at: float = None, expires_at: float = None) -> None:
+        """Initializes the `CacheEntry` object.
+
+        ### Parameters
+        ----
+        etag : str
+            The `ETag` header of the response.
+
+        body : bytes
+            The raw response body.
+
+        stored_at : float (optional, Default=None)
+            When the entry was stored, defaults to now.
+
+        expires_at : float (optional, Default=None)
+            When the entry expires, `None` if it never does.
+        """
+
+        self.etag = etag
+        self.body = body
+        self.stored_at = stored_at or time.time()
+        self.expires_at = expires_at
+
+    @property
+    def expired(self) -> bool:
+        """Whether the entry outlived its TTL."""
+
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+
+class ResponseCache(abc.ABC):
+
+    """
+    ## Overview:
+    ----
+    The interface of a conditional GET cache. Entries are keyed by the
+    session's cache key, evicted least recently used first once `max_entries`
+    is reached, and dropped after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None) -> None:
+        """Initializes the `ResponseCache` object.
+
+        ### Parameters
+        ----
+        max_entries : int (optional, Default=1024)
+            The maximum number of responses kept.
+
+        ttl : float (optional, Default=None)
+            The number of seconds an entry is kept, `None`
+            keeps it until it is evicted.
+        """
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> CacheEntry:
+        """Grabs an entry, counting the miss if there is none.
+
+        ### Parameters
+        ----
+        key : str
+            The cache key of the request.
+
+        ### Returns
+        ----
+        CacheEntry:
+            The entry, or `None`.
+        """
+
+        entry = self.get(key=key)
+
+        if entry is None:
+            self.miss()
+
+        return entry
+
+    def hit(self) -> None:
+        """Counts a response served from the cache."""
+
+        with self._lock:
+            self.stats["hits"] += 1
+
+    def miss(self) -> None:
+        """Counts a response that had to be fetched."""
+
+        with self._lock:
+            self.stats["misses"] += 1
+
+    def store(self, key: str, etag: str, body: bytes) -> None:
+        """Stores a response.
+
+        ### Parameters
+        ----
+        key : str
+            The cache key of the request.
+
+        etag : str
+            The `ETag` header of the response.
+
+        body : bytes
+            The raw response body.
+        """
+
+        expires_at = time.time() + self.ttl if self.ttl else None
+
+        self.set(key=key, entry=CacheEntry(etag=etag, body=body, expires_at=expires_at))
+
+        with self._lock:
+            self.stats["stores"] += 1
+
+    @abc.abstractmethod
+    def get(self, key: str) -> CacheEntry:
+        """Grabs an entry, or `None` if it is missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Stores an entry, evicting older ones if needed."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Drops an entry."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drops every entry."""
+
+
+class MemoryCache(ResponseCache):
+
+    """
+    ## Overview:
+    ----
+    An in memory LRU `ResponseCache`, optionally bounded by the total
+    size of the cached bodies.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None, max_bytes: int = None) -> None:
+        """Initializes the `MemoryCache` object.
+
+        ### Parameters
+        ----
+        max_entries : int (optional, Default=1024)
+            The maximum number of responses kept.
+
+        ttl : float (optional, Default=None)
+            The number of seconds an entry is kept.
+
+        max_bytes : int (optional, Default=None)
+            The maximum total size of the cached bodies.
+        """
+
+        super().__init__(max_entries=max_entries, ttl=ttl)
+
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> CacheEntry:
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if entry.expired:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+
+        with self._lock:
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._size += len(entry.body)
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._size > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        """Removes an entry, the lock must be held."""
+
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+
+class SQLiteCache(ResponseCache):
+
+    """
+    ## Overview:
+    ----
+    A `ResponseCache` stored in a SQLite database, so it survives
+    restarts and can be shared by several processes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = None) -> None:
+        """Initializes the `SQLiteCache` object.
+
+        ### Parameters
+        ----
+        path : str
+            The path of the SQLite database file.
+
+        max_entries : int (optional, Default=10000)
+            The maximum number of responses kept.
+
+        ttl : float (optional, Default=None)
+            The number of seconds an entry is kept.
+        """
+
+        super().__init__(max_entries=max_entries, ttl=ttl)
+
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+
+    def get(self, key: str) -> CacheEntry:
+
+        with self._lock:
+
+            row = self._connection.execute(
+                "SELECT etag, body, stored_at, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            entry = CacheEntry(etag=row[0], body=row[1], stored_at=row[2], expires_at=row[3])
+
+            if entry.expired:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+
+        with self._lock:
+
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, etag, body, stored_at, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, entry.etag, entry.body, entry.stored_at, entry.expires_at, time.time())
+            )
+
+            evicted = self._connection.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            ).rowcount
+
+            self.stats["evictions"] += max(evicted, 0)
+
+    def delete(self, key: str) -> None:
+
+        with self._lock:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+
+class _Call():
+
+    """A load in flight, waited on by the callers it was coalesced with."""
+
+    __slots__ = ("done", "body", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.body = None
+        self.error = None
+
+
+class CoalescingCache():
+
+    """
+    ## Overview:
+    ----
+    Caches the results of read only calls that are not plain GETs, like
+    search queries. Results are kept encoded in a `ResponseCache`, so
+    every caller decodes its own copy, with its TTL and LRU eviction.
+    Callers asking for a key that is already being loaded wait for that
+    load instead of making the same call again.
+
+    ### Usage:
+    ----
+        >>> cache = CoalescingCache(ttl=60.0)
+        >>> cache.fetch(key="users:contoso", load=lambda: graph_client.users().list_users())
+        >>> cache.stats
+        {'hits': 0, 'misses': 1, 'stores': 1, 'evictions': 0, 'coalesced': 0}
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0, cache: ResponseCache = None) -> None:
+        """Initializes the `CoalescingCache` object.
+
+        ### Parameters
+        ----
+        max_entries : int (optional, Default=256)
+            The maximum number of results kept.
+
+        ttl : float (optional, Default=60.0)
+            The number of seconds a result is kept.
+
+        cache : ResponseCache (optional, Default=None)
+            The backend, defaults to a `MemoryCache` with the
+            given limits.
+        """
+
+        self.cache = cache or MemoryCache(max_entries=max_entries, ttl=ttl)
+        self.codec = get_codec()
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._coalesced = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The `hits`, `misses`, `stores` and `evictions` of the cache,
+        and the calls `coalesced` into one already in flight.
+        """
+
+        with self._lock:
+            return {**self.cache.stats, "coalesced": self._coalesced}
+
+    def fetch(self, key: str, load: Callable[[], Any]) -> Any:
+        """Grabs a cached result, or loads it once for every caller
+        asking for it at the same time.
+
+        ### Parameters
+        ----
+        key : str
+            The normalised key of the call.
+
+        load : Callable[[], Any]
+            Makes the call, its result must be JSON.
+
+        ### Returns
+        ----
+        Any:
+            A fresh copy of the result.
+        """
+
+        with self._lock:
+
+            entry = self.cache.get(key=key)
+
+            if entry is not None:
+                self.cache.hit()
+                return self.codec.loads(entry.body)
+
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+                self.cache.miss()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return self.codec.loads(call.body)
+
+        try:
+            call.body = self.codec.dumps(load())
+            self.cache.store(key=key, etag="", body=call.body)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return self.codec.loads(call.body)
+
+    def invalidate(self, key: str = None) -> None:
+        """Drops one cached result, or all of them.
+
+        ### Parameters
+        ----
+        key : str (optional, Default=None)
+            The key to drop, `None` drops every result.
+        """
+
+        if key is None:
+            self.cache.clear()
+        else:
+            self.cache.delete(key=key)
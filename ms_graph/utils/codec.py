@@ -0,0 +1,116 @@
+import json
+
+from typing import Any
+from typing import Dict
+from typing import Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec():
+
+    """
+    ## Overview:
+    ----
+    Encodes request bodies straight to bytes and decodes response
+    bodies. This is the `json` module from the standard library,
+    subclasses swap in a faster library.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encodes an object to UTF-8 JSON bytes.
+
+        ### Parameters
+        ----
+        obj : Any
+            The object to encode.
+
+        ### Returns
+        ----
+        bytes:
+            The compact JSON encoding of the object.
+        """
+
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        """Decodes JSON bytes or text.
+
+        ### Parameters
+        ----
+        data : Union[bytes, bytearray, str]
+            The JSON document.
+
+        ### Returns
+        ----
+        Any:
+            The decoded object.
+        """
+
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+
+    """
+    ## Overview:
+    ----
+    A `JsonCodec` backed by `orjson`, which is several times
+    faster than the standard library in both directions.
+    """
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return orjson.loads(data)
+
+
+_CODECS: Dict[str, type] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+}
+
+
+def get_codec(codec: Union[str, JsonCodec] = "auto") -> JsonCodec:
+    """Resolves the codec used by a `GraphSession`.
+
+    ### Parameters
+    ----
+    codec : Union[str, JsonCodec] (optional, Default="auto")
+        A `JsonCodec` instance, or the name of one: `json`,
+        `orjson` or `auto`. With `auto` the fastest installed
+        library is used.
+
+    ### Raises
+    ----
+    ValueError:
+        If the codec is unknown or its library is not
+        installed.
+
+    ### Returns
+    ----
+    JsonCodec:
+        The codec instance.
+    """
+
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec in (None, "auto"):
+        codec = "orjson" if orjson is not None else "json"
+
+    if codec not in _CODECS:
+        raise ValueError(f"Unknown JSON codec: {codec}.")
+
+    if codec == "orjson" and orjson is None:
+        raise ValueError("The `orjson` codec requires the `orjson` package.")
+
+    return _CODECS[codec]()
@@ -0,0 +1,259 @@
+import time
+import threading
+import contextlib
+
+from typing import Any
+from typing import Tuple
+from typing import Union
+from typing import Callable
+from typing import Iterator
+
+import requests
+
+# A `requests` timeout, seconds for both phases or `(connect, read)`.
+Timeout = Union[float, Tuple[float, float]]
+
+# The connect and read timeouts of a request, unless told otherwise.
+DEFAULT_TIMEOUT = (3.05, 60.0)
+
+# The deadline each thread is working under.
+_local = threading.local()
+
+
+class DeadlineExceeded(requests.Timeout):
+
+    """Raised once a deadline passed, or the work under it was cancelled."""
+
+    # Whether the request may have reached the server before the deadline passed.
+    request_sent = False
+
+
+class Deadline():
+
+    """
+    ## Overview:
+    ----
+    A point in time a piece of work has to finish by, shared by every
+    request, retry, page and wait made under it. A deadline can also be
+    cancelled from another thread, which stops the work at its next
+    request or wait. A deadline made under another one never outlives
+    it, and is cancelled with it.
+
+    ### Usage:
+    ----
+        >>> with graph_session.deadline(seconds=30) as deadline:
+        ...     for message in graph_session.iter_items(endpoint="me/messages"):
+        ...         print(message["id"])
+        >>> deadline.remaining()
+    """
+
+    def __init__(self, seconds: float = None, parent: "Deadline" = None) -> None:
+        """Initializes the `Deadline` object.
+
+        ### Parameters
+        ----
+        seconds : float (optional, Default=None)
+            The number of seconds from now the work has to
+            finish in, `None` for no limit of its own.
+
+        parent : Deadline (optional, Default=None)
+            The deadline this one is nested in.
+        """
+
+        self.parent = parent
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+        if parent is not None and parent.expires_at is not None:
+            if self.expires_at is None or parent.expires_at < self.expires_at:
+                self.expires_at = parent.expires_at
+
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether this deadline, or one it is nested in, was cancelled."""
+
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline passed, or was cancelled."""
+
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def cancel(self) -> None:
+        """Cancels the work under the deadline, from any thread."""
+
+        self._cancelled.set()
+
+    def remaining(self) -> float:
+        """The number of seconds left.
+
+        ### Returns
+        ----
+        float:
+            The seconds left, `None` if there is no limit.
+        """
+
+        if self.expires_at is None:
+            return None
+
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raises if the deadline passed or was cancelled.
+
+        ### Raises
+        ----
+        DeadlineExceeded:
+            If there is no time left.
+        """
+
+        if self.cancelled:
+            raise DeadlineExceeded("The operation was cancelled.")
+
+        if self.expired:
+            raise DeadlineExceeded("The deadline of the operation passed.")
+
+    def sleep(self, seconds: float) -> None:
+        """Waits before a retry, waking up early if cancelled.
+
+        ### Parameters
+        ----
+        seconds : float
+            The number of seconds to wait.
+
+        ### Raises
+        ----
+        DeadlineExceeded:
+            If the wait would end past the deadline, which is
+            raised right away instead of waiting for nothing.
+        """
+
+        self.check()
+
+        remaining = self.remaining()
+
+        if remaining is not None and seconds >= remaining:
+            raise DeadlineExceeded(f"Waiting {seconds:.1f}s would pass the deadline of the operation.")
+
+        give_up_at = time.monotonic() + seconds
+
+        # Wake up now and then to notice a parent being cancelled.
+        while True:
+
+            left = give_up_at - time.monotonic()
+
+            if left <= 0:
+                return
+
+            self._cancelled.wait(timeout=min(left, 0.25))
+            self.check()
+
+    def clamp(self, timeout: Timeout) -> Timeout:
+        """Shortens a request timeout to the time left.
+
+        ### Parameters
+        ----
+        timeout : Timeout
+            The seconds for both phases, or `(connect, read)`.
+
+        ### Returns
+        ----
+        Timeout:
+            The timeout, none of it past the deadline.
+        """
+
+        remaining = self.remaining()
+
+        if remaining is None:
+            return timeout
+
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def current_deadline() -> Deadline:
+    """Grabs the deadline the current thread is working under.
+
+    ### Returns
+    ----
+    Deadline:
+        The innermost deadline, `None` if there is none.
+    """
+
+    return getattr(_local, "deadline", None)
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float = None, parent: Deadline = None) -> Iterator[Deadline]:
+    """Runs a block of work under a deadline, nested in the deadline the
+    thread is already under.
+
+    ### Parameters
+    ----
+    seconds : float (optional, Default=None)
+        The number of seconds the block has.
+
+    parent : Deadline (optional, Default=None)
+        The deadline to nest in, used to carry a deadline
+        into a worker thread.
+
+    ### Yields
+    ----
+    Deadline:
+        The deadline of the block.
+    """
+
+    outer = current_deadline()
+    _local.deadline = Deadline(seconds=seconds, parent=parent or outer)
+
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = outer
+
+
+def call_with_deadline(deadline: Deadline, function: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Calls a function under a deadline, used by worker threads to work
+    under the deadline of the thread that handed them the work.
+
+    ### Parameters
+    ----
+    deadline : Deadline
+        The deadline, `None` to just call the function.
+
+    function : Callable
+        The function to call with the other arguments.
+
+    ### Returns
+    ----
+    Any:
+        What the function returned.
+    """
+
+    if deadline is None:
+        return function(*args, **kwargs)
+
+    with deadline_scope(parent=deadline):
+        return function(*args, **kwargs)
+
+
+def sleep(seconds: float, deadline: Deadline = None) -> None:
+    """Waits before a retry, within a deadline if there is one.
+
+    ### Parameters
+    ----
+    seconds : float
+        The number of seconds to wait.
+
+    deadline : Deadline (optional, Default=None)
+        The deadline of the work.
+    """
+
+    if deadline is None:
+        time.sleep(seconds)
+    else:
+        deadline.sleep(seconds)
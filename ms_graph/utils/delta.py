@@ -0,0 +1,532 @@
+import abc
+import sqlite3
+import threading
+
+from typing import Set
+from typing import Dict
+from typing import List
+from typing import Iterable
+from typing import Iterator
+from typing import Callable
+
+import requests
+
+ADDED = "added"
+UPDATED = "updated"
+REMOVED = "removed"
+
+
+class DeltaEvent():
+
+    """
+    ## Overview:
+    ----
+    A change reported by a delta query.
+    """
+
+    __slots__ = ("kind", "scope", "item")
+
+    def __init__(self, kind: str, scope: str, item: dict) -> None:
+        """Initializes the `DeltaEvent` object.
+
+        ### Parameters
+        ----
+        kind : str
+            Either `added`, `updated` or `removed`.
+
+        scope : str
+            The store key of the synced collection, for example
+            `mail:me:inbox`.
+
+        item : dict
+            The item as returned by the delta query, for removed
+            items only the `id` and `@removed` are set.
+        """
+
+        self.kind = kind
+        self.scope = scope
+        self.item = item
+
+    @property
+    def id(self) -> str:
+        """The id of the changed item."""
+
+        return self.item.get("id")
+
+    def __repr__(self) -> str:
+        return f"DeltaEvent(kind={self.kind!r}, scope={self.scope!r}, id={self.id!r})"
+
+
+class DeltaStore(abc.ABC):
+
+    """
+    ## Overview:
+    ----
+    The interface of the store a delta sync persists its state to. For
+    each synced collection it keeps the link to resume from, either a
+    `@odata.nextLink` of a round in progress or the `@odata.deltaLink`
+    of the last round, and the ids of the items seen so far, which tell
+    added items apart from updated ones.
+    """
+
+    @abc.abstractmethod
+    def get_link(self, key: str) -> str:
+        """Grabs the link to resume a collection from, or `None`."""
+
+    @abc.abstractmethod
+    def set_link(self, key: str, link: str) -> None:
+        """Saves the link to resume a collection from."""
+
+    @abc.abstractmethod
+    def known(self, key: str, ids: Iterable[str]) -> Set[str]:
+        """Returns the ids, of the ones given, that were seen before."""
+
+    @abc.abstractmethod
+    def add_items(self, key: str, ids: Iterable[str]) -> None:
+        """Records ids as seen."""
+
+    @abc.abstractmethod
+    def remove_items(self, key: str, ids: Iterable[str]) -> None:
+        """Forgets ids that were removed."""
+
+    @abc.abstractmethod
+    def items(self, key: str) -> List[str]:
+        """Lists every id seen in a collection."""
+
+    @abc.abstractmethod
+    def keys(self, prefix: str = "") -> List[str]:
+        """Lists the collection keys that start with `prefix`."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Drops the link and the ids of a collection."""
+
+
+class MemoryDeltaStore(DeltaStore):
+
+    """
+    ## Overview:
+    ----
+    A `DeltaStore` kept in memory, for syncs that live as long as the
+    process.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the `MemoryDeltaStore` object."""
+
+        self._lock = threading.Lock()
+        self._links: Dict[str, str] = {}
+        self._items: Dict[str, Set[str]] = {}
+
+    def get_link(self, key: str) -> str:
+
+        with self._lock:
+            return self._links.get(key)
+
+    def set_link(self, key: str, link: str) -> None:
+
+        with self._lock:
+            self._links[key] = link
+
+    def known(self, key: str, ids: Iterable[str]) -> Set[str]:
+
+        with self._lock:
+            return self._items.get(key, set()).intersection(ids)
+
+    def add_items(self, key: str, ids: Iterable[str]) -> None:
+
+        with self._lock:
+            self._items.setdefault(key, set()).update(ids)
+
+    def remove_items(self, key: str, ids: Iterable[str]) -> None:
+
+        with self._lock:
+            self._items.get(key, set()).difference_update(ids)
+
+    def items(self, key: str) -> List[str]:
+
+        with self._lock:
+            return list(self._items.get(key, ()))
+
+    def keys(self, prefix: str = "") -> List[str]:
+
+        with self._lock:
+            return [key for key in self._links if key.startswith(prefix)]
+
+    def delete(self, key: str) -> None:
+
+        with self._lock:
+            self._links.pop(key, None)
+            self._items.pop(key, None)
+
+
+class SQLiteDeltaStore(DeltaStore):
+
+    """
+    ## Overview:
+    ----
+    A `DeltaStore` stored in a SQLite database, so a sync picks up
+    where the previous run stopped.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes the `SQLiteDeltaStore` object.
+
+        ### Parameters
+        ----
+        path : str
+            The path of the SQLite database file.
+        """
+
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS delta_links (key TEXT PRIMARY KEY, link TEXT)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS delta_items (
+                key TEXT NOT NULL,
+                id TEXT NOT NULL,
+                PRIMARY KEY (key, id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def get_link(self, key: str) -> str:
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT link FROM delta_links WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def set_link(self, key: str, link: str) -> None:
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO delta_links (key, link) VALUES (?, ?)", (key, link)
+            )
+
+    def known(self, key: str, ids: Iterable[str]) -> Set[str]:
+
+        ids = list(ids)
+        found = set()
+
+        with self._lock:
+
+            # Stay under the SQLite limit of bound variables.
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                found.update(
+                    row[0] for row in self._connection.execute(
+                        f"SELECT id FROM delta_items WHERE key = ? AND id IN ({', '.join('?' * len(chunk))})",
+                        [key] + chunk
+                    )
+                )
+
+        return found
+
+    def add_items(self, key: str, ids: Iterable[str]) -> None:
+
+        self._write_many(
+            "INSERT OR IGNORE INTO delta_items (key, id) VALUES (?, ?)",
+            ((key, item_id) for item_id in ids)
+        )
+
+    def remove_items(self, key: str, ids: Iterable[str]) -> None:
+
+        self._write_many(
+            "DELETE FROM delta_items WHERE key = ? AND id = ?",
+            ((key, item_id) for item_id in ids)
+        )
+
+    def items(self, key: str) -> List[str]:
+
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute(
+                    "SELECT id FROM delta_items WHERE key = ?", (key,)
+                )
+            ]
+
+    def keys(self, prefix: str = "") -> List[str]:
+
+        with self._lock:
+            return [
+                row[0] for row in self._connection.execute(
+                    "SELECT key FROM delta_links WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix)
+                )
+            ]
+
+    def delete(self, key: str) -> None:
+
+        with self._lock:
+            self._connection.execute("DELETE FROM delta_links WHERE key = ?", (key,))
+            self._connection.execute("DELETE FROM delta_items WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    def _write_many(self, statement: str, rows: Iterable[tuple]) -> None:
+        """Runs a statement for many rows in a single transaction."""
+
+        with self._lock:
+
+            self._connection.execute("BEGIN")
+
+            try:
+                self._connection.executemany(statement, rows)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+
+
+class DeltaQuery():
+
+    """
+    ## Overview:
+    ----
+    Runs a Microsoft Graph delta query and turns its pages into added,
+    updated and removed events. The link to resume from is saved after
+    every page, once the events of that page were consumed, so a sync
+    that stops halfway resumes from the last page instead of starting
+    over. When the saved link has expired, Graph answers `410 Gone` and
+    the query starts a new full round. The items that round does not
+    return were deleted in the meantime, `changes` reports them as
+    removed once the round completes.
+
+    ### Usage:
+    ----
+        >>> delta = DeltaQuery(session=graph_client.graph_session, store=SQLiteDeltaStore("sync.db"))
+        >>> for event in delta.changes(key="users", endpoint="users/delta"):
+        ...     print(event.kind, event.id)
+    """
+
+    def __init__(self, session: object, store: DeltaStore = None) -> None:
+        """Initializes the `DeltaQuery` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        store : DeltaStore (optional, Default=None)
+            Where the links and item ids are persisted, defaults
+            to a `MemoryDeltaStore`.
+        """
+
+        self.graph_session = session
+        self.store = store or MemoryDeltaStore()
+
+    def changes(
+        self,
+        key: str,
+        endpoint: str,
+        params: dict = None,
+        additional_headers: dict = None
+    ) -> Iterator[DeltaEvent]:
+        """Yields the changes since the last sync of a collection.
+
+        ### Overview:
+        ----
+        When the saved link expired, the known ids are kept aside
+        under a resync key and struck off as the new full round
+        returns them. Once the round completes, the ids left over
+        are reported as removed and forgotten. The resync key is
+        persisted, so a round resumed after a crash still sweeps.
+
+        ### Parameters
+        ----
+        key : str
+            The store key of the collection.
+
+        endpoint : str
+            The delta endpoint, used when there is no saved link,
+            for example `me/mailFolders/inbox/messages/delta`.
+
+        params : dict (optional, Default=None)
+            The query params of the first request, like `$select`.
+            Later requests carry them inside the links.
+
+        additional_headers : dict (optional, Default=None)
+            Headers sent with every request, for example
+            `{"Prefer": "odata.maxpagesize=100"}`.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One event per changed item.
+        """
+
+        resync_key = _resync_key(key=key)
+
+        def on_resync() -> None:
+            self.store.add_items(resync_key, self.store.items(key))
+
+        for page in self.pages(
+            key=key,
+            endpoint=endpoint,
+            params=params,
+            additional_headers=additional_headers,
+            on_resync=on_resync
+        ):
+            yield from page
+            self.store.remove_items(resync_key, [event.id for event in page])
+
+        stale = self.store.items(resync_key)
+
+        for item_id in stale:
+            yield DeltaEvent(kind=REMOVED, scope=key, item={"id": item_id, "@removed": {"reason": "deleted"}})
+
+        self.store.remove_items(key, stale)
+        self.store.delete(resync_key)
+
+    def pages(
+        self,
+        key: str,
+        endpoint: str,
+        params: dict = None,
+        additional_headers: dict = None,
+        on_resync: Callable[[], None] = None
+    ) -> Iterator[List[DeltaEvent]]:
+        """Yields the changes since the last sync of a collection, one
+        list per page, for consumers that apply a page at a time. The
+        link is saved once the consumer asks for the next page.
+
+        ### Parameters
+        ----
+        key : str
+            The store key of the collection.
+
+        endpoint : str
+            The delta endpoint, used when there is no saved link.
+
+        params : dict (optional, Default=None)
+            The query params of the first request.
+
+        additional_headers : dict (optional, Default=None)
+            Headers sent with every request.
+
+        on_resync : Callable[[], None] (optional, Default=None)
+            Called when the saved link expired and a new full
+            round starts, so the consumer can drop what the
+            new round does not return.
+
+        ### Yields
+        ----
+        List[DeltaEvent]:
+            The events of a page.
+        """
+
+        link = self.store.get_link(key)
+
+        while True:
+
+            try:
+                content = self.graph_session.make_request(
+                    method="get",
+                    endpoint=link or endpoint,
+                    params=None if link else params,
+                    additional_headers=additional_headers
+                )
+            except requests.HTTPError as error:
+
+                # The saved link expired, start a new round.
+                if link and error.response is not None and error.response.status_code == 410:
+                    self.store.set_link(key, None)
+                    link = None
+
+                    if on_resync is not None:
+                        on_resync()
+
+                    continue
+
+                raise
+
+            values = content.get("value", [])
+            removed = [value["id"] for value in values if "@removed" in value]
+            current = [value for value in values if "@removed" not in value]
+            known = self.store.known(key, [value["id"] for value in current])
+
+            events = []
+
+            for value in values:
+
+                if "@removed" in value:
+                    kind = REMOVED
+                elif value["id"] in known:
+                    kind = UPDATED
+                else:
+                    kind = ADDED
+
+                events.append(DeltaEvent(kind=kind, scope=key, item=value))
+
+            yield events
+
+            self.store.remove_items(key, removed)
+            self.store.add_items(key, [value["id"] for value in current])
+
+            link = content.get("@odata.nextLink") or content.get("@odata.deltaLink")
+            self.store.set_link(key, link)
+
+            if "@odata.nextLink" not in content:
+                return
+
+    def forget(self, key: str) -> Iterator[DeltaEvent]:
+        """Drops a collection from the store, for example a deleted
+        folder, yielding a removed event for every item it held.
+
+        ### Parameters
+        ----
+        key : str
+            The store key of the collection.
+
+        ### Yields
+        ----
+        DeltaEvent:
+            One removed event per known item.
+        """
+
+        for item_id in self.store.items(key):
+            yield DeltaEvent(kind=REMOVED, scope=key, item={"id": item_id, "@removed": {"reason": "deleted"}})
+
+        self.store.delete(key)
+        self.store.delete(_resync_key(key=key))
+
+
+def mailbox_prefix(user_id: str) -> str:
+    """Builds the endpoint prefix of a mailbox.
+
+    ### Parameters
+    ----
+    user_id : str
+        The user owning the mailbox, `me` for the signed-in user.
+
+    ### Returns
+    ----
+    str:
+        The prefix, for example `users/8bc6`.
+    """
+
+    return "me" if user_id == "me" else f"users/{user_id}"
+
+
+def _resync_key(key: str) -> str:
+    """Builds the store key of the ids a resync of a collection has not
+    returned yet. It never gets a link, so `keys` does not list it.
+    """
+
+    return f"{key}#resync"
@@ -0,0 +1,72 @@
+import re
+
+from functools import lru_cache
+
+# Path segments that are part of the API surface rather than resource ids.
+_WORD = re.compile(r"^(\$?[a-zA-Z]+(\.[a-zA-Z]+)*|[a-z]+[A-Z][a-zA-Z]*)$")
+
+# Function style segments, like `range(address='A1:B2')`.
+_ARGUMENTS = re.compile(r"\(.*?\)")
+
+# Path based addressing, like `root:/Folder/File.xlsx:`.
+_ITEM_PATH = re.compile(r"root:/.*?(:|$)")
+
+_BASE_URL = re.compile(r"^https://[^/]+/(v1\.0|beta)/")
+
+# Collections whose next segment is always a resource id.
+_COLLECTIONS = frozenset([
+    "attachments", "calendars", "childFolders", "columns", "contactFolders",
+    "contacts", "drives", "events", "groups", "items", "lists", "mailFolders",
+    "members", "messages", "names", "notebooks", "pages", "sections", "sites",
+    "tables", "users", "worksheets",
+])
+
+# Segments that can follow a collection without being an id.
+_ACTIONS = frozenset(["$count", "$value", "add", "delta", "itemAt"])
+
+
+@lru_cache(maxsize=4096)
+def endpoint_template(endpoint: str) -> str:
+    """Reduces an endpoint to a template by replacing resource ids with
+    `{id}`, so requests can be grouped for logs, metrics and throttling.
+
+    ### Parameters
+    ----
+    endpoint : str
+        The endpoint or full URL of a request, for example
+        `/users/8bc6.../messages/AQMk...`.
+
+    ### Returns
+    ----
+    str:
+        The endpoint template, for example `users/{id}/messages/{id}`.
+
+    ### Usage:
+    ----
+        >>> endpoint_template("me/drive/items/01ABC/workbook/worksheets")
+        'me/drive/items/{id}/workbook/worksheets'
+    """
+
+    endpoint = _BASE_URL.sub("", endpoint).split("?", 1)[0]
+    endpoint = _ITEM_PATH.sub(r"root:{path}\1", endpoint)
+    endpoint = _ARGUMENTS.sub("({args})", endpoint)
+
+    segments = []
+    previous = None
+
+    for segment in endpoint.strip("/").split("/"):
+
+        if not segment:
+            continue
+
+        if previous in _COLLECTIONS and segment not in _ACTIONS:
+            is_id = True
+        else:
+            is_id = not (
+                _WORD.match(segment) or segment.startswith("root:") or "(" in segment
+            )
+
+        segments.append("{id}" if is_id else segment)
+        previous = segment
+
+    return "/".join(segments)
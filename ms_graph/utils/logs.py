@@ -0,0 +1,136 @@
+import json
+import queue
+import logging
+
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+
+# The library logger, it stays silent until the application configures it.
+logger = logging.getLogger("ms_graph")
+logger.addHandler(logging.NullHandler())
+
+# The attributes every `LogRecord` has, anything else came from `extra`.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime"}
+
+_listener: QueueListener = None
+_queue_handler: QueueHandler = None
+
+
+class JsonFormatter(logging.Formatter):
+
+    """
+    ## Overview:
+    ----
+    Formats a record as a single JSON line, including any structured
+    fields passed through `extra`, like the `graph_request` fields
+    logged for every request.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+
+    """A `QueueHandler` that leaves all formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def enable_background_logging(
+    handler: logging.Handler = None,
+    filename: str = None,
+    level: int = logging.INFO,
+    structured: bool = False,
+) -> QueueListener:
+    """Sends the `ms_graph` log records through a queue to a background
+    thread, so writing them never blocks a request.
+
+    ### Parameters
+    ----
+    handler : logging.Handler (optional, Default=None)
+        The handler the records are delivered to. If not
+        specified, a `FileHandler` on `filename` or a
+        `StreamHandler` is used.
+
+    filename : str (optional, Default=None)
+        A log file, only used if `handler` is not specified.
+
+    level : int (optional, Default=logging.INFO)
+        The level of the `ms_graph` logger.
+
+    structured : bool (optional, Default=False)
+        If `True` and no handler is specified, records are
+        written as JSON lines.
+
+    ### Returns
+    ----
+    QueueListener:
+        The running listener, stop it with `disable_background_logging`.
+
+    ### Usage:
+    ----
+        >>> from ms_graph.utils.logs import enable_background_logging
+        >>> enable_background_logging(filename="ms_graph.log", structured=True)
+    """
+
+    global _listener, _queue_handler
+
+    disable_background_logging()
+
+    if handler is None:
+
+        if filename:
+            handler = logging.FileHandler(filename=filename, encoding="utf-8", delay=True)
+        else:
+            handler = logging.StreamHandler()
+
+        if structured:
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(
+                logging.Formatter("%(asctime)-15s|%(name)s|%(levelname)s|%(message)s")
+            )
+
+    log_queue = queue.SimpleQueue()
+
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level)
+
+    _listener.start()
+
+    return _listener
+
+
+def disable_background_logging() -> None:
+    """Stops the background listener, flushing any queued records."""
+
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        logger.removeHandler(_queue_handler)
+        _listener.stop()
+
+    _listener = None
+    _queue_handler = None
@@ -0,0 +1,381 @@
+import bisect
+import threading
+
+from array import array
+from typing import Set
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Iterable
+
+USER = 0
+GROUP = 1
+OTHER = 2
+
+_KINDS = {
+    "#microsoft.graph.user": USER,
+    "#microsoft.graph.group": GROUP,
+}
+
+
+def member_kind(odata_type: str) -> int:
+    """Maps the `@odata.type` of a directory object to its kind.
+
+    ### Parameters
+    ----
+    odata_type : str
+        For example `#microsoft.graph.group`.
+
+    ### Returns
+    ----
+    int:
+        `USER`, `GROUP` or `OTHER`.
+    """
+
+    return _KINDS.get(odata_type, OTHER)
+
+
+class MembershipIndex():
+
+    """
+    ## Overview:
+    ----
+    An in memory index of group memberships. Every directory object is
+    interned as a small integer, the direct members of a group are kept
+    in an `array` of those integers, and the transitive members of a
+    group are computed once and memoised until a membership under that
+    group changes. After that, asking whether a user is in a group is a
+    set lookup.
+
+    Groups loaded with `set_transitive_members` only know their
+    transitive members, so asking for their direct members raises a
+    `ValueError` instead of answering from an empty list.
+
+    ### Usage:
+    ----
+        >>> index = MembershipIndex()
+        >>> index.set_members(group_id="g1", members=[("u1", USER), ("g2", GROUP)])
+        >>> index.set_members(group_id="g2", members=[("u2", USER)])
+        >>> index.contains(group_id="g1", member_id="u2")
+        True
+    """
+
+    def __init__(self) -> None:
+        """Initializes the `MembershipIndex` object."""
+
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._kinds = bytearray()
+
+        # Direct members, and the groups each group is a member of.
+        self._members: Dict[int, array] = {}
+        self._parents: Dict[int, Set[int]] = {}
+
+        self._closure: Dict[int, frozenset] = {}
+
+        # Groups whose closure was read from Graph, not computed.
+        self._read: Set[int] = set()
+
+    def intern(self, object_id: str, kind: int = OTHER) -> int:
+        """Maps a directory object id to its integer.
+
+        ### Parameters
+        ----
+        object_id : str
+            The id of the user, group or other object.
+
+        kind : int (optional, Default=OTHER)
+            The kind of the object, used when it is new or its
+            kind was unknown.
+
+        ### Returns
+        ----
+        int:
+            The integer of the object.
+        """
+
+        with self._lock:
+
+            number = self._ids.get(object_id)
+
+            if number is None:
+                number = self._ids[object_id] = len(self._names)
+                self._names.append(object_id)
+                self._kinds.append(kind)
+            elif kind != OTHER:
+                self._kinds[number] = kind
+
+            return number
+
+    def set_members(self, group_id: str, members: Iterable[Tuple[str, int]]) -> None:
+        """Replaces the direct members of a group.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+
+        members : Iterable[Tuple[str, int]]
+            `(id, kind)` pairs of the direct members.
+        """
+
+        with self._lock:
+
+            group = self.intern(group_id, kind=GROUP)
+            numbers = array("I", sorted({self.intern(member, kind=kind) for member, kind in members}))
+
+            for old in self._members.get(group, ()):
+                self._parents.get(old, set()).discard(group)
+
+            for number in numbers:
+                if self._kinds[number] == GROUP:
+                    self._parents.setdefault(number, set()).add(group)
+
+            self._members[group] = numbers
+            self._read.discard(group)
+            self._invalidate(group)
+
+    def set_transitive_members(self, group_id: str, members: Iterable[Tuple[str, int]]) -> None:
+        """Stores the transitive members of a group as read from Graph,
+        instead of computing them.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+
+        members : Iterable[Tuple[str, int]]
+            `(id, kind)` pairs of the transitive members.
+        """
+
+        with self._lock:
+
+            group = self.intern(group_id, kind=GROUP)
+
+            # The groups above computed their closure without this one.
+            for parent in self._parents.get(group, ()):
+                self._invalidate(parent)
+
+            self._closure[group] = frozenset(self.intern(member, kind=kind) for member, kind in members)
+            self._read.add(group)
+
+    def remove_group(self, group_id: str) -> None:
+        """Forgets the members of a deleted group.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+        """
+
+        # It stays known with no members, so it is not loaded again.
+        self.set_members(group_id=group_id, members=())
+
+    def contains(self, group_id: str, member_id: str, transitive: bool = True) -> bool:
+        """Checks if an object is a member of a group.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+
+        member_id : str
+            The id of the user, group or other object.
+
+        transitive : bool (optional, Default=True)
+            If `False` only direct membership counts.
+
+        ### Returns
+        ----
+        bool:
+            Whether the object is a member.
+
+        ### Raises
+        ----
+        ValueError:
+            If `transitive` is `False` and only the transitive
+            members of the group were loaded.
+        """
+
+        with self._lock:
+
+            group = self._ids.get(group_id)
+            member = self._ids.get(member_id)
+
+            if group is None or member is None:
+                return False
+
+            if not transitive:
+                return _contains_sorted(self._direct(group), member)
+
+            return member in self._transitive(group)
+
+    def members(self, group_id: str, transitive: bool = False, kind: int = None) -> List[str]:
+        """Lists the members of a group.
+
+        ### Parameters
+        ----
+        group_id : str
+            The id of the group.
+
+        transitive : bool (optional, Default=False)
+            If `True` the members of nested groups are included.
+
+        kind : int (optional, Default=None)
+            Only list one kind, for example `USER`.
+
+        ### Returns
+        ----
+        List[str]:
+            The ids of the members.
+
+        ### Raises
+        ----
+        ValueError:
+            If `transitive` is `False` and only the transitive
+            members of the group were loaded.
+        """
+
+        with self._lock:
+
+            group = self._ids.get(group_id)
+
+            if group is None:
+                return []
+
+            numbers = self._transitive(group) if transitive else self._direct(group)
+
+            return [
+                self._names[number] for number in numbers
+                if kind is None or self._kinds[number] == kind
+            ]
+
+    def groups_of(self, member_id: str) -> List[str]:
+        """Lists the groups an object is a transitive member of.
+
+        ### Parameters
+        ----
+        member_id : str
+            The id of the user, group or other object.
+
+        ### Returns
+        ----
+        List[str]:
+            The ids of the groups.
+        """
+
+        with self._lock:
+
+            member = self._ids.get(member_id)
+
+            if member is None:
+                return []
+
+            return [
+                self._names[group] for group in self._loaded()
+                if member in self._transitive(group)
+            ]
+
+    def nested_groups(self) -> List[str]:
+        """Lists the groups that are members of another group but whose
+        own members were never loaded.
+
+        ### Returns
+        ----
+        List[str]:
+            The ids of the groups to load next.
+        """
+
+        with self._lock:
+            return [
+                self._names[number] for number in self._parents
+                if number not in self._members and number not in self._read
+            ]
+
+    @property
+    def known_groups(self) -> List[str]:
+        """The ids of the groups whose members, direct or transitive,
+        are loaded.
+        """
+
+        with self._lock:
+            return [self._names[number] for number in self._loaded()]
+
+    def _loaded(self) -> List[int]:
+        """The groups whose members are loaded, in load order."""
+
+        return list(self._members) + sorted(self._read.difference(self._members))
+
+    def _direct(self, group: int) -> array:
+        """Grabs the direct members of a group."""
+
+        if group in self._read and group not in self._members:
+            raise ValueError(
+                f"Only the transitive members of group {self._names[group]} are loaded."
+            )
+
+        return self._members.get(group, ())
+
+    def _transitive(self, group: int) -> frozenset:
+        """Computes, or reuses, the transitive members of a group."""
+
+        closure = self._closure.get(group)
+
+        if closure is not None:
+            return closure
+
+        seen = set()
+        stack = [group]
+
+        while stack:
+
+            current = stack.pop()
+
+            for member in self._members.get(current, ()):
+
+                if member in seen:
+                    continue
+
+                seen.add(member)
+
+                if self._kinds[member] == GROUP:
+
+                    # Reuse what is already known about the nested group.
+                    known = self._closure.get(member)
+
+                    if known is not None:
+                        seen.update(known)
+                    else:
+                        stack.append(member)
+
+        closure = self._closure[group] = frozenset(seen)
+
+        return closure
+
+    def _invalidate(self, group: int) -> None:
+        """Drops the memoised closures of a group and of every group
+        above it.
+        """
+
+        stack = [group]
+        seen = set()
+
+        while stack:
+
+            current = stack.pop()
+
+            if current in seen:
+                continue
+
+            seen.add(current)
+            self._closure.pop(current, None)
+            stack.extend(self._parents.get(current, ()))
+
+
+def _contains_sorted(numbers: array, number: int) -> bool:
+    """Binary searches a sorted array."""
+
+    position = bisect.bisect_left(numbers, number)
+
+    return position < len(numbers) and numbers[position] == number
@@ -0,0 +1,501 @@
+import abc
+import time
+import bisect
+import threading
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Callable
+
+from ms_graph.utils.endpoints import endpoint_template
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# The upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Status codes Microsoft Graph uses to throttle a client.
+THROTTLE_STATUS_CODES = frozenset([429, 503])
+
+
+class RequestInfo():
+
+    """
+    ## Overview:
+    ----
+    Describes a single request as it goes through the hooks. The
+    pre request hooks see the request fields, the post request hooks
+    also see the response fields.
+    """
+
+    __slots__ = (
+        "method", "endpoint", "template", "url", "headers", "start",
+        "status", "latency", "bytes", "retries", "throttled", "error", "context",
+    )
+
+    def __init__(self, method: str, endpoint: str, url: str, headers: dict) -> None:
+        """Initializes the `RequestInfo` object.
+
+        ### Parameters
+        ----
+        method : str
+            The request method, for example `GET`.
+
+        endpoint : str
+            The endpoint passed to the session.
+
+        url : str
+            The full request URL.
+
+        headers : dict
+            The request headers, hooks may add to them.
+        """
+
+        self.method = method.upper()
+        self.endpoint = endpoint
+        self.template = endpoint_template(endpoint)
+        self.url = url
+        self.headers = headers
+        self.start = time.time()
+        self.status = None
+        self.latency = None
+        self.bytes = 0
+        self.retries = 0
+        self.throttled = 0
+        self.error = None
+
+        # Free form storage, for example the span started by a hook.
+        self.context = {}
+
+
+class _EndpointStats():
+
+    """The counters kept for a single endpoint template and method."""
+
+    __slots__ = ("statuses", "buckets", "latency_sum", "count", "bytes", "retries", "throttled", "errors")
+
+    def __init__(self) -> None:
+        self.statuses: Dict[int, int] = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.bytes = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+
+
+class RequestMetrics():
+
+    """
+    ## Overview:
+    ----
+    Built in metrics, kept per endpoint template and method: request
+    counts by status, a latency histogram, response bytes, retries,
+    throttled responses and transport errors. Retries and throttled
+    responses count every attempt, not just the final one. The bytes
+    are the body bytes read for buffered responses, streamed responses
+    are read after they are recorded, so they count their
+    `Content-Length`, and nothing if the server sent none.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the `RequestMetrics` object."""
+
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _EndpointStats] = {}
+
+    def record(self, info: RequestInfo) -> None:
+        """Records a finished request.
+
+        ### Parameters
+        ----
+        info : RequestInfo
+            The finished request.
+        """
+
+        key = (info.method, info.template)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, info.latency or 0.0)
+
+        with self._lock:
+
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats()
+
+            stats.count += 1
+            stats.buckets[bucket] += 1
+            stats.latency_sum += info.latency or 0.0
+            stats.bytes += info.bytes
+            stats.retries += info.retries
+            stats.throttled += info.throttled
+
+            if info.error is not None:
+                stats.errors += 1
+            else:
+                stats.statuses[info.status] = stats.statuses.get(info.status, 0) + 1
+
+    def snapshot(self) -> List[dict]:
+        """Returns a copy of the metrics.
+
+        ### Returns
+        ----
+        List[dict]:
+            One entry per endpoint template and method.
+        """
+
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "endpoint": template,
+                    "count": stats.count,
+                    "statuses": dict(stats.statuses),
+                    "latency_buckets": list(zip(LATENCY_BUCKETS + (float("inf"),), stats.buckets)),
+                    "latency_sum": stats.latency_sum,
+                    "bytes": stats.bytes,
+                    "retries": stats.retries,
+                    "throttled": stats.throttled,
+                    "errors": stats.errors,
+                }
+                for (method, template), stats in self._stats.items()
+            ]
+
+    def reset(self) -> None:
+        """Clears every metric."""
+
+        with self._lock:
+            self._stats.clear()
+
+
+class Instrumentation():
+
+    """
+    ## Overview:
+    ----
+    The instrumentation surface of a `GraphSession`. Pre request hooks
+    run before a request is sent and can add headers, post request hooks
+    run once the response, or error, is in. Every request is also
+    recorded in the built in `metrics`.
+
+    ### Usage:
+    ----
+        >>> instrumentation = graph_session.enable_instrumentation()
+        >>> instrumentation.add_post_request_hook(
+            lambda info: print(info.template, info.status, info.latency)
+        )
+        >>> print(PrometheusExporter(instrumentation.metrics).render())
+    """
+
+    def __init__(self, record_metrics: bool = True) -> None:
+        """Initializes the `Instrumentation` object.
+
+        ### Parameters
+        ----
+        record_metrics : bool (optional, Default=True)
+            If `False` only the hooks run.
+        """
+
+        self.metrics = RequestMetrics()
+        self.record_metrics = record_metrics
+
+        self._pre_request_hooks: List[Callable] = []
+        self._post_request_hooks: List[Callable] = []
+
+    def add_pre_request_hook(self, hook: Callable[[RequestInfo], Any]) -> None:
+        """Registers a function called before every request.
+
+        ### Parameters
+        ----
+        hook : Callable[[RequestInfo], Any]
+            Called with the `RequestInfo` of the request.
+        """
+
+        self._pre_request_hooks.append(hook)
+
+    def add_post_request_hook(self, hook: Callable[[RequestInfo], Any]) -> None:
+        """Registers a function called after every request.
+
+        ### Parameters
+        ----
+        hook : Callable[[RequestInfo], Any]
+            Called with the finished `RequestInfo` of the request.
+        """
+
+        self._post_request_hooks.append(hook)
+
+    def before_request(self, method: str, endpoint: str, url: str, headers: dict) -> RequestInfo:
+        """Builds the `RequestInfo` and runs the pre request hooks.
+
+        ### Returns
+        ----
+        RequestInfo:
+            The info handed to `after_request`.
+        """
+
+        info = RequestInfo(method=method, endpoint=endpoint, url=url, headers=headers)
+
+        for hook in self._pre_request_hooks:
+            hook(info)
+
+        return info
+
+    def after_request(
+        self,
+        info: RequestInfo,
+        response: object = None,
+        latency: float = None,
+        error: Exception = None,
+        retries: int = 0,
+        throttled: int = None,
+        body_bytes: int = None,
+    ) -> None:
+        """Completes the `RequestInfo`, records it and runs the post
+        request hooks.
+
+        ### Parameters
+        ----
+        info : RequestInfo
+            The info returned by `before_request`.
+
+        response : requests.Response (optional, Default=None)
+            The response, if one was received.
+
+        latency : float (optional, Default=None)
+            The number of seconds the request took.
+
+        error : Exception (optional, Default=None)
+            The transport error, if the request failed.
+
+        retries : int (optional, Default=0)
+            The number of times the request was retried.
+
+        throttled : int (optional, Default=None)
+            The number of throttled responses across the attempts,
+            by default whether the final response was throttled.
+
+        body_bytes : int (optional, Default=None)
+            The number of body bytes read, by default the
+            `Content-Length` of the response.
+        """
+
+        info.latency = latency
+        info.error = error
+        info.retries = retries
+
+        if response is not None:
+            info.status = response.status_code
+
+            if body_bytes is None:
+                body_bytes = int(response.headers.get("Content-Length", 0) or 0)
+
+            info.bytes = body_bytes
+
+        if throttled is None:
+            throttled = int(info.status in THROTTLE_STATUS_CODES)
+
+        info.throttled = throttled
+
+        if self.record_metrics:
+            self.metrics.record(info=info)
+
+        for hook in self._post_request_hooks:
+            hook(info)
+
+
+class MetricsExporter(abc.ABC):
+
+    """
+    ## Overview:
+    ----
+    The interface of a metrics exporter, `export` is called with a
+    `RequestMetrics` snapshot.
+    """
+
+    def __init__(self, metrics: RequestMetrics) -> None:
+        """Initializes the `MetricsExporter` object.
+
+        ### Parameters
+        ----
+        metrics : RequestMetrics
+            The metrics to export.
+        """
+
+        self.metrics = metrics
+
+    @abc.abstractmethod
+    def export(self) -> Any:
+        """Exports the current metrics."""
+
+
+class PrometheusExporter(MetricsExporter):
+
+    """
+    ## Overview:
+    ----
+    Renders the metrics in the Prometheus text exposition format, so
+    they can be served from a `/metrics` endpoint.
+    """
+
+    prefix = "ms_graph"
+
+    def export(self) -> str:
+        return self.render()
+
+    def render(self) -> str:
+        """Renders the metrics.
+
+        ### Returns
+        ----
+        str:
+            The metrics in the Prometheus text format.
+        """
+
+        snapshot = self.metrics.snapshot()
+        prefix = self.prefix
+
+        lines = [
+            f"# HELP {prefix}_requests_total Microsoft Graph requests by status.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+
+        for entry in snapshot:
+            for status, count in entry["statuses"].items():
+                labels = _labels(entry, status=status)
+                lines.append(f"{prefix}_requests_total{{{labels}}} {count}")
+
+        lines += [
+            f"# HELP {prefix}_request_duration_seconds Microsoft Graph request latency.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+
+        for entry in snapshot:
+
+            cumulative = 0
+
+            for bound, count in entry["latency_buckets"]:
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _labels(entry, le=le)
+                lines.append(f"{prefix}_request_duration_seconds_bucket{{{labels}}} {cumulative}")
+
+            labels = _labels(entry)
+            lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {entry['latency_sum']}")
+            lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {entry['count']}")
+
+        for name, key, help_text in (
+            ("response_bytes_total", "bytes", "Response bytes received."),
+            ("retries_total", "retries", "Requests retried."),
+            ("throttled_total", "throttled", "Throttled responses, retried ones included."),
+            ("errors_total", "errors", "Requests that failed without a response."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for entry in snapshot:
+                lines.append(f"{prefix}_{name}{{{_labels(entry)}}} {entry[key]}")
+
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHooks():
+
+    """
+    ## Overview:
+    ----
+    Traces every request as an OpenTelemetry client span, using the
+    HTTP semantic conventions. Requires the `opentelemetry-api` package.
+
+    ### Usage:
+    ----
+        >>> OpenTelemetryHooks().install(graph_session.enable_instrumentation())
+    """
+
+    def __init__(self, tracer: object = None) -> None:
+        """Initializes the `OpenTelemetryHooks` object.
+
+        ### Parameters
+        ----
+        tracer : opentelemetry.trace.Tracer (optional, Default=None)
+            The tracer used to start spans, by default the
+            tracer of the global tracer provider.
+
+        ### Raises
+        ----
+        ValueError:
+            If `opentelemetry-api` is not installed.
+        """
+
+        if otel_trace is None:
+            raise ValueError("OpenTelemetry tracing requires the `opentelemetry-api` package.")
+
+        self.tracer = tracer or otel_trace.get_tracer("ms_graph")
+
+    def install(self, instrumentation: Instrumentation) -> None:
+        """Registers the tracing hooks.
+
+        ### Parameters
+        ----
+        instrumentation : Instrumentation
+            The instrumentation of a `GraphSession`.
+        """
+
+        instrumentation.add_pre_request_hook(self.start_span)
+        instrumentation.add_post_request_hook(self.end_span)
+
+    def start_span(self, info: RequestInfo) -> None:
+        """Starts the client span of a request."""
+
+        info.context["span"] = self.tracer.start_span(
+            name=f"{info.method} {info.template}",
+            kind=otel_trace.SpanKind.CLIENT,
+            attributes={
+                "http.request.method": info.method,
+                "url.full": info.url,
+                "url.template": info.template,
+                "server.address": "graph.microsoft.com",
+            },
+        )
+
+    def end_span(self, info: RequestInfo) -> None:
+        """Ends the client span of a request."""
+
+        span = info.context.pop("span", None)
+
+        if span is None:
+            return
+
+        if info.status is not None:
+            span.set_attribute("http.response.status_code", info.status)
+            span.set_attribute("http.response.body.size", info.bytes)
+
+        if info.retries:
+            span.set_attribute("http.request.resend_count", info.retries)
+
+        if info.error is not None:
+            span.record_exception(info.error)
+
+        if info.error is not None or (info.status or 0) >= 400:
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+
+        span.end()
+
+
+def _labels(entry: dict, **extra: Any) -> str:
+    """Renders the Prometheus labels of a metrics entry."""
+
+    labels = {"method": entry["method"], "endpoint": entry["endpoint"], **extra}
+
+    return ",".join(
+        f'{key}="{_escape(str(value))}"' for key, value in labels.items()
+    )
+
+
+def _escape(value: str) -> str:
+    """Escapes a Prometheus label value."""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,192 @@
+import threading
+
+from typing import Any
+from typing import Iterator
+
+from ms_graph.utils.deadline import Timeout
+from ms_graph.utils.streaming import StreamingCollectionDecoder
+
+
+class ItemIterator():
+
+    """
+    ## Overview:
+    ----
+    Iterates over every item of a Microsoft Graph collection, following
+    `@odata.nextLink` from page to page. In streaming mode each page is
+    decoded item by item as it arrives, so memory is bounded by the size
+    of an item instead of the size of a page.
+
+    Once the iteration is done, `delta_link` holds the `@odata.deltaLink`
+    of the last page, if the collection is a delta query. Any thread can
+    `cancel` the iteration, which then ends at the next item without
+    requesting another page.
+
+    ### Usage:
+    ----
+        >>> messages = graph_session.iter_items(
+            endpoint="me/messages",
+            params={"$top": 999},
+            stream=True
+        )
+        >>> for message in messages:
+        ...     print(message["id"])
+    """
+
+    def __init__(
+        self,
+        session: object,
+        endpoint: str,
+        params: dict = None,
+        additional_headers: dict = None,
+        stream: bool = False,
+        chunk_size: int = 65536,
+        model: type = None,
+        max_pages: int = None,
+        timeout: Timeout = None,
+    ) -> None:
+        """Initializes the `ItemIterator` object.
+
+        ### Parameters
+        ----
+        session : object
+            An authenticated session for our Microsoft Graph Client.
+
+        endpoint : str
+            The collection endpoint, or a full `@odata.nextLink`
+            or `@odata.deltaLink` URL.
+
+        params : dict (optional, Default=None)
+            The URL params for the first request.
+
+        additional_headers : dict (optional, Default=None)
+            Any additional headers sent with every request.
+
+        stream : bool (optional, Default=False)
+            If `True` each page is decoded incrementally.
+
+        chunk_size : int (optional, Default=65536)
+            The number of bytes read at a time in streaming mode.
+
+        model : type (optional, Default=None)
+            A `GraphModel` class used to wrap each item. In
+            streaming mode the item bytes are handed to the
+            model without being decoded.
+
+        max_pages : int (optional, Default=None)
+            Stop after this many pages.
+
+        timeout : Timeout (optional, Default=None)
+            The connect and read timeouts of each page request,
+            defaults to the `timeout` of the session.
+        """
+
+        from ms_graph.session import GraphSession
+
+        self.graph_session: GraphSession = session
+        self.endpoint = endpoint
+        self.params = params
+        self.additional_headers = additional_headers
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.model = model
+        self.max_pages = max_pages
+        self.timeout = timeout
+
+        self.pages = 0
+        self.next_link = None
+        self.delta_link = None
+
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the iteration was cancelled."""
+
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stops the iteration at the next item, from any thread. A
+        streamed page is closed without reading the rest of it.
+        """
+
+        self._cancelled.set()
+
+    def __iter__(self) -> Iterator[Any]:
+
+        endpoint = self.endpoint
+        params = self.params
+
+        while endpoint and not self._cancelled.is_set():
+
+            if self.stream:
+                metadata = yield from self._stream_page(endpoint=endpoint, params=params)
+            else:
+                metadata = yield from self._page(endpoint=endpoint, params=params)
+
+            if self._cancelled.is_set():
+                return
+
+            self.pages += 1
+            self.next_link = metadata.get("@odata.nextLink")
+            self.delta_link = metadata.get("@odata.deltaLink", self.delta_link)
+
+            if self.max_pages and self.pages >= self.max_pages:
+                return
+
+            # The next link already carries the query string.
+            endpoint = self.next_link
+            params = None
+
+    def _page(self, endpoint: str, params: dict) -> Iterator[Any]:
+        """Yields the items of a page decoded in one go, and returns
+        the page properties."""
+
+        content = self.graph_session.make_request(
+            method="get",
+            endpoint=endpoint,
+            params=params,
+            additional_headers=self.additional_headers,
+            timeout=self.timeout,
+        )
+
+        for item in content.get("value", []):
+
+            if self._cancelled.is_set():
+                break
+
+            yield self.model(resource=item) if self.model else item
+
+        return content
+
+    def _stream_page(self, endpoint: str, params: dict) -> Iterator[Any]:
+        """Yields the items of a page as they are decoded, and returns
+        the page properties."""
+
+        response = self.graph_session.stream_request(
+            method="get",
+            endpoint=endpoint,
+            params=params,
+            additional_headers=self.additional_headers,
+            timeout=self.timeout,
+        )
+
+        try:
+
+            decoder = StreamingCollectionDecoder(
+                chunks=response.iter_content(chunk_size=self.chunk_size),
+                loads=self.graph_session.codec.loads,
+                raw=self.model is not None,
+            )
+
+            for item in decoder:
+
+                if self._cancelled.is_set():
+                    break
+
+                yield self.model.from_json(item) if self.model else item
+
+        finally:
+            response.close()
+
+        return decoder.metadata
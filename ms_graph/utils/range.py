@@ -1,71 +1,186 @@
 from enum import Enum
+from typing import Any
+from typing import Callable
 from typing import Union
+from dataclasses import field
 from dataclasses import fields
 from dataclasses import dataclass
 from dataclasses import is_dataclass
 
+# Types that are sent to the API as is and never need converting.
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
 
-def _to_dict(data_class_obj: Union[dataclass, dict]) -> dict:
-    """Converts a `dataclass` object to a normal python `dict`.
 
-    ### Parameter
+def _camel_case(name: str) -> str:
+    """Converts a `snake_case` field name to the `camelCase`
+    name used by the Microsoft Graph API.
+
+    ### Parameters
     ----
-    data_class_obj : Union[dataclass, dict]
-        The python `dataclass` object or a normal
-        python `dict` that may contain `dataclass`
-        objects.
+    name : str
+        The python field name.
 
     ### Returns
     ----
-    dict :
-        A python dict that can be sent to the Microsoft
-        Graph API.
+    str :
+        The Microsoft Graph API property name.
+    """
+
+    head, *tail = name.split("_")
+
+    return head + "".join(part.capitalize() for part in tail)
+
+
+def _to_value(value: Any) -> Any:
+    """Converts a single value to something that can be sent
+    to the Microsoft Graph API.
+
+    ### Parameters
+    ----
+    value : Any
+        A scalar, `Enum`, `dataclass`, `list` or `dict`.
+
+    ### Returns
+    ----
+    Any :
+        The converted value.
     """
 
-    class_dict = {}
+    value_type = type(value)
+
+    if value_type in _SCALAR_TYPES:
+        return value
 
-    if is_dataclass(data_class_obj):
+    if isinstance(value, Enum):
+        return value.value
 
-        # Loop through each field and grab the value and key.
-        for field in fields(data_class_obj):
+    serializer = getattr(value_type, "_serialize", None)
+    if serializer is not None:
+        return serializer(value)
 
-            key = field.name
-            value = getattr(data_class_obj, field.name)
+    if isinstance(value, dict):
+        return {
+            key: _to_value(item) for key, item in value.items() if item is not None
+        }
 
-            # Handle values that could be Enums.
-            if isinstance(value, Enum):
-                value = value.value
+    if isinstance(value, (list, tuple)):
+        return [
+            item if type(item) in _SCALAR_TYPES else _to_value(item)
+            for item in value
+        ]
 
-            if isinstance(value, dict):
-                value = _to_dict(data_class_obj=value)
+    return value
 
-            if isinstance(value, list):
-                value = [_to_dict(data_class_obj=item) for item in value]
 
-            if value is not None:
-                class_dict[key] = value
+def _compile_serializer(data_class: type) -> Callable:
+    """Builds the serializer for a `dataclass` once, so converting an
+    instance does not need to inspect its fields again.
 
-    elif isinstance(data_class_obj, dict):
+    ### Parameters
+    ----
+    data_class : type
+        The python `dataclass` to build the serializer for.
 
-        for key, value in data_class_obj.items():
+    ### Returns
+    ----
+    Callable :
+        A function that takes an instance and returns a `dict`
+        keyed by the Microsoft Graph API property names.
+    """
 
-            # Handle values that could be Enums.
-            if isinstance(value, Enum):
-                value = value.value
+    plan = tuple(
+        (data_field.name, data_field.metadata.get("graph_name", _camel_case(data_field.name)))
+        for data_field in fields(data_class)
+    )
 
-            if isinstance(value, dict):
-                value = _to_dict(data_class_obj=value)
+    def serialize(data_class_obj) -> dict:
 
-            if isinstance(value, list):
-                value = [_to_dict(data_class_obj=item) for item in value]
+        class_dict = {}
 
-            if value is not None:
-                class_dict[key] = value
+        for name, key in plan:
 
-    return class_dict
+            value = getattr(data_class_obj, name)
 
+            if value is None:
+                continue
+
+            if type(value) not in _SCALAR_TYPES:
+                value = _to_value(value)
+
+            class_dict[key] = value
+
+        return class_dict
+
+    return serialize
+
+
+def _serializable(data_class: type) -> type:
+    """Turns a class into a `dataclass` with `__slots__` and a
+    precompiled `_serialize` method.
+
+    ### Parameters
+    ----
+    data_class : type
+        The class to decorate.
 
-@dataclass
+    ### Returns
+    ----
+    type :
+        The new slotted `dataclass`.
+    """
+
+    data_class = dataclass(data_class)
+    field_names = tuple(data_field.name for data_field in fields(data_class))
+
+    # Rebuild the class so the fields live in slots instead of a `__dict__`.
+    namespace = dict(data_class.__dict__)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+
+    for name in field_names:
+        namespace.pop(name, None)
+
+    namespace["__slots__"] = field_names
+
+    slotted_class = type(data_class)(
+        data_class.__name__, data_class.__bases__, namespace
+    )
+    slotted_class.__qualname__ = data_class.__qualname__
+    slotted_class._serialize = _compile_serializer(data_class=slotted_class)
+
+    return slotted_class
+
+
+def _to_dict(data_class_obj: Union[dataclass, dict]) -> dict:
+    """Converts a `dataclass` object to a normal python `dict`.
+
+    ### Parameter
+    ----
+    data_class_obj : Union[dataclass, dict]
+        The python `dataclass` object or a normal
+        python `dict` that may contain `dataclass`
+        objects.
+
+    ### Returns
+    ----
+    dict :
+        A python dict that can be sent to the Microsoft
+        Graph API.
+    """
+
+    if is_dataclass(data_class_obj) and not hasattr(data_class_obj, "_serialize"):
+        data_class_obj = {
+            _camel_case(data_field.name): getattr(data_class_obj, data_field.name)
+            for data_field in fields(data_class_obj)
+        }
+
+    if isinstance(data_class_obj, dict) or hasattr(data_class_obj, "_serialize"):
+        return _to_value(data_class_obj)
+
+    return {}
+
+
+@_serializable
 class RangeProperties:
 
     """
@@ -106,13 +221,13 @@ class RangeProperties:
         error string.
     """
 
-    column_hidden: bool
-    row_hidden: bool
-    formulas: list
-    formulas_local: list
-    formulas_r1c1: list
-    number_format: str
-    values: list
+    column_hidden: bool = None
+    row_hidden: bool = None
+    formulas: list = None
+    formulas_local: list = None
+    formulas_r1c1: list = field(default=None, metadata={"graph_name": "formulasR1C1"})
+    number_format: str = None
+    values: list = None
 
     def to_dict(self) -> dict:
         """Generates a dictionary containing all the field
@@ -126,10 +241,10 @@ class RangeProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
 
 
-@dataclass
+@_serializable
 class RangeFormatProperties:
 
     """
@@ -184,9 +299,10 @@ class RangeFormatProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
+
 
-@dataclass
+@_serializable
 class RangeFillProperties:
 
     """
@@ -203,7 +319,7 @@ class RangeFillProperties:
         named HTML color (e.g. "orange").
     """
 
-    column_width: str = None
+    color: str = None
 
     def to_dict(self) -> dict:
         """Generates a dictionary containing all the field
@@ -217,9 +333,10 @@ class RangeFillProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
+
 
-@dataclass
+@_serializable
 class RangeFontProperties:
 
     """
@@ -274,9 +391,10 @@ class RangeFontProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
 
-@dataclass
+
+@_serializable
 class RangeBorderProperties:
 
     """
@@ -320,9 +438,10 @@ class RangeBorderProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
+
 
-@dataclass
+@_serializable
 class RangeFormatProtectionProperties:
 
     """
@@ -360,4 +479,4 @@ class RangeFormatProtectionProperties:
             values.
         """
 
-        return _to_dict(data_class_obj=self)
+        return self._serialize()
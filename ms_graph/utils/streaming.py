@@ -0,0 +1,238 @@
+import re
+import json
+
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Union
+
+# The characters that change the nesting depth, or start a string.
+_STRUCTURE = re.compile(rb'["{}\[\]]')
+
+# The characters that end, or escape inside, a string.
+_STRING = re.compile(rb'["\\]')
+
+# The characters that end a scalar like `true` or `12.5`.
+_SCALAR_END = re.compile(rb'[\s,}\]]')
+
+_WHITESPACE = b" \t\r\n"
+
+
+class StreamingCollectionDecoder():
+
+    """
+    ## Overview:
+    ----
+    Incrementally decodes a Microsoft Graph collection response. The
+    body is read chunk by chunk and each element of the top level
+    `value` array is yielded as soon as it is complete, so memory is
+    bounded by the size of a single item instead of the whole page.
+    Every other top level property, like `@odata.nextLink`, is decoded
+    into `metadata`.
+
+    ### Usage:
+    ----
+        >>> decoder = StreamingCollectionDecoder(
+            chunks=response.iter_content(chunk_size=65536)
+        )
+        >>> for item in decoder:
+        ...     print(item["id"])
+        >>> decoder.metadata.get("@odata.nextLink")
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        loads: Callable = json.loads,
+        raw: bool = False,
+        array_key: str = "value",
+    ) -> None:
+        """Initializes the `StreamingCollectionDecoder` object.
+
+        ### Parameters
+        ----
+        chunks : Iterable[bytes]
+            The response body, as an iterable of byte chunks.
+
+        loads : Callable (optional, Default=json.loads)
+            The function used to decode each item and each
+            top level property.
+
+        raw : bool (optional, Default=False)
+            If `True` the raw JSON bytes of each item are
+            yielded instead of the decoded item.
+
+        array_key : str (optional, Default="value")
+            The top level property holding the collection.
+        """
+
+        self.loads = loads
+        self.raw = raw
+        self.array_key = array_key
+        self.metadata = {}
+
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._pos = 0
+
+    def __iter__(self) -> Iterator[Union[bytes, Any]]:
+
+        self._expect(b"{")
+
+        while True:
+
+            char = self._peek()
+
+            if char == b"}":
+                self._pos += 1
+                return
+
+            if char == b",":
+                self._pos += 1
+                continue
+
+            key = self.loads(self._read_value())
+            self._expect(b":")
+
+            if key == self.array_key and self._peek() == b"[":
+                self._pos += 1
+                yield from self._read_array()
+            else:
+                self.metadata[key] = self.loads(self._read_value())
+
+    def _read_array(self) -> Iterator[Union[bytes, Any]]:
+        """Yields each element of the array the reader is positioned in."""
+
+        while True:
+
+            char = self._peek()
+
+            if char == b"]":
+                self._pos += 1
+                return
+
+            if char == b",":
+                self._pos += 1
+                continue
+
+            item = self._read_value()
+
+            # Drop everything that has been consumed so far.
+            del self._buffer[:self._pos]
+            self._pos = 0
+
+            yield item if self.raw else self.loads(item)
+
+    def _read_value(self) -> bytes:
+        """Reads a complete JSON value and returns its bytes."""
+
+        self._peek()
+        start = self._pos
+        char = self._buffer[start:start + 1]
+
+        if char == b'"':
+            end = self._scan_string(start + 1)
+        elif char in (b"{", b"["):
+            end = self._scan_nested(start + 1)
+        else:
+            end = self._scan_scalar(start)
+
+        self._pos = end
+
+        return bytes(self._buffer[start:end])
+
+    def _scan_string(self, index: int) -> int:
+        """Returns the index just past the end of a string."""
+
+        while True:
+
+            match = _STRING.search(self._buffer, index)
+
+            if match is None:
+                index = len(self._buffer)
+                self._fill()
+                continue
+
+            index = match.start()
+
+            if match.group() == b"\\":
+                # Make sure the escaped character is in the buffer.
+                while index + 1 >= len(self._buffer):
+                    self._fill()
+                index += 2
+                continue
+
+            return index + 1
+
+    def _scan_nested(self, index: int) -> int:
+        """Returns the index just past the end of an object or array."""
+
+        depth = 1
+
+        while True:
+
+            match = _STRUCTURE.search(self._buffer, index)
+
+            if match is None:
+                index = len(self._buffer)
+                self._fill()
+                continue
+
+            char = match.group()
+
+            if char == b'"':
+                index = self._scan_string(match.end())
+                continue
+
+            depth += 1 if char in (b"{", b"[") else -1
+            index = match.end()
+
+            if depth == 0:
+                return index
+
+    def _scan_scalar(self, index: int) -> int:
+        """Returns the index just past the end of a number or literal."""
+
+        while True:
+
+            match = _SCALAR_END.search(self._buffer, index)
+
+            if match is not None:
+                return match.start()
+
+            index = len(self._buffer)
+            self._fill()
+
+    def _peek(self) -> bytes:
+        """Skips whitespace and returns the next character."""
+
+        while True:
+
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos:self._pos + 1]
+
+            self._fill()
+
+    def _expect(self, char: bytes) -> None:
+        """Consumes the next character, which must be `char`."""
+
+        if self._peek() != char:
+            raise ValueError(
+                f"Expected {char!r} at offset {self._pos} of the response body."
+            )
+
+        self._pos += 1
+
+    def _fill(self) -> None:
+        """Appends the next chunk of the body to the buffer."""
+
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += chunk
+                return
+
+        raise ValueError("The response body ended before the JSON was complete.")
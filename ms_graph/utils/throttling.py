@@ -0,0 +1,456 @@
+import time
+import threading
+import email.utils
+
+from typing import List
+from typing import Tuple
+from collections import OrderedDict
+
+from ms_graph.utils.endpoints import endpoint_template
+
+# Resources that count against the per mailbox limits of Outlook.
+MAILBOX_RESOURCES = frozenset([
+    "messages", "mailFolders", "sendMail", "inferenceClassification",
+    "contacts", "contactFolders", "events", "calendar", "calendars",
+    "mailboxSettings", "outlook",
+])
+
+# Status codes that are retried after waiting.
+RETRY_STATUS_CODES = frozenset([429, 503, 504])
+
+# Methods that can be repeated without changing the outcome.
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+
+def resource_scope(endpoint: str) -> str:
+    """Derives the throttling scope of a request from its endpoint.
+
+    ### Parameters
+    ----
+    endpoint : str
+        The endpoint or full URL of a request.
+
+    ### Returns
+    ----
+    str:
+        `mailbox:<user>` for mailbox resources, like
+        `/users/{id}/messages`, otherwise `None`.
+
+    ### Usage:
+    ----
+        >>> resource_scope("/users/8bc6/messages/AQMk/move")
+        'mailbox:8bc6'
+    """
+
+    template = endpoint_template(endpoint).split("/")
+
+    path = endpoint.split("?", 1)[0].replace("https://graph.microsoft.com/", "")
+    segments = [segment for segment in path.split("/") if segment]
+
+    # Drop the API version of full URLs.
+    if segments and segments[0] in ("v1.0", "beta"):
+        segments = segments[1:]
+
+    if template[:1] == ["me"] and template[1:2] and template[1] in MAILBOX_RESOURCES:
+        return "mailbox:me"
+
+    if template[:2] == ["users", "{id}"] and template[2:3] and template[2] in MAILBOX_RESOURCES:
+        return "mailbox:" + segments[1].lower()
+
+    return None
+
+
+def retry_after_seconds(value: str) -> float:
+    """Parses a `Retry-After` header.
+
+    ### Parameters
+    ----
+    value : str
+        Either a number of seconds or an HTTP date.
+
+    ### Returns
+    ----
+    float:
+        The number of seconds to wait, or `None` if the
+        header is missing or invalid.
+    """
+
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+    return max(retry_at - time.time(), 0.0)
+
+
+class AdaptiveLimit():
+
+    """
+    ## Overview:
+    ----
+    A token bucket with a concurrency cap for a single scope. The rate
+    follows AIMD: it grows by `increase` after every successful request
+    and is multiplied by `decrease` after every throttled one, and a
+    `Retry-After` pauses the scope entirely.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_concurrency: int = None,
+        min_rate: float = 0.5,
+        max_rate: float = None,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+    ) -> None:
+        """Initializes the `AdaptiveLimit` object.
+
+        ### Parameters
+        ----
+        rate : float
+            The starting number of requests per second.
+
+        max_concurrency : int (optional, Default=None)
+            The maximum number of requests in flight, `None`
+            for no cap.
+
+        min_rate : float (optional, Default=0.5)
+            The rate never drops below this.
+
+        max_rate : float (optional, Default=None)
+            The rate never grows above this, defaults to the
+            starting rate.
+
+        increase : float (optional, Default=0.5)
+            Added to the rate after every successful request.
+
+        decrease : float (optional, Default=0.5)
+            The rate is multiplied by this after a throttled
+            request.
+        """
+
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self.decrease = decrease
+
+        self.in_flight = 0
+        self.throttled = 0
+
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Waits for a concurrency slot and a token.
+
+        ### Parameters
+        ----
+        timeout : float (optional, Default=None)
+            The maximum number of seconds to wait.
+
+        ### Returns
+        ----
+        bool:
+            `True` if acquired, `False` if the timeout expired.
+        """
+
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+
+            while True:
+
+                now = time.monotonic()
+                self._refill(now=now)
+
+                free = self.max_concurrency is None or self.in_flight < self.max_concurrency
+
+                if free and now >= self._paused_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.in_flight += 1
+                    return True
+
+                if now >= self._paused_until:
+                    wait = None if not free else (1.0 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+
+                if give_up_at is not None:
+                    if now >= give_up_at:
+                        return False
+                    wait = min(wait, give_up_at - now) if wait is not None else give_up_at - now
+
+                self._condition.wait(timeout=wait)
+
+    def release(self, throttled: bool = False, retry_after: float = None, adapt: bool = True) -> None:
+        """Gives back the concurrency slot and adapts the rate.
+
+        ### Parameters
+        ----
+        throttled : bool (optional, Default=False)
+            Whether the request was throttled.
+
+        retry_after : float (optional, Default=None)
+            The `Retry-After` of a throttled request.
+
+        adapt : bool (optional, Default=True)
+            If `False` the slot is given back without changing
+            the rate, for requests that were never sent.
+        """
+
+        with self._condition:
+
+            self.in_flight -= 1
+
+            if adapt:
+                self._adapt(throttled=throttled, retry_after=retry_after)
+
+            self._condition.notify_all()
+
+    def observe(self, throttled: bool = False, retry_after: float = None) -> None:
+        """Adapts the rate to a response while keeping the concurrency
+        slot, for responses whose body is still being read.
+
+        ### Parameters
+        ----
+        throttled : bool (optional, Default=False)
+            Whether the request was throttled.
+
+        retry_after : float (optional, Default=None)
+            The `Retry-After` of a throttled request.
+        """
+
+        with self._condition:
+            self._adapt(throttled=throttled, retry_after=retry_after)
+            self._condition.notify_all()
+
+    @property
+    def idle(self) -> bool:
+        """Whether nothing is in flight and the scope is not paused."""
+
+        return self.in_flight == 0 and time.monotonic() >= self._paused_until
+
+    def _adapt(self, throttled: bool, retry_after: float) -> None:
+        """Grows or shrinks the rate, the lock must be held."""
+
+        if throttled:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def _refill(self, now: float) -> None:
+        """Adds the tokens earned since the last refill."""
+
+        capacity = max(self.rate, 1.0)
+        self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter():
+
+    """
+    ## Overview:
+    ----
+    A client side limiter that keeps a `GraphSession` under the Graph
+    throttling limits. Every request goes through the tenant wide limit,
+    and mailbox requests, like `/users/{id}/messages`, also go through a
+    limit for that mailbox, which by default allows the 4 concurrent
+    requests Outlook permits. Each limit adapts its rate from the 429s
+    and `Retry-After` values it observes. A throttled request only slows
+    down its narrowest scope, so one busy mailbox does not slow down the
+    rest of the tenant.
+
+    ### Usage:
+    ----
+        >>> graph_session.enable_rate_limiter(RateLimiter(mailbox_concurrency=4))
+    """
+
+    def __init__(
+        self,
+        tenant_rate: float = 200.0,
+        tenant_concurrency: int = None,
+        mailbox_rate: float = 16.0,
+        mailbox_concurrency: int = 4,
+        max_scopes: int = 10000,
+    ) -> None:
+        """Initializes the `RateLimiter` object.
+
+        ### Parameters
+        ----
+        tenant_rate : float (optional, Default=200.0)
+            The requests per second allowed across the tenant.
+
+        tenant_concurrency : int (optional, Default=None)
+            The requests in flight allowed across the tenant.
+
+        mailbox_rate : float (optional, Default=16.0)
+            The requests per second allowed per mailbox, Outlook
+            allows 10,000 requests per 10 minutes.
+
+        mailbox_concurrency : int (optional, Default=4)
+            The requests in flight allowed per mailbox.
+
+        max_scopes : int (optional, Default=10000)
+            The number of mailbox limits kept, idle ones are
+            dropped first.
+        """
+
+        self.mailbox_rate = mailbox_rate
+        self.mailbox_concurrency = mailbox_concurrency
+        self.max_scopes = max_scopes
+
+        self.tenant = AdaptiveLimit(rate=tenant_rate, max_concurrency=tenant_concurrency)
+
+        self._lock = threading.Lock()
+        self._scopes: "OrderedDict[str, AdaptiveLimit]" = OrderedDict()
+
+    def limit_for(self, scope: str) -> AdaptiveLimit:
+        """Grabs, or creates, the limit of a scope.
+
+        ### Parameters
+        ----
+        scope : str
+            The scope, for example `mailbox:8bc6`.
+
+        ### Returns
+        ----
+        AdaptiveLimit:
+            The limit of the scope.
+        """
+
+        with self._lock:
+
+            limit = self._scopes.get(scope)
+
+            if limit is not None:
+                self._scopes.move_to_end(scope)
+                return limit
+
+            limit = self._scopes[scope] = AdaptiveLimit(
+                rate=self.mailbox_rate, max_concurrency=self.mailbox_concurrency
+            )
+
+            # Forget the oldest idle scopes.
+            if len(self._scopes) > self.max_scopes:
+                for key in [key for key, value in self._scopes.items() if value.idle]:
+                    if len(self._scopes) <= self.max_scopes:
+                        break
+                    del self._scopes[key]
+
+            return limit
+
+    def acquire(self, endpoint: str, timeout: float = None) -> Tuple[AdaptiveLimit, ...]:
+        """Waits until a request to the endpoint is allowed.
+
+        ### Parameters
+        ----
+        endpoint : str
+            The endpoint of the request.
+
+        timeout : float (optional, Default=None)
+            The maximum number of seconds to wait.
+
+        ### Raises
+        ----
+        TimeoutError:
+            If the request was not allowed in time.
+
+        ### Returns
+        ----
+        Tuple[AdaptiveLimit, ...]:
+            The limits held, hand them back to `release`.
+        """
+
+        scope = resource_scope(endpoint=endpoint)
+        limits: List[AdaptiveLimit] = []
+
+        # The narrow scope goes first, so a busy mailbox does not hold a tenant slot.
+        if scope is not None:
+            limits.append(self.limit_for(scope=scope))
+
+        limits.append(self.tenant)
+
+        held = []
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+
+        for limit in limits:
+
+            remaining = None if give_up_at is None else max(give_up_at - time.monotonic(), 0.0)
+
+            if not limit.acquire(timeout=remaining):
+                for acquired in held:
+                    acquired.release(adapt=False)
+                raise TimeoutError(f"Timed out waiting for the rate limit of {endpoint}.")
+
+            held.append(limit)
+
+        return tuple(held)
+
+    def observe(self, limits: Tuple[AdaptiveLimit, ...], status: int, retry_after: float = None) -> None:
+        """Adapts the limits to a response, keeping them held.
+
+        ### Overview:
+        ----
+        A throttled response only slows down and pauses the first,
+        narrowest, limit, the mailbox for mailbox requests. The wider
+        limits only learn from successful responses.
+
+        ### Parameters
+        ----
+        limits : Tuple[AdaptiveLimit, ...]
+            The limits returned by `acquire`.
+
+        status : int
+            The response status code.
+
+        retry_after : float (optional, Default=None)
+            The parsed `Retry-After` header.
+        """
+
+        throttled = status == 429 or status == 503
+
+        for position, limit in enumerate(limits):
+            if not throttled:
+                limit.observe()
+            elif position == 0:
+                limit.observe(throttled=True, retry_after=retry_after)
+
+    def release(self, limits: Tuple[AdaptiveLimit, ...], status: int = None, retry_after: float = None) -> None:
+        """Hands the limits back after a request.
+
+        ### Parameters
+        ----
+        limits : Tuple[AdaptiveLimit, ...]
+            The limits returned by `acquire`.
+
+        status : int (optional, Default=None)
+            The response status code, `None` if the request
+            failed without a response or was already passed
+            to `observe`.
+
+        retry_after : float (optional, Default=None)
+            The parsed `Retry-After` header.
+        """
+
+        if status is not None:
+            self.observe(limits=limits, status=status, retry_after=retry_after)
+
+        for limit in limits:
+            limit.release(adapt=False)
@@ -0,0 +1,128 @@
+import requests
+
+from typing import BinaryIO
+
+# Chunks must be a multiple of 320 KiB, this stays under the 4 MB limit of Outlook.
+DEFAULT_CHUNK_SIZE = 320 * 1024 * 12
+
+
+def upload_in_chunks(
+    session: object,
+    upload_url: str,
+    file: BinaryIO,
+    size: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_resumes: int = 3
+) -> dict:
+    """Uploads a file to an upload session one chunk at a time, so only
+    a single chunk is ever held in memory.
+
+    ### Parameters
+    ----
+    session : object
+        An authenticated session for our Microsoft Graph Client.
+
+    upload_url : str
+        The pre-authenticated `uploadUrl` of the session.
+
+    file : BinaryIO
+        The file to upload, opened in binary mode.
+
+    size : int
+        The total number of bytes to upload.
+
+    chunk_size : int (optional, Default=DEFAULT_CHUNK_SIZE)
+        The number of bytes sent per request, a multiple of
+        320 KiB.
+
+    max_resumes : int (optional, Default=3)
+        How many times a failed chunk is resumed from the
+        ranges the session still expects.
+
+    ### Raises
+    ----
+    ValueError:
+        If the file ends before `size` bytes were read.
+
+    ### Returns
+    ----
+    dict:
+        The response to the last chunk.
+
+    ### Usage:
+    ----
+        >>> with open("report.pdf", "rb") as file:
+        ...     upload_in_chunks(
+                session=graph_session,
+                upload_url=upload_session["uploadUrl"],
+                file=file,
+                size=os.path.getsize("report.pdf")
+            )
+    """
+
+    if chunk_size % (320 * 1024):
+        raise ValueError("The chunk size must be a multiple of 320 KiB.")
+
+    start = 0
+    resumes = 0
+    content = {}
+
+    while start < size:
+
+        file.seek(start)
+        chunk = _read_exactly(file=file, count=min(chunk_size, size - start))
+
+        try:
+            content = session.make_request(
+                method="put",
+                endpoint=upload_url,
+                data=chunk,
+                additional_headers={
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{size}",
+                }
+            )
+        except (requests.HTTPError, requests.ConnectionError, requests.Timeout):
+
+            if resumes >= max_resumes:
+                raise
+
+            # Ask the session where to pick up again.
+            resumes += 1
+            start = _next_expected(session.make_request(method="get", endpoint=upload_url), default=start)
+            continue
+
+        start = _next_expected(content, default=start + len(chunk))
+
+    return content
+
+
+def _read_exactly(file: BinaryIO, count: int) -> bytes:
+    """Reads `count` bytes, a short read would send a wrong `Content-Range`."""
+
+    chunk = file.read(count)
+
+    # Raw files and pipes may return less than asked for before the end.
+    while len(chunk) < count:
+
+        more = file.read(count - len(chunk))
+
+        if not more:
+            raise ValueError(
+                f"The file ended {count - len(chunk)} bytes short of the size given for the upload."
+            )
+
+        chunk += more
+
+    return chunk
+
+
+def _next_expected(content: dict, default: int) -> int:
+    """Reads the first byte the session still expects."""
+
+    ranges = content.get("nextExpectedRanges") if isinstance(content, dict) else None
+
+    if not ranges:
+        return default
+
+    return int(ranges[0].split("-")[0])
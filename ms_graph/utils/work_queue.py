@@ -0,0 +1,416 @@
+import json
+import time
+import sqlite3
+import threading
+
+from typing import Dict
+from typing import List
+from typing import Iterable
+from contextlib import contextmanager
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+class LeaseLost(Exception):
+
+    """Raised by a worker once its item was handed to another worker."""
+
+
+class WorkItem():
+
+    """
+    ## Overview:
+    ----
+    A unit of work leased from a `WorkQueue`.
+    """
+
+    __slots__ = ("key", "payload", "checkpoint", "attempts")
+
+    def __init__(self, key: str, payload: dict, checkpoint: dict, attempts: int) -> None:
+        """Initializes the `WorkItem` object.
+
+        ### Parameters
+        ----
+        key : str
+            The unique key of the work unit.
+
+        payload : dict
+            The description of the work.
+
+        checkpoint : dict
+            The progress saved by the last attempt, empty if
+            the work never started.
+
+        attempts : int
+            The number of times the work was leased, including
+            this one.
+        """
+
+        self.key = key
+        self.payload = payload
+        self.checkpoint = checkpoint
+        self.attempts = attempts
+
+
+class WorkQueue():
+
+    """
+    ## Overview:
+    ----
+    A durable work queue stored in SQLite, safe to share between
+    threads and processes. Work is leased for a limited time, so if a
+    worker dies its work goes back to the queue once the lease runs
+    out, along with the last checkpoint it saved. A worker whose lease
+    was handed to another one can no longer checkpoint, complete or
+    fail the work. Work that keeps failing is moved to the dead letters.
+
+    ### Usage:
+    ----
+        >>> queue = WorkQueue(path="crawl.db")
+        >>> queue.add(key="user-1:messages", payload={"user_id": "user-1"})
+        >>> item = queue.lease(worker="worker-1")
+        >>> queue.complete(key=item.key, worker="worker-1")
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 5) -> None:
+        """Initializes the `WorkQueue` object.
+
+        ### Parameters
+        ----
+        path : str
+            The path of the SQLite database file.
+
+        lease_seconds : float (optional, Default=300.0)
+            How long a worker owns a leased item before it is
+            handed to another worker.
+
+        max_attempts : int (optional, Default=5)
+            The number of attempts before an item is moved to
+            the dead letters.
+        """
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS work (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                checkpoint TEXT NOT NULL DEFAULT '{}',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS work_state ON work (state, lease_until)"
+        )
+
+    @contextmanager
+    def transaction(self):
+        """Runs a block in an exclusive write transaction."""
+
+        with self._lock:
+
+            self._connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+
+    def add(self, key: str, payload: dict) -> bool:
+        """Adds a work item, unless an item with the same key exists.
+
+        ### Parameters
+        ----
+        key : str
+            The unique key of the work unit.
+
+        payload : dict
+            The description of the work.
+
+        ### Returns
+        ----
+        bool:
+            `True` if the item was added.
+        """
+
+        return self.add_many(items=[(key, payload)]) == 1
+
+    def add_many(self, items: Iterable) -> int:
+        """Adds many work items in a single transaction, skipping the
+        keys that already exist.
+
+        ### Parameters
+        ----
+        items : Iterable
+            `(key, payload)` pairs.
+
+        ### Returns
+        ----
+        int:
+            The number of items added.
+        """
+
+        now = time.time()
+
+        with self.transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO work (key, payload, state, updated_at) VALUES (?, ?, ?, ?)",
+                ((key, json.dumps(payload), PENDING, now) for key, payload in items)
+            )
+            return connection.total_changes - before
+
+    def lease(self, worker: str) -> WorkItem:
+        """Leases the next pending item, or an item whose lease ran out.
+
+        ### Parameters
+        ----
+        worker : str
+            The name of the worker taking the lease.
+
+        ### Returns
+        ----
+        WorkItem:
+            The leased item, or `None` if nothing is available.
+        """
+
+        now = time.time()
+
+        with self.transaction() as connection:
+
+            row = connection.execute(
+                """
+                SELECT key, payload, checkpoint, attempts FROM work
+                WHERE state = ? OR (state = ? AND lease_until < ?)
+                ORDER BY attempts, updated_at
+                LIMIT 1
+                """,
+                (PENDING, LEASED, now)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            connection.execute(
+                """
+                UPDATE work SET state = ?, worker = ?, lease_until = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE key = ?
+                """,
+                (LEASED, worker, now + self.lease_seconds, now, row[0])
+            )
+
+        return WorkItem(
+            key=row[0],
+            payload=json.loads(row[1]),
+            checkpoint=json.loads(row[2]),
+            attempts=row[3] + 1
+        )
+
+    def checkpoint(self, key: str, worker: str, checkpoint: dict) -> bool:
+        """Saves the progress of a leased item and renews its lease.
+
+        ### Parameters
+        ----
+        key : str
+            The key of the item.
+
+        worker : str
+            The name of the worker holding the lease.
+
+        checkpoint : dict
+            The progress to resume from.
+
+        ### Returns
+        ----
+        bool:
+            `False` if the worker lost its lease, the item was
+            handed to another worker and nothing was saved.
+        """
+
+        now = time.time()
+
+        with self.transaction() as connection:
+            return connection.execute(
+                """
+                UPDATE work SET checkpoint = ?, lease_until = ?, updated_at = ?
+                WHERE key = ? AND worker = ? AND state = ?
+                """,
+                (json.dumps(checkpoint), now + self.lease_seconds, now, key, worker, LEASED)
+            ).rowcount == 1
+
+    def complete(self, key: str, worker: str) -> bool:
+        """Marks an item as done, it is never leased again.
+
+        ### Parameters
+        ----
+        key : str
+            The key of the item.
+
+        worker : str
+            The name of the worker holding the lease.
+
+        ### Returns
+        ----
+        bool:
+            `False` if the worker lost its lease.
+        """
+
+        with self.transaction() as connection:
+            return connection.execute(
+                """
+                UPDATE work SET state = ?, worker = NULL, lease_until = NULL, updated_at = ?
+                WHERE key = ? AND worker = ? AND state = ?
+                """,
+                (DONE, time.time(), key, worker, LEASED)
+            ).rowcount == 1
+
+    def fail(self, key: str, worker: str, error: str, retry: bool = True) -> str:
+        """Hands a failed item back to the queue, or moves it to the dead
+        letters once it ran out of attempts.
+
+        ### Parameters
+        ----
+        key : str
+            The key of the item.
+
+        worker : str
+            The name of the worker holding the lease.
+
+        error : str
+            A description of the failure.
+
+        retry : bool (optional, Default=True)
+            If `False` the item goes straight to the dead
+            letters, for failures that will not go away.
+
+        ### Returns
+        ----
+        str:
+            The new state of the item, `pending` or `dead`, or
+            `None` if the worker lost its lease.
+        """
+
+        with self.transaction() as connection:
+
+            row = connection.execute(
+                "SELECT attempts FROM work WHERE key = ? AND worker = ? AND state = ?", (key, worker, LEASED)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            state = DEAD if not retry or row[0] >= self.max_attempts else PENDING
+
+            connection.execute(
+                """
+                UPDATE work SET state = ?, worker = NULL, lease_until = NULL,
+                    error = ?, updated_at = ?
+                WHERE key = ? AND worker = ? AND state = ?
+                """,
+                (state, error, time.time(), key, worker, LEASED)
+            )
+
+        return state
+
+    def release_leases(self) -> int:
+        """Hands every leased item back to the queue, used to resume
+        after a crash without waiting for the leases to run out.
+
+        ### Returns
+        ----
+        int:
+            The number of items released.
+        """
+
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE work SET state = ?, worker = NULL, lease_until = NULL WHERE state = ?",
+                (PENDING, LEASED)
+            ).rowcount
+
+    def retry_dead(self) -> int:
+        """Moves every dead letter back to the queue.
+
+        ### Returns
+        ----
+        int:
+            The number of items moved.
+        """
+
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE work SET state = ?, attempts = 0, error = NULL WHERE state = ?",
+                (PENDING, DEAD)
+            ).rowcount
+
+    def dead_letters(self) -> List[dict]:
+        """Lists the items that ran out of attempts.
+
+        ### Returns
+        ----
+        List[dict]:
+            The key, payload, attempts and last error of each item.
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, payload, attempts, error FROM work WHERE state = ?", (DEAD,)
+            ).fetchall()
+
+        return [
+            {"key": key, "payload": json.loads(payload), "attempts": attempts, "error": error}
+            for key, payload, attempts, error in rows
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        """Counts the items in each state.
+
+        ### Returns
+        ----
+        Dict[str, int]:
+            The number of `pending`, `leased`, `done` and `dead` items.
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT state, COUNT(*) FROM work GROUP BY state"
+            ).fetchall()
+
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        counts.update(dict(rows))
+
+        return counts
+
+    def unfinished(self) -> bool:
+        """Whether any item is pending or leased."""
+
+        counts = self.counts()
+
+        return counts[PENDING] + counts[LEASED] > 0
+
+    def close(self) -> None:
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
@@ -24,7 +24,7 @@ class WorkbookApplication:
         # Set the session.
         self.graph_session: GraphSession = session
 
-    def get(self, item_id: str = None, item_path: str = None) -> dict:
+    def get(self, item_id: str = None, item_path: str = None, workbook_session_id: str = None) -> dict:
         """Retrieve the properties and relationships of a workbookApplication
         object using the Item ID or Item Path.
 
@@ -37,21 +37,32 @@ class WorkbookApplication:
             The Item Path. An Example would be the following:
             `/TestFolder/TestFile.txt`
 
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
         ### Returns
         ----
         dict:
             A workbookApplication resource object.
         """
 
+        additional_headers = None
+
+        if workbook_session_id:
+            additional_headers = {"Workbook-Session-Id": workbook_session_id}
+
         if item_id:
             content = self.graph_session.make_request(
                 method="get",
                 endpoint=f"/me/drive/items/{item_id}/workbook/application",
+                additional_headers=additional_headers,
             )
         elif item_path:
             content = self.graph_session.make_request(
                 method="get",
                 endpoint=f"/me/drive/root:/{item_path}:/workbook/application",
+                additional_headers=additional_headers,
             )
 
         return content
@@ -60,7 +71,8 @@ class WorkbookApplication:
         self,
         calculation_type: Union[str, Enum],
         item_id: str = None,
-        item_path: str = None
+        item_path: str = None,
+        workbook_session_id: str = None,
     ) -> dict:
         """Recalculate all currently opened workbooks in Excel using the
         Item ID or Item Path.
@@ -78,6 +90,10 @@ class WorkbookApplication:
             The Item Path. An Example would be the following:
             `/TestFolder/TestFile.txt`
 
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
         ### Returns
         ----
         dict:
@@ -89,21 +105,87 @@ class WorkbookApplication:
         else:
             data = {"calculationType": calculation_type}
 
+        additional_headers = {"Content-type": "application/json"}
+
+        if workbook_session_id:
+            additional_headers["Workbook-Session-Id"] = workbook_session_id
+
         if item_id:
             content = self.graph_session.make_request(
-                method="get",
-                endpoint=f"/me/drive/items/{item_id}/workbook/application",
+                method="post",
+                endpoint=f"/me/drive/items/{item_id}/workbook/application/calculate",
                 json=data,
-                additional_headers={"Content-type": "application/json"},
+                additional_headers=additional_headers,
                 expect_no_response=True,
             )
         elif item_path:
             content = self.graph_session.make_request(
-                method="get",
-                endpoint=f"/me/drive/root:/{item_path}:/workbook/application",
+                method="post",
+                endpoint=f"/me/drive/root:/{item_path}:/workbook/application/calculate",
                 json=data,
-                additional_headers={"Content-type": "application/json"},
+                additional_headers=additional_headers,
                 expect_no_response=True,
             )
 
         return content
+
+    def set_calculation_mode(
+        self,
+        calculation_mode: Union[str, Enum],
+        item_id: str = None,
+        item_path: str = None,
+        workbook_session_id: str = None,
+    ) -> dict:
+        """Sets the calculation mode used in the workbook using the
+        Item ID or Item Path.
+
+        ### Parameters
+        ----
+        calculation_mode : Union[str, Enum]
+            Specifies the calculation mode to use. Possible
+            values are: `Automatic`, `AutomaticExceptTables`,
+            `Manual`.
+
+        item_id : str (optional, Default=None)
+            The Drive Item Resource ID.
+
+        item_path : str (optional, Default=None)
+            The Item Path. An Example would be the following:
+            `/TestFolder/TestFile.txt`
+
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
+        ### Returns
+        ----
+        dict:
+            A workbookApplication resource object.
+        """
+
+        if isinstance(calculation_mode, Enum):
+            data = {"calculationMode": calculation_mode.value}
+        else:
+            data = {"calculationMode": calculation_mode}
+
+        additional_headers = {"Content-type": "application/json"}
+
+        if workbook_session_id:
+            additional_headers["Workbook-Session-Id"] = workbook_session_id
+
+        if item_id:
+            content = self.graph_session.make_request(
+                method="patch",
+                endpoint=f"/me/drive/items/{item_id}/workbook/application",
+                json=data,
+                additional_headers=additional_headers,
+            )
+        elif item_path:
+            content = self.graph_session.make_request(
+                method="patch",
+                endpoint=f"/me/drive/root:/{item_path}:/workbook/application",
+                json=data,
+                additional_headers=additional_headers,
+            )
+
+        return content
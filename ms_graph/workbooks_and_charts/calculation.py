@@ -0,0 +1,406 @@
+import time
+import threading
+
+from enum import Enum
+from typing import Dict
+from typing import Tuple
+from typing import Union
+from contextlib import contextmanager
+
+from ms_graph.utils.logs import logger
+from ms_graph.workbooks_and_charts.enums import CalculationModes
+from ms_graph.workbooks_and_charts.enums import CalculationTypes
+from ms_graph.workbooks_and_charts.application import WorkbookApplication
+
+# Higher ranks do strictly more work, so they win when requests are coalesced.
+_CALCULATION_RANK = {
+    CalculationTypes.RECALCULATE.value: 0,
+    CalculationTypes.FULL.value: 1,
+    CalculationTypes.FULLREBUILD.value: 2,
+}
+
+
+class RecalculationScheduler:
+
+    """
+    ## Overview:
+    ----
+    Coalesces and debounces workbook recalculations. Every call to
+    `request` for the same workbook within `window` seconds is folded
+    into a single `calculate` call, and `bulk_writes` puts a workbook
+    in manual calculation mode until a batch of range writes is done.
+    A debounced calculation that fails in the background is logged, and
+    raised by the next `flush` of that workbook.
+
+    ### Usage:
+    ----
+        >>> scheduler = RecalculationScheduler(
+            application=WorkbookApplication(session=graph_session)
+        )
+        >>> with scheduler.bulk_writes(item_id=item_id):
+        ...     range_service.update_range(...)
+        >>> scheduler.stats["calc_wait_seconds"]
+    """
+
+    def __init__(
+        self,
+        application: WorkbookApplication,
+        window: float = 2.0,
+        calculation_type: Union[str, Enum] = CalculationTypes.RECALCULATE,
+        restore_mode: Union[str, Enum] = None,
+    ) -> None:
+        """Initializes the `RecalculationScheduler` object.
+
+        ### Parameters
+        ----
+        application : WorkbookApplication
+            The `WorkbookApplication` service used to issue the
+            calculate calls.
+
+        window : float (optional, Default=2.0)
+            The number of seconds to wait after the last request
+            for a workbook before the recalculation is issued.
+
+        calculation_type : Union[str, Enum] (optional, Default=CalculationTypes.RECALCULATE)
+            The default calculation type used for requests that
+            do not specify one.
+
+        restore_mode : Union[str, Enum] (optional, Default=None)
+            The calculation mode the workbook is put back into
+            when a `bulk_writes` block exits, defaults to the
+            mode it was in when the block was entered.
+        """
+
+        self.application = application
+        self.window = window
+        self.calculation_type = _enum_value(calculation_type)
+        self.restore_mode = _enum_value(restore_mode)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple, str] = {}
+        self._timers: Dict[Tuple, threading.Timer] = {}
+        self._bulk: Dict[Tuple, int] = {}
+        self._modes: Dict[Tuple, str] = {}
+        self._errors: Dict[Tuple, Exception] = {}
+
+        self._stats = {
+            "requested": 0,
+            "coalesced": 0,
+            "issued": 0,
+            "calc_wait_seconds": 0.0,
+        }
+
+    @property
+    def stats(self) -> dict:
+        """Returns a snapshot of the scheduler counters.
+
+        ### Returns
+        ----
+        dict:
+            The number of recalculations requested, coalesced
+            and actually issued, along with the total seconds
+            spent waiting on `calculate` calls.
+        """
+
+        with self._lock:
+            return dict(self._stats)
+
+    def request(
+        self,
+        item_id: str = None,
+        item_path: str = None,
+        workbook_session_id: str = None,
+        calculation_type: Union[str, Enum] = None,
+    ) -> None:
+        """Schedules a recalculation of a workbook. The call is debounced,
+        so the calculation is issued `window` seconds after the last
+        request for the same workbook.
+
+        ### Parameters
+        ----
+        item_id : str (optional, Default=None)
+            The Drive Item Resource ID.
+
+        item_path : str (optional, Default=None)
+            The Item Path. An Example would be the following:
+            `/TestFolder/TestFile.txt`
+
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
+        calculation_type : Union[str, Enum] (optional, Default=None)
+            The calculation type to request, if not specified the
+            scheduler default is used.
+        """
+
+        key = _workbook_key(item_id, item_path, workbook_session_id)
+        calculation_type = _enum_value(calculation_type) or self.calculation_type
+
+        with self._lock:
+
+            self._stats["requested"] += 1
+
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+                calculation_type = max(
+                    self._pending[key], calculation_type, key=_rank
+                )
+
+            self._pending[key] = calculation_type
+
+            # Inside a bulk block the calculation waits for the block to exit.
+            if self._bulk.get(key):
+                return
+
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+
+            timer = threading.Timer(
+                interval=self.window, function=self._flush_in_background, args=(key,)
+            )
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def flush(
+        self,
+        item_id: str = None,
+        item_path: str = None,
+        workbook_session_id: str = None,
+    ) -> dict:
+        """Issues any pending recalculation right away. If no workbook is
+        specified, every pending workbook is recalculated.
+
+        ### Parameters
+        ----
+        item_id : str (optional, Default=None)
+            The Drive Item Resource ID.
+
+        item_path : str (optional, Default=None)
+            The Item Path. An Example would be the following:
+            `/TestFolder/TestFile.txt`
+
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
+        ### Raises
+        ----
+        Exception:
+            The error of a debounced calculation that failed in
+            the background since the last flush.
+
+        ### Returns
+        ----
+        dict:
+            The `calculate` response for each workbook that was
+            recalculated.
+        """
+
+        if item_id or item_path:
+            keys = [_workbook_key(item_id, item_path, workbook_session_id)]
+        else:
+            with self._lock:
+                keys = list(self._pending) + [key for key in self._errors if key not in self._pending]
+
+        responses = {}
+
+        for key in keys:
+            content = self._flush_key(key)
+            if content is not None:
+                responses[key] = content
+
+        with self._lock:
+            errors = [self._errors.pop(key) for key in keys if key in self._errors]
+
+        if errors:
+            raise errors[0]
+
+        return responses
+
+    @contextmanager
+    def bulk_writes(
+        self,
+        item_id: str = None,
+        item_path: str = None,
+        workbook_session_id: str = None,
+        calculation_type: Union[str, Enum] = None,
+    ):
+        """Switches the workbook to manual calculation for the duration of
+        the block, then restores the calculation mode it was in, or the
+        `restore_mode` of the scheduler, and issues a single recalculation.
+
+        ### Parameters
+        ----
+        item_id : str (optional, Default=None)
+            The Drive Item Resource ID.
+
+        item_path : str (optional, Default=None)
+            The Item Path. An Example would be the following:
+            `/TestFolder/TestFile.txt`
+
+        workbook_session_id : str (optional, Default=None)
+            Workbook session Id that determines if changes are
+            persisted or not.
+
+        calculation_type : Union[str, Enum] (optional, Default=None)
+            The calculation type issued when the block exits, if
+            not specified the scheduler default is used.
+        """
+
+        key = _workbook_key(item_id, item_path, workbook_session_id)
+
+        with self._lock:
+            first = not self._bulk.get(key)
+            self._bulk[key] = self._bulk.get(key, 0) + 1
+
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+
+        try:
+
+            if first:
+
+                mode = self.restore_mode
+                if mode is None:
+                    mode = self.application.get(
+                        item_id=item_id,
+                        item_path=item_path,
+                        workbook_session_id=workbook_session_id,
+                    ).get("calculationMode")
+
+                with self._lock:
+                    self._modes[key] = mode
+
+                self.application.set_calculation_mode(
+                    calculation_mode=CalculationModes.MANUAL,
+                    item_id=item_id,
+                    item_path=item_path,
+                    workbook_session_id=workbook_session_id,
+                )
+
+            yield self
+
+        finally:
+
+            with self._lock:
+                self._bulk[key] -= 1
+                last = self._bulk[key] == 0
+                mode = None
+                if last:
+                    del self._bulk[key]
+                    mode = self._modes.pop(key, None)
+
+            # Nothing to restore if the mode could not be read, or was already manual.
+            if last and mode is not None and mode != CalculationModes.MANUAL.value:
+                self.application.set_calculation_mode(
+                    calculation_mode=mode,
+                    item_id=item_id,
+                    item_path=item_path,
+                    workbook_session_id=workbook_session_id,
+                )
+
+            if last:
+                self.request(
+                    item_id=item_id,
+                    item_path=item_path,
+                    workbook_session_id=workbook_session_id,
+                    calculation_type=calculation_type,
+                )
+                self._flush_key(key)
+
+    def close(self) -> None:
+        """Cancels any timers and issues every pending recalculation."""
+
+        self.flush()
+
+    def _flush_in_background(self, key: Tuple) -> None:
+        """Issues a debounced recalculation from its timer thread, keeping
+        the error for the next `flush`.
+
+        ### Parameters
+        ----
+        key : Tuple
+            The workbook key built by `_workbook_key`.
+        """
+
+        try:
+            self._flush_key(key)
+        except Exception as error:
+            logger.exception("Recalculation of workbook %s failed.", key[0] or key[1])
+            with self._lock:
+                self._errors.setdefault(key, error)
+
+    def _flush_key(self, key: Tuple) -> dict:
+        """Issues the pending recalculation for a single workbook.
+
+        ### Parameters
+        ----
+        key : Tuple
+            The workbook key built by `_workbook_key`.
+
+        ### Returns
+        ----
+        dict:
+            The `calculate` response, or `None` if nothing
+            was pending.
+        """
+
+        with self._lock:
+
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+
+            if self._bulk.get(key):
+                return None
+
+            calculation_type = self._pending.pop(key, None)
+
+        if calculation_type is None:
+            return None
+
+        item_id, item_path, workbook_session_id = key
+
+        start = time.perf_counter()
+
+        try:
+            content = self.application.calculate(
+                calculation_type=calculation_type,
+                item_id=item_id,
+                item_path=item_path,
+                workbook_session_id=workbook_session_id,
+            )
+        finally:
+            with self._lock:
+                self._stats["issued"] += 1
+                self._stats["calc_wait_seconds"] += time.perf_counter() - start
+
+        return content
+
+
+def _workbook_key(item_id: str, item_path: str, workbook_session_id: str) -> Tuple:
+    """Builds the key used to coalesce requests for a workbook."""
+
+    if not item_id and not item_path:
+        raise ValueError("Must specify an Item ID or Item Path.")
+
+    return (item_id, item_path, workbook_session_id)
+
+
+def _enum_value(value: Union[str, Enum]) -> str:
+    """Unwraps an `Enum` member into its value."""
+
+    if isinstance(value, Enum):
+        return value.value
+
+    return value
+
+
+def _rank(calculation_type: str) -> int:
+    """Ranks a calculation type by the amount of work it does."""
+
+    return _CALCULATION_RANK.get(calculation_type, 0)
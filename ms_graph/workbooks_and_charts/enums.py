@@ -11,11 +11,26 @@ class CalculationTypes(Enum):
         >>> CalculationTypes.RECALCULATE.value
     """
 
-    RECALCULATE = "Recaulcaute"
+    RECALCULATE = "Recalculate"
     FULL = "Full"
     FULLREBUILD = "FullRebuild"
 
 
+class CalculationModes(Enum):
+    """Specifies the calculation modes used in the
+    `WorkbookApplication` set_calculation_mode method.
+
+    ### Usage:
+    ----
+        >>> from ms_graph.workbooks_and_charts.enums import CalculationModes
+        >>> CalculationModes.MANUAL.value
+    """
+
+    AUTOMATIC = "Automatic"
+    AUTOMATIC_EXCEPT_TABLES = "AutomaticExceptTables"
+    MANUAL = "Manual"
+
+
 class WorksheetVisibility(Enum):
     """Specifies the visibility types used in the
     `Worksheet` `update_worksheet` method.
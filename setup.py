@@ -15,6 +15,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/areed1192/ms-graph-python-client",
     install_requires=["requests", "msal"],
+    extras_require={"fast": ["orjson"], "arrow": ["pyarrow"]},
     packages=find_namespace_packages(include=["ms_graph", "ms_graph.*"]),
     python_requires=">3.8",
 )
@@ -0,0 +1,190 @@
+import io
+import os
+import base64
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.mail import Mail
+from ms_graph.mail import ATTACHMENT_FIELDS
+from ms_graph.mail import INLINE_ATTACHMENT_LIMIT
+from ms_graph.utils.upload import upload_in_chunks
+
+UPLOAD_URL = "https://outlook.office.com/api/v2.0/upload/AAMk"
+
+
+class FakeResponse():
+
+    """A streamed response with a fixed body."""
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def iter_content(self, chunk_size: int) -> list:
+        return [self.body[start:start + chunk_size] for start in range(0, len(self.body), chunk_size)]
+
+
+class AttachmentSession():
+
+    """Serves attachments and an upload session that can drop a chunk."""
+
+    def __init__(self, fail_chunks: int = 0) -> None:
+        self.fail_chunks = fail_chunks
+        self.requests = []
+        self.received = {}
+
+    def make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        json: dict = None,
+        data: bytes = None,
+        additional_headers: dict = None
+    ) -> dict:
+
+        self.requests.append(
+            {"method": method, "endpoint": endpoint, "params": params, "json": json, "headers": additional_headers}
+        )
+
+        if endpoint.endswith("/createUploadSession"):
+            return {"uploadUrl": UPLOAD_URL}
+
+        if endpoint == UPLOAD_URL and method == "get":
+            return {"nextExpectedRanges": [f"{sum(len(chunk) for chunk in self.received.values())}-"]}
+
+        if endpoint == UPLOAD_URL:
+
+            if self.fail_chunks:
+                self.fail_chunks -= 1
+                raise requests.ConnectionError("Connection reset.")
+
+            first, last, size = _content_range(additional_headers["Content-Range"])
+            self.received[first] = data
+
+            if last + 1 == size:
+                return {"status_code": 201}
+
+            return {"nextExpectedRanges": [f"{last + 1}-"]}
+
+        if method == "post":
+            return {"id": "att-1", **json}
+
+        return {"value": [{"id": "att-1", "name": "report.pdf"}]}
+
+    def stream_request(self, method: str, endpoint: str) -> FakeResponse:
+        self.requests.append({"method": method, "endpoint": endpoint})
+        return FakeResponse(body=b"%PDF-1.7" * 1000)
+
+
+def _content_range(value: str) -> tuple:
+    """Parses `bytes first-last/size`."""
+
+    span, size = value.split(" ")[1].split("/")
+    first, last = span.split("-")
+
+    return int(first), int(last), int(size)
+
+
+class AttachmentTest(TestCase):
+
+    """Will perform a unit test for the attachment methods of `Mail`."""
+
+    def setUp(self) -> None:
+        """Set up the mail service and a scratch directory."""
+
+        self.session = AttachmentSession()
+        self.mail = Mail(session=self.session)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write_file(self, name: str, size: int) -> str:
+        """Writes a file of `size` bytes and returns its path."""
+
+        path = os.path.join(self.directory.name, name)
+
+        with open(path, "wb") as file:
+            file.write(bytes(range(256)) * (size // 256) + b"x" * (size % 256))
+
+        return path
+
+    def test_listing_leaves_the_content_out(self):
+        """Make sure the content is only listed when asked for."""
+
+        self.mail.list_user_attachements(user_id="8bc6", message_id="AQMk")
+        self.mail.list_my_attachements(message_id="AQMk", include_content=True)
+
+        self.assertEqual(self.session.requests[0]["endpoint"], "/users/8bc6/messages/AQMk/attachments")
+        self.assertEqual(self.session.requests[0]["params"], {"$select": ATTACHMENT_FIELDS})
+        self.assertIsNone(self.session.requests[1]["params"])
+
+    def test_download_streams_into_a_file(self):
+        """Make sure the `$value` is written to a path and a file object."""
+
+        output = io.BytesIO()
+        written = self.mail.download_my_attachment(message_id="AQMk", attachment_id="att-1", file=output, chunk_size=1024)
+
+        path = os.path.join(self.directory.name, "report.pdf")
+        self.mail.download_user_attachment(user_id="8bc6", message_id="AQMk", attachment_id="att-1", file=path)
+
+        self.assertEqual(written, 8000)
+        self.assertEqual(output.getvalue(), b"%PDF-1.7" * 1000)
+        self.assertEqual(os.path.getsize(path), 8000)
+        self.assertEqual(self.session.requests[0]["endpoint"], "/me/messages/AQMk/attachments/att-1/$value")
+
+    def test_small_files_are_sent_inline(self):
+        """Make sure a small file is posted with its base64 content."""
+
+        path = self.write_file("notes.txt", 1000)
+
+        content = self.mail.add_my_attachment(message_id="AQMk", file_path=path)
+
+        with open(path, "rb") as file:
+            self.assertEqual(base64.b64decode(content["contentBytes"]), file.read())
+
+        self.assertEqual((content["name"], content["contentType"]), ("notes.txt", "text/plain"))
+
+    def test_large_files_are_uploaded_in_chunks_and_resumed(self):
+        """Make sure a large file goes through an upload session, and a
+        failed chunk is resumed where the session expects it.
+        """
+
+        self.session.fail_chunks = 1
+        size = INLINE_ATTACHMENT_LIMIT + 1000
+        path = self.write_file("video.mp4", size)
+
+        self.mail.add_user_attachment(user_id="8bc6", message_id="AQMk", file_path=path)
+
+        with open(path, "rb") as file:
+            original = file.read()
+
+        uploads = [request for request in self.session.requests if request["endpoint"] == UPLOAD_URL]
+
+        self.assertEqual(b"".join(self.session.received[first] for first in sorted(self.session.received)), original)
+        self.assertEqual([request["method"] for request in uploads], ["put", "get", "put"])
+        self.assertEqual(self.session.requests[0]["json"]["AttachmentItem"]["size"], size)
+
+    def test_short_reads_are_refused(self):
+        """Make sure a file shorter than its size never sends a wrong range."""
+
+        with self.assertRaises(ValueError):
+            upload_in_chunks(
+                session=self.session, upload_url=UPLOAD_URL, file=io.BytesIO(b"x" * 1000), size=2000
+            )
+
+        self.assertEqual(self.session.requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import time
+import threading
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.utils.batch import BatchExecutor
+
+
+class BatchSession():
+
+    """Answers `$batch` calls, throttling the first try of some requests."""
+
+    def __init__(self, throttle: set, missing: set, unreachable: set = frozenset()) -> None:
+        self.throttle = set(throttle)
+        self.missing = missing
+        self.unreachable = unreachable
+        self.calls = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def make_request(self, method: str, endpoint: str, json: dict = None) -> dict:
+
+        with self.lock:
+            self.calls.append(json["requests"])
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        if any(request["url"] in self.unreachable for request in json["requests"]):
+            raise requests.ConnectionError("Connection aborted.")
+
+        responses = []
+        failed = set()
+
+        for request in json["requests"]:
+
+            url = request["url"]
+
+            if set(request.get("dependsOn", [])) & failed:
+                status = 424
+            elif url in self.throttle:
+                self.throttle.discard(url)
+                status = 429
+            elif url in self.missing:
+                status = 404
+            else:
+                status = 204
+
+            if status >= 400:
+                failed.add(request["id"])
+
+            responses.append({"id": request["id"], "status": status, "headers": {"Retry-After": "0.01"}})
+
+        return {"responses": responses}
+
+
+class BatchExecutorTest(TestCase):
+
+    """Will perform a unit test for the `BatchExecutor` object."""
+
+    def test_concurrency_bounds_the_calls_in_flight(self):
+        """Make sure requests are not chained, and the mailbox limit caps
+        the number of calls in flight instead.
+        """
+
+        batch_requests = [{"method": "delete", "url": f"/me/messages/{n}"} for n in range(85)]
+
+        for max_concurrency, calls_in_flight in ((4, 1), (8, 2), (80, 4)):
+
+            session = BatchSession(throttle=set(), missing=set())
+            executor = BatchExecutor(session=session, max_workers=4, max_concurrency=max_concurrency)
+            executor.execute(batch_requests=batch_requests)
+
+            self.assertEqual(executor.calls_in_flight, calls_in_flight)
+            self.assertEqual(session.most_in_flight, calls_in_flight)
+            self.assertEqual([len(call) for call in session.calls], [20, 20, 20, 20, 5])
+            self.assertFalse(any("dependsOn" in request for call in session.calls for request in call))
+
+    def test_throttled_requests_are_retried_alone(self):
+        """Make sure 429s are sent again, and a failure does not hold up
+        the other requests.
+        """
+
+        session = BatchSession(throttle={"/me/messages/1"}, missing={"/me/messages/3"})
+        executor = BatchExecutor(session=session, max_workers=4, max_concurrency=4)
+
+        results = executor.execute(batch_requests=[{"method": "delete", "url": f"/me/messages/{n}"} for n in range(8)])
+
+        self.assertEqual([result.status for result in results], [204, 204, 204, 404, 204, 204, 204, 204])
+        self.assertEqual(results[1].attempts, 2)
+        self.assertEqual(results[5].attempts, 1)
+        self.assertEqual(results[3].error["code"], "404")
+        self.assertEqual([request["url"] for request in session.calls[1]], ["/me/messages/1"])
+
+    def test_a_call_without_response_fails_only_its_requests(self):
+        """Make sure a connection error fails the requests of its call and
+        keeps the results of the other calls.
+        """
+
+        session = BatchSession(throttle=set(), missing=set(), unreachable={"/me/messages/25"})
+        executor = BatchExecutor(session=session, max_workers=4, max_concurrency=8)
+
+        results = executor.execute(batch_requests=[{"method": "delete", "url": f"/me/messages/{n}"} for n in range(45)])
+
+        self.assertTrue(all(result.ok for result in results[:20] + results[40:]))
+        self.assertTrue(all(result.status is None and not result.ok for result in results[20:40]))
+        self.assertEqual(results[20].error["code"], "noResponse")
+        self.assertEqual(len(session.calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
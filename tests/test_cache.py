@@ -0,0 +1,191 @@
+import time
+import threading
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.cache import MemoryCache
+from ms_graph.utils.cache import ResponseCache
+from ms_graph.utils.cache import SQLiteCache
+from ms_graph.utils.cache import CoalescingCache
+
+
+class Client():
+
+    """The parts of the client a session reads."""
+
+    RESOURCE = "https://graph.microsoft.com/"
+    api_version = "v1.0"
+    access_token = "token-a"
+    timeout = (1.0, 5.0)
+
+
+class ETagTransport():
+
+    """Answers every request with a `200` and an `ETag`."""
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        self.requests.append(request)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["ETag"] = '"1"'
+        response._content = b'{"value": []}'
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class ResponseCacheTest(TestCase):
+
+    """Will perform a unit test for the `ResponseCache` backends."""
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        """Make sure the least recently used entry is evicted first."""
+
+        cache = MemoryCache(max_entries=2)
+
+        cache.store(key="a", etag='"1"', body=b"{}")
+        cache.store(key="b", etag='"1"', body=b"{}")
+        cache.get(key="a")
+        cache.store(key="c", etag='"1"', body=b"{}")
+
+        self.assertIsNotNone(cache.get(key="a"))
+        self.assertIsNone(cache.get(key="b"))
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_memory_cache_respects_max_bytes(self):
+        """Make sure the total body size stays under `max_bytes`."""
+
+        cache = MemoryCache(max_bytes=10)
+
+        cache.store(key="a", etag='"1"', body=b"123456")
+        cache.store(key="b", etag='"1"', body=b"123456")
+
+        self.assertIsNone(cache.get(key="a"))
+        self.assertEqual(cache.get(key="b").body, b"123456")
+
+    def test_expired_entries_are_dropped(self):
+        """Make sure an entry past its TTL is not served."""
+
+        cache = MemoryCache(ttl=-1)
+
+        cache.store(key="a", etag='"1"', body=b"{}")
+
+        self.assertIsNone(cache.lookup(key="a"))
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_backends_must_implement_the_storage(self):
+        """Make sure the cache interface cannot be used on its own."""
+
+        with self.assertRaises(TypeError):
+            ResponseCache()
+
+    def test_keys_vary_by_headers_and_identity(self):
+        """Make sure a response is only revalidated for the same headers
+        and the same caller.
+        """
+
+        client = Client()
+        session = GraphSession(client=client)
+        transport = ETagTransport()
+        session._local.session = transport
+        session.enable_cache()
+
+        session.make_request(method="get", endpoint="users", additional_headers={"ConsistencyLevel": "eventual"})
+        session.make_request(method="get", endpoint="users")
+        session.make_request(method="get", endpoint="users", additional_headers={"consistencylevel": "eventual"})
+
+        client.access_token = "token-b"
+        session.make_request(method="get", endpoint="users")
+
+        revalidated = ["If-None-Match" in request.headers for request in transport.requests]
+
+        self.assertEqual(revalidated, [False, False, True, False])
+        self.assertNotIn("token-a", "".join(session.cache._entries))
+
+    def test_sqlite_cache_round_trip(self):
+        """Make sure the SQLite backend stores and evicts entries."""
+
+        cache = SQLiteCache(path=":memory:", max_entries=1)
+
+        cache.store(key="a", etag='"1"', body=b'{"id": "a"}')
+        self.assertEqual(cache.get(key="a").etag, '"1"')
+
+        cache.store(key="b", etag='"2"', body=b'{"id": "b"}')
+        self.assertIsNone(cache.get(key="a"))
+
+        cache.close()
+
+
+class CoalescingCacheTest(TestCase):
+
+    """Will perform a unit test for the `CoalescingCache` object."""
+
+    def test_concurrent_calls_share_one_load(self):
+        """Make sure callers asking at the same time share one load."""
+
+        cache = CoalescingCache()
+        started = threading.Event()
+        release = threading.Event()
+        loads = []
+        results = []
+
+        def load() -> dict:
+            loads.append(1)
+            started.set()
+            release.wait()
+            return {"value": [1]}
+
+        leader = threading.Thread(target=lambda: results.append(cache.fetch(key="k", load=load)))
+        leader.start()
+        started.wait()
+
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.fetch(key="k", load=load)))
+            for _ in range(3)
+        ]
+
+        for follower in followers:
+            follower.start()
+
+        # Give the followers a bounded amount of time to join the call.
+        give_up_at = time.monotonic() + 5.0
+        while cache.stats["coalesced"] < 3 and time.monotonic() < give_up_at:
+            time.sleep(0.005)
+
+        release.set()
+
+        for thread in [leader] + followers:
+            thread.join()
+
+        results.append(cache.fetch(key="k", load=load))
+
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(results, [{"value": [1]}] * 5)
+        self.assertEqual(
+            (cache.stats["misses"], cache.stats["coalesced"], cache.stats["hits"]), (1, 3, 1)
+        )
+
+    def test_failed_load_is_not_cached(self):
+        """Make sure an error reaches the caller and is not stored."""
+
+        cache = CoalescingCache()
+
+        with self.assertRaises(RuntimeError):
+            cache.fetch(key="k", load=lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+        self.assertEqual(cache.fetch(key="k", load=lambda: {"ok": True}), {"ok": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import time
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.workbooks_and_charts.enums import CalculationModes
+from ms_graph.workbooks_and_charts.enums import CalculationTypes
+from ms_graph.workbooks_and_charts.application import WorkbookApplication
+from ms_graph.workbooks_and_charts.calculation import RecalculationScheduler
+
+
+class FakeApplication():
+
+    """Records the calls made to a workbook application."""
+
+    def __init__(self, mode: str = "AutomaticExceptTables", fail: bool = False) -> None:
+        self.mode = mode
+        self.fail = fail
+        self.calls = []
+
+    def get(self, item_id: str = None, item_path: str = None, workbook_session_id: str = None) -> dict:
+        self.calls.append(("get", item_id))
+        return {"calculationMode": self.mode}
+
+    def set_calculation_mode(self, calculation_mode, item_id=None, item_path=None, workbook_session_id=None) -> dict:
+        self.mode = getattr(calculation_mode, "value", calculation_mode)
+        self.calls.append(("mode", self.mode))
+        return {"calculationMode": self.mode}
+
+    def calculate(self, calculation_type, item_id=None, item_path=None, workbook_session_id=None) -> None:
+        self.calls.append(("calculate", calculation_type))
+        if self.fail:
+            raise RuntimeError("The workbook is locked.")
+
+
+class RecordingSession():
+
+    """Records the requests made through it."""
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    def make_request(self, **kwargs) -> dict:
+        self.requests.append(kwargs)
+        return {"calculationMode": kwargs.get("json", {}).get("calculationMode")}
+
+
+class WorkbookApplicationTest(TestCase):
+
+    """Will perform a unit test for the `WorkbookApplication` object."""
+
+    def test_set_calculation_mode(self):
+        """Make sure the mode is patched, with the workbook session."""
+
+        session = RecordingSession()
+
+        WorkbookApplication(session=session).set_calculation_mode(
+            calculation_mode=CalculationModes.MANUAL, item_id="01ABC", workbook_session_id="s1"
+        )
+
+        request = session.requests[0]
+
+        self.assertEqual(request["method"], "patch")
+        self.assertEqual(request["endpoint"], "/me/drive/items/01ABC/workbook/application")
+        self.assertEqual(request["json"], {"calculationMode": "Manual"})
+        self.assertEqual(request["additional_headers"]["Workbook-Session-Id"], "s1")
+
+
+class RecalculationSchedulerTest(TestCase):
+
+    """Will perform a unit test for the `RecalculationScheduler` object."""
+
+    def test_requests_are_coalesced(self):
+        """Make sure requests within the window become one calculation of
+        the strongest type.
+        """
+
+        application = FakeApplication()
+        scheduler = RecalculationScheduler(application=application, window=0.05)
+
+        scheduler.request(item_id="01ABC")
+        scheduler.request(item_id="01ABC", calculation_type=CalculationTypes.FULL)
+        scheduler.request(item_id="01ABC")
+
+        time.sleep(0.3)
+
+        self.assertEqual(application.calls, [("calculate", "Full")])
+        self.assertEqual(
+            {key: scheduler.stats[key] for key in ("requested", "coalesced", "issued")},
+            {"requested": 3, "coalesced": 2, "issued": 1}
+        )
+
+    def test_bulk_writes_restore_the_previous_mode(self):
+        """Make sure the mode the workbook was in is restored, once, after
+        nested blocks.
+        """
+
+        application = FakeApplication(mode="AutomaticExceptTables")
+        scheduler = RecalculationScheduler(application=application, window=10.0)
+
+        with scheduler.bulk_writes(item_id="01ABC"):
+            with scheduler.bulk_writes(item_id="01ABC"):
+                scheduler.request(item_id="01ABC")
+
+        self.assertEqual(application.calls, [
+            ("get", "01ABC"),
+            ("mode", "Manual"),
+            ("mode", "AutomaticExceptTables"),
+            ("calculate", "Recalculate"),
+        ])
+
+    def test_bulk_writes_leave_a_manual_workbook_manual(self):
+        """Make sure a workbook that was in manual mode stays there."""
+
+        application = FakeApplication(mode="Manual")
+        scheduler = RecalculationScheduler(application=application)
+
+        with scheduler.bulk_writes(item_id="01ABC"):
+            pass
+
+        self.assertEqual(application.mode, "Manual")
+        self.assertNotIn(("mode", "Automatic"), application.calls)
+
+    def test_background_failures_surface_on_flush(self):
+        """Make sure a failed debounced calculation is raised by `flush`."""
+
+        application = FakeApplication(fail=True)
+        scheduler = RecalculationScheduler(application=application, window=0.01)
+
+        with self.assertLogs("ms_graph", level="ERROR"):
+            scheduler.request(item_path="Book.xlsx")
+            time.sleep(0.3)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.flush()
+
+        self.assertEqual(scheduler.flush(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
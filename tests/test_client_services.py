@@ -0,0 +1,44 @@
+import sys
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.client import MicrosoftGraphClient
+
+
+class ClientServicesTest(TestCase):
+
+    """Will perform a unit test for the services of `MicrosoftGraphClient`."""
+
+    def setUp(self) -> None:
+        """Set up a client that is not logged in."""
+
+        self.client = MicrosoftGraphClient(
+            client_id="client-id",
+            client_secret="client-secret",
+            redirect_uri="https://localhost/callback",
+            scope=["User.Read"],
+            credentials="ms_graph_state.jsonc"
+        )
+
+    def test_credential_app_is_deferred(self):
+        """Make sure creating a client does not build the Credential App."""
+
+        self.assertIsNone(self.client._client_app)
+
+    def test_services_are_reused_per_session(self):
+        """Make sure a service is built once and rebuilt for a new session."""
+
+        users = self.client.users()
+
+        self.assertIs(self.client.users(), users)
+        self.assertIn("ms_graph.users", sys.modules)
+
+        self.client.graph_session = object()
+
+        self.assertIsNot(self.client.users(), users)
+        self.assertIs(self.client.users().graph_session, self.client.graph_session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.codec import orjson
+from ms_graph.utils.codec import JsonCodec
+from ms_graph.utils.codec import OrjsonCodec
+from ms_graph.utils.codec import get_codec
+
+
+class Client():
+
+    """The parts of the client a session reads."""
+
+    RESOURCE = "https://graph.microsoft.com/"
+    api_version = "v1.0"
+    access_token = "secret-token"
+    timeout = (1.0, 5.0)
+
+
+class ForbiddenTransport():
+
+    """Answers every request with a `403`."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        response = requests.Response()
+        response.status_code = 403
+        response._content = b'{"error": {"code": "Forbidden"}}'
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class CodecTest(TestCase):
+
+    """Will perform a unit test for the JSON codecs."""
+
+    document = {"displayName": "Zoë", "size": 3, "tags": ["a", None, True]}
+
+    def test_json_codec_round_trips_compact_utf8(self):
+        """Make sure the standard library codec writes compact UTF-8 bytes."""
+
+        codec = JsonCodec()
+        encoded = codec.dumps(self.document)
+
+        self.assertIsInstance(encoded, bytes)
+        self.assertIn("Zoë".encode("utf-8"), encoded)
+        self.assertNotIn(b": ", encoded)
+        self.assertEqual(codec.loads(encoded), self.document)
+        self.assertEqual(codec.loads(encoded.decode("utf-8")), self.document)
+
+    @unittest.skipUnless(orjson is not None, "requires orjson")
+    def test_orjson_codec_matches_the_json_codec(self):
+        """Make sure both codecs agree on the bytes and the objects."""
+
+        codec = OrjsonCodec()
+
+        self.assertEqual(codec.dumps(self.document), JsonCodec().dumps(self.document))
+        self.assertEqual(codec.loads(codec.dumps(self.document)), self.document)
+
+    def test_get_codec(self):
+        """Make sure codecs resolve by name, instance and `auto`."""
+
+        codec = JsonCodec()
+
+        self.assertIs(get_codec(codec), codec)
+        self.assertEqual(get_codec("json").name, "json")
+        self.assertEqual(get_codec("auto").name, "orjson" if orjson is not None else "json")
+
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+
+class ErrorLogTest(TestCase):
+
+    """Will perform a unit test for the error log of `GraphSession`."""
+
+    def test_credentials_are_not_logged(self):
+        """Make sure the token is masked in the failed request log."""
+
+        session = GraphSession(client=Client())
+        session._local.session = ForbiddenTransport()
+
+        with self.assertLogs("ms_graph", level="ERROR") as logs:
+            with self.assertRaises(requests.HTTPError):
+                session.make_request(method="get", endpoint="me")
+
+        self.assertNotIn("secret-token", logs.output[0])
+        self.assertIn("[REDACTED]", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
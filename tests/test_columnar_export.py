@@ -0,0 +1,115 @@
+import os
+import json
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.columnar_export import pyarrow
+from ms_graph.columnar_export import Column
+from ms_graph.columnar_export import Schema
+from ms_graph.columnar_export import ColumnarExporter
+
+
+class EmptySession():
+
+    """Serves a collection without items."""
+
+    def iter_items(self, endpoint: str, params: dict = None, stream: bool = False) -> iter:
+        return iter([])
+
+
+class ColumnarExportTest(TestCase):
+
+    """Will perform a unit test for the `ColumnarExporter` object."""
+
+    def setUp(self) -> None:
+        """Set up a message schema and a scratch directory."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.schema = Schema([
+            Column("id"),
+            Column("sender", "from.emailAddress.address"),
+            Column("to", "toRecipients", "json"),
+            Column("size", "size", "int"),
+            Column("sender_name", "from.emailAddress.name"),
+        ])
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def items(self, count: int) -> list:
+        """Builds `count` messages."""
+
+        return [
+            {
+                "id": str(number),
+                "from": {"emailAddress": {"address": f"user{number}@contoso.com"}},
+                "toRecipients": [{"emailAddress": {"address": "a@contoso.com"}}],
+                "size": str(number),
+            }
+            for number in range(count)
+        ]
+
+    def test_select_uses_top_level_properties(self):
+        """Make sure nested paths select their top level property once."""
+
+        self.assertEqual(self.schema.select, "id,from,toRecipients,size")
+
+    def test_jsonl_export_flattens_in_batches(self):
+        """Make sure rows are flattened and written batch by batch."""
+
+        path = os.path.join(self.directory.name, "messages.jsonl")
+
+        with ColumnarExporter(schema=self.schema, path=path, batch_size=2) as exporter:
+            stats = exporter.write(items=iter(self.items(5)))
+
+        with open(path) as file:
+            rows = [json.loads(line) for line in file]
+
+        self.assertEqual((stats["rows"], stats["batches"]), (5, 3))
+        self.assertEqual(rows[3]["sender"], "user3@contoso.com")
+        self.assertEqual(rows[3]["size"], 3)
+        self.assertIsNone(rows[3]["sender_name"])
+        self.assertEqual(json.loads(rows[0]["to"])[0]["emailAddress"]["address"], "a@contoso.com")
+
+    def test_empty_exports_leave_a_file(self):
+        """Make sure a collection without items still produces a file."""
+
+        path = os.path.join(self.directory.name, "messages.jsonl")
+
+        stats = ColumnarExporter(schema=self.schema, path=path).export(session=EmptySession(), endpoint="me/messages")
+
+        self.assertEqual(stats["rows"], 0)
+        self.assertEqual(os.path.getsize(path), 0)
+
+    @unittest.skipUnless(pyarrow is not None, "requires pyarrow")
+    def test_arrow_formats_keep_the_schema(self):
+        """Make sure Parquet and Arrow files hold the rows, and an empty
+        export still holds the schema.
+        """
+
+        for name, read in (
+            ("messages.parquet", lambda path: pyarrow.parquet.read_table(path)),
+            ("messages.arrow", lambda path: pyarrow.ipc.open_file(path).read_all()),
+        ):
+
+            path = os.path.join(self.directory.name, name)
+            empty_path = os.path.join(self.directory.name, "empty-" + name)
+
+            with ColumnarExporter(schema=self.schema, path=path, batch_size=2) as exporter:
+                exporter.write(items=iter(self.items(5)))
+
+            ColumnarExporter(schema=self.schema, path=empty_path).export(session=EmptySession(), endpoint="me/messages")
+
+            table = read(path)
+            empty = read(empty_path)
+
+            self.assertEqual(table.num_rows, 5)
+            self.assertEqual(table.column("size").to_pylist(), [0, 1, 2, 3, 4])
+            self.assertEqual(empty.num_rows, 0)
+            self.assertEqual(empty.schema, self.schema.arrow_schema())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.contacts_sync import CREATED
+from ms_graph.contacts_sync import FAILED
+from ms_graph.contacts_sync import UNKNOWN
+from ms_graph.contacts_sync import UPDATED
+from ms_graph.contacts_sync import CONFLICT
+from ms_graph.contacts_sync import ContactSync
+
+
+class ContactSession():
+
+    """Serves a folder with one contact and answers `$batch` calls."""
+
+    def __init__(self) -> None:
+        self.batches = []
+
+    def iter_items(self, endpoint: str, params: dict = None) -> list:
+
+        if endpoint == "users/u1/contacts":
+            return [{"id": "c1", "emailAddresses": [{"address": "Adele@Contoso.com"}]}]
+
+        return []
+
+    def make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        json: dict = None,
+        additional_headers: dict = None
+    ) -> dict:
+
+        if endpoint == "users/u1/contacts/delta?token=0":
+            response = requests.Response()
+            response.status_code = 410
+            raise requests.HTTPError("410 Gone", response=response)
+
+        if endpoint == "users/u1/contacts/delta":
+            return {"value": [{"id": "c1"}], "@odata.deltaLink": "users/u1/contacts/delta?token=1"}
+
+        self.batches.append(json["requests"])
+        responses = []
+
+        if any(request["body"].get("givenName") == "Unreachable" for request in json["requests"]):
+            raise requests.ConnectionError("Connection aborted.")
+
+        for request in json["requests"]:
+
+            if request["body"].get("givenName") == "Broken":
+                responses.append({"id": request["id"], "status": 400, "body": {"error": {"code": "ErrorInvalidProperty"}}})
+            elif request["method"] == "POST":
+                responses.append({"id": request["id"], "status": 201, "body": {"id": "new-" + request["id"]}})
+            else:
+                responses.append({"id": request["id"], "status": 200, "body": {"id": request["url"].split("/")[-1]}})
+
+        return {"responses": responses}
+
+
+def contact(name: str, address: str = None) -> dict:
+    return {"givenName": name, "emailAddresses": [{"address": address}] if address else []}
+
+
+class ContactSyncTest(TestCase):
+
+    """Will perform a unit test for the `ContactSync` object."""
+
+    def test_import_detects_conflicts_on_email(self):
+        """Make sure existing contacts are updated and repeats are not
+        imported twice.
+        """
+
+        session = ContactSession()
+        contact_sync = ContactSync(session=session)
+
+        results = contact_sync.import_contacts(
+            contacts=[
+                contact("Adele", "adele@contoso.com"),
+                contact("Alex", "alex@contoso.com"),
+                contact("Alex Again", " ALEX@contoso.com"),
+                contact("No Mail"),
+                contact("Broken", "broken@contoso.com"),
+            ],
+            user_id="u1",
+            max_workers=1,
+            max_concurrency=1
+        )
+
+        self.assertEqual(
+            [result.action for result in results], [UPDATED, CREATED, CONFLICT, CONFLICT, FAILED]
+        )
+        self.assertEqual(results[0].contact_id, "c1")
+        self.assertEqual(session.batches[0][0]["method"], "PATCH")
+        self.assertEqual(len(session.batches[0]), 3)
+
+    def test_import_without_email_is_opt_in(self):
+        """Make sure contacts without an address are only created when asked to."""
+
+        session = ContactSession()
+
+        results = ContactSync(session=session).import_contacts(
+            contacts=[contact("No Mail"), contact("No Mail")], user_id="u1", create_without_email=True
+        )
+
+        self.assertEqual([result.action for result in results], [CREATED, CREATED])
+        self.assertEqual([result.contact_id for result in results], ["new-0", "new-1"])
+
+    def test_import_keeps_partial_results(self):
+        """Make sure a `$batch` call without a response only affects its
+        own contacts.
+        """
+
+        contacts = [contact(f"Person {number}", f"person{number}@contoso.com") for number in range(25)]
+        contacts[22] = contact("Unreachable", "unreachable@contoso.com")
+
+        results = ContactSync(session=ContactSession()).import_contacts(contacts=contacts, user_id="u1")
+
+        self.assertEqual({result.action for result in results[:20]}, {CREATED})
+        self.assertEqual({result.action for result in results[20:]}, {UNKNOWN})
+        self.assertEqual(results[19].contact_id, "new-19")
+
+    def test_import_without_updates(self):
+        """Make sure existing contacts are left alone when asked to."""
+
+        contact_sync = ContactSync(session=ContactSession())
+
+        results = contact_sync.import_contacts(
+            contacts=[contact("Adele", "adele@contoso.com")], user_id="u1", update_existing=False
+        )
+
+        self.assertEqual((results[0].action, results[0].contact_id), (CONFLICT, "c1"))
+
+    def test_sync_persists_the_delta_link(self):
+        """Make sure the default folder is synced and its link saved."""
+
+        contact_sync = ContactSync(session=ContactSession())
+
+        events = list(contact_sync.sync_contacts(user_id="u1"))
+
+        self.assertEqual([event.id for event in events], ["c1"])
+        self.assertEqual(
+            contact_sync.store.get_link(key="contacts:u1:default"), "users/u1/contacts/delta?token=1"
+        )
+
+    def test_resync_removes_contacts_it_did_not_return(self):
+        """Make sure a contact deleted while the link was expired is
+        reported as removed.
+        """
+
+        contact_sync = ContactSync(session=ContactSession())
+        key = contact_sync.folder_key(folder_id=None, user_id="u1")
+        contact_sync.store.set_link(key, "users/u1/contacts/delta?token=0")
+        contact_sync.store.add_items(key, ["c0", "c1"])
+
+        events = [(event.kind, event.id) for event in contact_sync.sync_folder(user_id="u1")]
+
+        self.assertEqual(events, [("updated", "c1"), ("removed", "c0")])
+        self.assertEqual(contact_sync.store.items(key), ["c1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
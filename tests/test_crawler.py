@@ -0,0 +1,217 @@
+import os
+import json
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.crawler import Crawler
+from ms_graph.crawler import TokenStore
+from ms_graph.crawler import _retryable
+from ms_graph.crawler import _crawl_shard
+from ms_graph.utils.work_queue import LeaseLost
+from ms_graph.utils.codec import JsonCodec
+
+
+class TokenClient():
+
+    """The parts of the client a `TokenStore` reads and refreshes."""
+
+    def __init__(self, access_token: str = "expired") -> None:
+        self.access_token = access_token
+        self.refresh_token = None
+        self.id_token = None
+        self.token_dict = None
+        self.refreshes = 0
+
+    def _token_seconds(self, token_type: str) -> int:
+        return 0 if self.access_token == "expired" else 3600
+
+    def grab_refresh_token(self) -> None:
+        self.refreshes += 1
+        self.access_token = f"token-{self.refreshes}"
+        self.token_dict = {"access_token": self.access_token, "refresh_token": "refresh"}
+
+
+class PagedSession():
+
+    """Serves pages of a collection, failing once on a chosen page."""
+
+    codec = JsonCodec()
+
+    def __init__(self, pages: int, fail_on: str = None) -> None:
+        self.pages = pages
+        self.fail_on = fail_on
+        self.endpoints = []
+
+    def make_request(self, method: str, endpoint: str, params: dict = None) -> dict:
+
+        self.endpoints.append(endpoint)
+
+        if endpoint == self.fail_on:
+            self.fail_on = None
+            raise requests.ConnectionError("Connection reset.")
+
+        page = int(endpoint.rsplit("page=", 1)[1]) if "page=" in endpoint else 0
+        content = {"value": [{"id": f"{page}-{number}"} for number in range(2)]}
+
+        if page + 1 < self.pages:
+            content["@odata.nextLink"] = f"https://graph.microsoft.com/v1.0/users/u1/messages?page={page + 1}"
+
+        return content
+
+
+class CrawlClient(TokenClient):
+
+    """A client with a valid token and a paged session."""
+
+    def __init__(self, session: PagedSession) -> None:
+        super().__init__(access_token="token")
+        self.graph_session = session
+
+
+class TokenStoreTest(TestCase):
+
+    """Will perform a unit test for the `TokenStore` object."""
+
+    def setUp(self) -> None:
+        """Set up the store in a temporary database."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "crawl.db")
+        self.store = TokenStore(path=self.path)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_only_one_process_refreshes(self):
+        """Make sure an expired token is refreshed once and shared."""
+
+        first = TokenClient()
+        second = TokenClient()
+        other = TokenStore(path=self.path)
+
+        self.store.sync(client=first)
+        other.sync(client=second)
+        other.close()
+
+        self.assertEqual(first.refreshes, 1)
+        self.assertEqual(second.refreshes, 0)
+        self.assertEqual(second.access_token, "token-1")
+        self.assertEqual(self.store.load(), first.token_dict)
+
+    def test_valid_tokens_are_not_refreshed(self):
+        """Make sure a client with enough time left keeps its token."""
+
+        client = TokenClient(access_token="fresh")
+
+        self.store.sync(client=client)
+
+        self.assertEqual(client.refreshes, 0)
+        self.assertIsNone(self.store.load())
+
+
+class CrawlerTest(TestCase):
+
+    """Will perform a unit test for the `Crawler` object."""
+
+    def setUp(self) -> None:
+        """Set up a crawler in a temporary directory."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.crawler = Crawler(
+            client=TokenClient(),
+            database=os.path.join(self.directory.name, "crawl.db"),
+            output_directory=os.path.join(self.directory.name, "export")
+        )
+
+    def tearDown(self) -> None:
+        self.crawler.queue.close()
+        self.crawler.token_store.close()
+        self.directory.cleanup()
+
+    def test_add_shards_is_safe_to_repeat(self):
+        """Make sure shards are queued once and unknown resources refused."""
+
+        self.assertEqual(self.crawler.add_shards(user_ids=["u1", "u2"], resources=["messages", "contacts"]), 4)
+        self.assertEqual(self.crawler.add_shards(user_ids=["u1"], resources=["messages"]), 0)
+        self.assertEqual(self.crawler.status()["pending"], 4)
+
+        with self.assertRaises(ValueError):
+            self.crawler.add_shards(user_ids=["u1"], resources=["chats"])
+
+    def test_shards_resume_from_their_checkpoint(self):
+        """Make sure a shard that failed mid crawl drops what it wrote after
+        its checkpoint and resumes from the next page link.
+        """
+
+        queue = self.crawler.queue
+        self.crawler.add_shards(user_ids=["u1"], resources=["messages"])
+        session = PagedSession(pages=3, fail_on="https://graph.microsoft.com/v1.0/users/u1/messages?page=2")
+        client = CrawlClient(session=session)
+
+        item = queue.lease(worker="one")
+
+        with self.assertRaises(requests.ConnectionError):
+            _crawl_shard(
+                client=client, queue=queue, token_store=self.crawler.token_store,
+                item=item, worker="one", output_directory=self.crawler.output_directory
+            )
+
+        queue.fail(key=item.key, worker="one", error="Connection reset.")
+
+        # A half written page, as left by a crash after the checkpoint.
+        path = os.path.join(self.crawler.output_directory, "messages", "u1.jsonl")
+        with open(path, "ab") as file:
+            file.write(b'{"id": "2-0"}\n{"id"')
+
+        item = queue.lease(worker="two")
+        written = _crawl_shard(
+            client=client, queue=queue, token_store=self.crawler.token_store,
+            item=item, worker="two", output_directory=self.crawler.output_directory
+        )
+
+        with open(path) as file:
+            ids = [json.loads(line)["id"] for line in file]
+
+        self.assertEqual(item.checkpoint["items"], 4)
+        self.assertEqual(written, 2)
+        self.assertEqual(ids, ["0-0", "0-1", "1-0", "1-1", "2-0", "2-1"])
+        self.assertEqual(session.endpoints.count("users/u1/messages"), 1)
+
+    def test_a_lost_lease_stops_the_shard(self):
+        """Make sure a worker stops writing once its shard was handed to
+        another worker.
+        """
+
+        queue = self.crawler.queue
+        self.crawler.add_shards(user_ids=["u1"], resources=["messages"])
+        session = PagedSession(pages=3)
+
+        item = queue.lease(worker="one")
+        queue.release_leases()
+        queue.lease(worker="two")
+
+        with self.assertRaises(LeaseLost):
+            _crawl_shard(
+                client=CrawlClient(session=session), queue=queue, token_store=self.crawler.token_store,
+                item=item, worker="one", output_directory=self.crawler.output_directory
+            )
+
+        self.assertEqual(len(session.endpoints), 1)
+        self.assertEqual(self.crawler.status()["leased"], 1)
+
+    def test_retryable_statuses(self):
+        """Make sure only transient failures are retried."""
+
+        self.assertEqual(
+            [_retryable(status) for status in (None, 503, 429, 404, 403)],
+            [True, True, True, False, False]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import time
+import threading
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.crawler import CLIENT_SETTINGS
+from ms_graph.session import GraphSession
+from ms_graph.utils.deadline import Deadline
+from ms_graph.utils.deadline import DeadlineExceeded
+
+
+class Client():
+
+    """The parts of the client a session reads."""
+
+    RESOURCE = "https://graph.microsoft.com/"
+    api_version = "v1.0"
+    access_token = "token"
+    timeout = (1.0, 5.0)
+
+
+class ThrottledTransport():
+
+    """Answers every request with a throttled response, recording the
+    timeout it was sent with.
+    """
+
+    def __init__(self, retry_after: str) -> None:
+        self.retry_after = retry_after
+        self.timeouts = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        self.timeouts.append(kwargs.get("timeout"))
+
+        response = requests.Response()
+        response.status_code = 429
+        response.headers["Retry-After"] = self.retry_after
+        response._content = b'{"error": {"code": "TooManyRequests"}}'
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class SlowBody():
+
+    """A response body whose chunks take a while to arrive."""
+
+    def __init__(self, chunks: int, delay: float) -> None:
+        self.chunks = chunks
+        self.delay = delay
+
+    def stream(self, chunk_size: int, decode_content: bool = True):
+
+        for _ in range(self.chunks):
+            time.sleep(self.delay)
+            yield b"x" * 10
+
+    def close(self) -> None:
+        pass
+
+
+class SlowTransport():
+
+    """Answers every request with a `200` and a slow body."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = SlowBody(chunks=20, delay=0.05)
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class TimingOutTransport():
+
+    """Sleeps past the deadline, then raises the scripted timeout."""
+
+    def __init__(self, error: requests.Timeout) -> None:
+        self.error = error
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        time.sleep(0.1)
+        raise self.error
+
+
+class DeadlineTest(TestCase):
+
+    """Will perform a unit test for the `Deadline` object."""
+
+    def test_nested_deadline_never_outlives_its_parent(self):
+        """Make sure an inner deadline keeps to the outer one and is
+        cancelled with it.
+        """
+
+        outer = Deadline(seconds=1.0)
+        inner = Deadline(seconds=60.0, parent=outer)
+
+        self.assertLessEqual(inner.remaining(), 1.0)
+        self.assertLessEqual(inner.clamp((3.05, 60.0))[1], 1.0)
+
+        outer.cancel()
+
+        with self.assertRaises(DeadlineExceeded):
+            inner.check()
+
+    def test_cancel_wakes_up_a_wait(self):
+        """Make sure a wait ends as soon as the deadline is cancelled."""
+
+        deadline = Deadline()
+        threading.Timer(0.05, deadline.cancel).start()
+        started = time.monotonic()
+
+        with self.assertRaises(DeadlineExceeded):
+            deadline.sleep(10.0)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+
+
+class SessionTimeoutTest(TestCase):
+
+    """Will perform a unit test for the timeouts of `GraphSession`."""
+
+    def setUp(self) -> None:
+        """Set up a session over a throttled transport."""
+
+        self.session = GraphSession(client=Client(), max_retries=3)
+        self.transport = ThrottledTransport(retry_after="30")
+        self.session._local.session = self.transport
+
+    def test_timeouts_come_from_the_client_and_the_call(self):
+        """Make sure the client timeout is the default and a call can
+        override it.
+        """
+
+        self.session.max_retries = 0
+
+        for timeout in (None, 2.0):
+            with self.assertRaises(requests.HTTPError):
+                self.session.make_request(method="get", endpoint="me", timeout=timeout)
+
+        self.assertEqual(self.transport.timeouts, [(1.0, 5.0), 2.0])
+        self.assertEqual(self.session.with_timeout(9.0).timeout, 9.0)
+        self.assertEqual(self.session.timeout, (1.0, 5.0))
+
+    def test_retries_do_not_wait_past_the_deadline(self):
+        """Make sure a retry that cannot finish in time is not made."""
+
+        started = time.monotonic()
+
+        with self.session.deadline(2.0):
+            with self.assertRaises(requests.HTTPError):
+                self.session.make_request(method="get", endpoint="me")
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(self.transport.timeouts), 1)
+        self.assertLessEqual(self.transport.timeouts[0][1], 2.0)
+
+    def test_expired_deadline_stops_requests(self):
+        """Make sure no request is sent once the deadline passed."""
+
+        with self.session.deadline(0.0):
+            with self.assertRaises(DeadlineExceeded):
+                self.session.make_request(method="get", endpoint="me")
+
+        self.assertEqual(self.transport.timeouts, [])
+
+    def test_deadline_errors_tell_if_the_request_was_sent(self):
+        """Make sure a connect timeout is known to have sent nothing, and a
+        read timeout may have.
+        """
+
+        self.assertFalse(DeadlineExceeded().request_sent)
+
+        for error, request_sent in ((requests.ConnectTimeout(), False), (requests.ReadTimeout(), True)):
+
+            self.session._local.session = TimingOutTransport(error=error)
+
+            with self.session.deadline(0.05):
+                with self.assertRaises(DeadlineExceeded) as raised:
+                    self.session.make_request(method="post", endpoint="me/sendMail", json={})
+
+            self.assertEqual(raised.exception.request_sent, request_sent)
+
+    def test_failed_requests_reach_the_post_request_hooks(self):
+        """Make sure a request stopped by the deadline is still completed
+        in the instrumentation.
+        """
+
+        seen = []
+        instrumentation = self.session.enable_instrumentation()
+        instrumentation.add_post_request_hook(seen.append)
+
+        with self.session.deadline(0.0):
+            with self.assertRaises(DeadlineExceeded):
+                self.session.make_request(method="get", endpoint="me")
+
+        self.assertEqual(len(seen), 1)
+        self.assertIsInstance(seen[0].error, DeadlineExceeded)
+
+    def test_streamed_bodies_are_read_within_the_deadline(self):
+        """Make sure reading a streamed body stops once the deadline passes."""
+
+        self.session._local.session = SlowTransport()
+
+        with self.session.deadline(0.2):
+
+            response = self.session.stream_request(method="get", endpoint="me/messages/AQMk/$value")
+
+            with self.assertRaises(DeadlineExceeded):
+                with response:
+                    for _ in response.iter_content(chunk_size=10):
+                        pass
+
+    def test_crawler_workers_keep_the_timeout(self):
+        """Make sure the crawl workers rebuild the client with its timeout."""
+
+        self.assertIn("timeout", CLIENT_SETTINGS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.utils.delta import DeltaQuery
+from ms_graph.utils.delta import DeltaStore
+from ms_graph.utils.delta import SQLiteDeltaStore
+
+
+class PagedSession():
+
+    """Serves canned delta pages by URL."""
+
+    def __init__(self, pages: dict) -> None:
+        self.pages = pages
+        self.requested = []
+
+    def make_request(self, method: str, endpoint: str, params: dict = None, additional_headers: dict = None) -> dict:
+
+        self.requested.append(endpoint)
+        page = self.pages[endpoint]
+
+        if isinstance(page, int):
+            response = requests.Response()
+            response.status_code = page
+            raise requests.HTTPError(f"{page} Error", response=response)
+
+        return page
+
+
+class DeltaQueryTest(TestCase):
+
+    """Will perform a unit test for the `DeltaQuery` object."""
+
+    def setUp(self) -> None:
+        """Set up a query over an in memory SQLite store."""
+
+        self.store = SQLiteDeltaStore(path=":memory:")
+        self.session = PagedSession(
+            pages={
+                "delta": {"value": [{"id": "1"}], "@odata.nextLink": "page-2"},
+                "page-2": {"value": [{"id": "2"}], "@odata.deltaLink": "round-2"},
+                "round-2": {
+                    "value": [{"id": "2", "isRead": True}, {"id": "1", "@removed": {"reason": "deleted"}}, {"id": "3"}],
+                    "@odata.deltaLink": "round-3",
+                },
+                "round-3": 410,
+            }
+        )
+        self.delta = DeltaQuery(session=self.session, store=self.store)
+
+    def tearDown(self) -> None:
+        """Close the store."""
+
+        self.store.close()
+
+    def test_events_are_classified(self):
+        """Make sure the second round reports updates and removals."""
+
+        first = [(event.kind, event.id) for event in self.delta.changes(key="inbox", endpoint="delta")]
+        second = [(event.kind, event.id) for event in self.delta.changes(key="inbox", endpoint="delta")]
+
+        self.assertEqual(first, [("added", "1"), ("added", "2")])
+        self.assertEqual(second, [("updated", "2"), ("removed", "1"), ("added", "3")])
+        self.assertEqual(self.store.get_link("inbox"), "round-3")
+        self.assertEqual(sorted(self.store.items("inbox")), ["2", "3"])
+
+    def test_interrupted_round_resumes_from_next_link(self):
+        """Make sure a sync stopped halfway resumes from the last page."""
+
+        changes = self.delta.changes(key="inbox", endpoint="delta")
+        next(changes)
+        next(changes, None)
+        changes.close()
+
+        list(self.delta.changes(key="inbox", endpoint="delta"))
+
+        self.assertEqual(self.session.requested, ["delta", "page-2", "page-2"])
+
+    def test_expired_link_starts_a_new_round(self):
+        """Make sure a `410 Gone` restarts from the delta endpoint."""
+
+        self.store.set_link("inbox", "round-3")
+        self.store.add_items("inbox", ["1"])
+
+        events = [(event.kind, event.id) for event in self.delta.changes(key="inbox", endpoint="delta")]
+
+        self.assertEqual(events, [("updated", "1"), ("added", "2")])
+
+    def test_resync_removes_items_it_did_not_return(self):
+        """Make sure the items a new full round misses are removed, even
+        when the round is resumed after a crash.
+        """
+
+        self.store.set_link("inbox", "round-3")
+        self.store.add_items("inbox", ["1", "9"])
+
+        changes = self.delta.changes(key="inbox", endpoint="delta")
+        next(changes)
+        next(changes)
+        changes.close()
+
+        self.assertEqual(self.store.get_link("inbox"), "page-2")
+
+        events = [(event.kind, event.id) for event in self.delta.changes(key="inbox", endpoint="delta")]
+
+        self.assertEqual(events, [("added", "2"), ("removed", "9")])
+        self.assertEqual(sorted(self.store.items("inbox")), ["1", "2"])
+        self.assertEqual(self.store.items("inbox#resync"), [])
+
+    def test_forget_removes_known_items(self):
+        """Make sure forgetting a collection removes all of its items."""
+
+        list(self.delta.changes(key="inbox", endpoint="delta"))
+
+        removed = sorted(event.id for event in self.delta.forget(key="inbox"))
+
+        self.assertEqual(removed, ["1", "2"])
+        self.assertEqual(self.store.keys(prefix="in"), [])
+
+    def test_stores_must_implement_the_interface(self):
+        """Make sure the store interface cannot be used on its own."""
+
+        with self.assertRaises(TypeError):
+            DeltaStore()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.directory_sync import DirectorySync
+
+
+class RoundSession():
+
+    """Serves one canned delta round per call, keyed by endpoint."""
+
+    def __init__(self, rounds: dict) -> None:
+        self.rounds = rounds
+
+    def make_request(self, method: str, endpoint: str, params: dict = None, additional_headers: dict = None) -> dict:
+
+        content = self.rounds[endpoint]
+
+        # A status code stands for an expired link.
+        if isinstance(content, int):
+            response = requests.Response()
+            response.status_code = content
+            raise requests.HTTPError(f"{content} Gone", response=response)
+
+        return content
+
+
+class DirectorySyncTest(TestCase):
+
+    """Will perform a unit test for the `DirectorySync` object."""
+
+    def setUp(self) -> None:
+        """Set up a sync over a temporary database."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.session = RoundSession(
+            rounds={
+                "users/delta": {
+                    "value": [
+                        {"id": "u1", "displayName": "Adele", "userPrincipalName": "Adele@contoso.com"},
+                        {"id": "u2", "displayName": "Alex", "userPrincipalName": "alex@contoso.com"},
+                    ],
+                    "@odata.deltaLink": "users-2",
+                },
+                "groups/delta": {
+                    "value": [
+                        {
+                            "id": "g1",
+                            "displayName": "Sales",
+                            "members@delta": [
+                                {"@odata.type": "#microsoft.graph.user", "id": "u1"},
+                                {"@odata.type": "#microsoft.graph.user", "id": "u2"},
+                            ],
+                        }
+                    ],
+                    "@odata.deltaLink": "groups-2",
+                },
+                "users-2": {
+                    "value": [
+                        {"id": "u1", "jobTitle": "Manager"},
+                        {"id": "u2", "@removed": {"reason": "deleted"}},
+                    ],
+                    "@odata.deltaLink": "users-3",
+                },
+                "groups-2": {
+                    "value": [{"id": "g1", "members@delta": [{"id": "u1", "@removed": {"reason": "deleted"}}]}],
+                    "@odata.deltaLink": "groups-3",
+                },
+            }
+        )
+        self.sync = DirectorySync(session=self.session, path=os.path.join(self.directory.name, "directory.db"))
+
+    def tearDown(self) -> None:
+        """Close the snapshot and remove it."""
+
+        self.sync.close()
+        self.directory.cleanup()
+
+    def test_first_sync_builds_the_snapshot(self):
+        """Make sure users, groups and memberships are stored."""
+
+        self.assertEqual(self.sync.sync(), {"users": 2, "groups": 1})
+        self.assertEqual(self.sync.user("adele@CONTOSO.com")["id"], "u1")
+        self.assertEqual(sorted(self.sync.members(group_id="g1")), ["u1", "u2"])
+
+    def test_later_syncs_apply_changes(self):
+        """Make sure partial updates merge and removals are applied."""
+
+        self.sync.sync()
+        self.sync.sync()
+
+        user = self.sync.user("u1")
+
+        self.assertEqual((user["displayName"], user["jobTitle"]), ("Adele", "Manager"))
+        self.assertIsNone(self.sync.user("u2"))
+        self.assertEqual(self.sync.group("g1")["displayName"], "Sales")
+        self.assertEqual(self.sync.counts(), {"users": 1, "groups": 1, "memberships": 0})
+
+    def test_resync_sweeps_what_it_did_not_see(self):
+        """Make sure a full round after an expired link drops the objects
+        and memberships it did not return.
+        """
+
+        self.sync.sync()
+
+        self.session.rounds.update({
+            "users-2": 410,
+            "groups-2": 410,
+            "users/delta": {
+                "value": [{"id": "u1", "displayName": "Adele", "userPrincipalName": "Adele@contoso.com"}],
+                "@odata.deltaLink": "users-3",
+            },
+            "groups/delta": {
+                "value": [
+                    {
+                        "id": "g1",
+                        "displayName": "Sales",
+                        "members@delta": [{"@odata.type": "#microsoft.graph.user", "id": "u1"}]
+                    }
+                ],
+                "@odata.deltaLink": "groups-3",
+            },
+        })
+
+        self.assertEqual(self.sync.sync(), {"users": 2, "groups": 1})
+        self.assertIsNone(self.sync.user("u2"))
+        self.assertEqual(self.sync.members(group_id="g1"), ["u1"])
+        self.assertEqual(self.sync.counts(), {"users": 1, "groups": 1, "memberships": 1})
+
+        # Incremental rounds never sweep.
+        self.session.rounds["users-3"] = {"value": [], "@odata.deltaLink": "users-3"}
+        self.session.rounds["groups-3"] = {"value": [], "@odata.deltaLink": "groups-3"}
+
+        self.assertEqual(self.sync.sync(), {"users": 0, "groups": 0})
+        self.assertEqual(self.sync.counts(), {"users": 1, "groups": 1, "memberships": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.utils.endpoints import endpoint_template
+
+
+class EndpointTemplateTest(TestCase):
+
+    """Will perform a unit test for `endpoint_template`."""
+
+    def test_resource_ids_are_replaced(self):
+        """Make sure ids, paths and arguments become placeholders."""
+
+        cases = {
+            "https://graph.microsoft.com/v1.0/users/8bc6-12/messages/AQMk==?$top=5": "users/{id}/messages/{id}",
+            "me/drive/items/01ABC/workbook/worksheets": "me/drive/items/{id}/workbook/worksheets",
+            "/me/drive/root:/Folder/Book.xlsx:/workbook/tables": "me/drive/root:{path}:/workbook/tables",
+            "me/drive/items/01ABC/workbook/worksheets/Sheet1/range(address='A1:B2')":
+                "me/drive/items/{id}/workbook/worksheets/{id}/range({args})",
+            "me/mailFolders/inbox/messages": "me/mailFolders/{id}/messages",
+            "sites/contoso.sharepoint.com,1,2/lists": "sites/{id}/lists",
+        }
+
+        for endpoint, template in cases.items():
+            self.assertEqual(endpoint_template(endpoint), template, endpoint)
+
+    def test_actions_after_a_collection_are_kept(self):
+        """Make sure actions like `delta` and `$count` are not taken for ids."""
+
+        self.assertEqual(endpoint_template("me/messages/delta"), "me/messages/delta")
+        self.assertEqual(endpoint_template("groups/abc/members/$count"), "groups/{id}/members/$count")
+
+
+if __name__ == "__main__":
+    unittest.main()
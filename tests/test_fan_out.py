@@ -0,0 +1,112 @@
+import time
+import threading
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.fan_out import FanOut
+from ms_graph.utils.deadline import deadline_scope
+from ms_graph.utils.deadline import current_deadline
+from ms_graph.utils.deadline import DeadlineExceeded
+
+
+class MailboxService():
+
+    """Answers per user calls, failing for some users."""
+
+    def __init__(self, broken: set = frozenset(), delay: float = 0.0) -> None:
+        self.broken = broken
+        self.delay = delay
+        self.calls = []
+        self.deadlines = []
+        self.lock = threading.Lock()
+
+    def list_user_messages(self, user_id: str, top: int = 10) -> dict:
+
+        with self.lock:
+            self.calls.append(user_id)
+            self.deadlines.append(current_deadline())
+
+        time.sleep(self.delay)
+
+        if user_id in self.broken:
+            raise RuntimeError(f"Mailbox {user_id} is not enabled.")
+
+        return {"value": [user_id] * top}
+
+
+class FanOutTest(TestCase):
+
+    """Will perform a unit test for the `FanOut` object."""
+
+    def test_every_key_gets_a_result_or_its_error(self):
+        """Make sure results stream back and a failure does not stop the run."""
+
+        service = MailboxService(broken={"u3"})
+        fan_out = FanOut(max_workers=4)
+
+        results = dict(fan_out.run(method=service.list_user_messages, keys=(f"u{n}" for n in range(10)), top=2))
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results["u1"], {"value": ["u1", "u1"]})
+        self.assertIsInstance(results["u3"], RuntimeError)
+        self.assertFalse(fan_out.cancelled)
+
+    def test_keys_are_read_lazily(self):
+        """Make sure only `max_pending` keys are taken ahead of the consumer."""
+
+        service = MailboxService()
+        fan_out = FanOut(max_workers=2, max_pending=3)
+        read = []
+
+        def keys():
+            for number in range(100):
+                read.append(number)
+                yield f"u{number}"
+
+        run = fan_out.run(method=service.list_user_messages, keys=keys())
+        next(run)
+        run.close()
+
+        self.assertLessEqual(len(read), 4)
+
+    def test_cancel_is_scoped_to_the_runs_in_progress(self):
+        """Make sure a cancel stops the current run only, and a new run
+        does not clear the cancel of another.
+        """
+
+        service = MailboxService(delay=0.01)
+        fan_out = FanOut(max_workers=2, max_pending=2)
+
+        first = fan_out.run(method=service.list_user_messages, keys=(f"a{n}" for n in range(50)))
+        next(first)
+
+        fan_out.cancel()
+
+        second = fan_out.run(method=service.list_user_messages, keys=(f"b{n}" for n in range(5)))
+        second_results = list(second)
+        first_results = list(first)
+
+        self.assertEqual(len(second_results), 5)
+        self.assertLess(len(first_results), 49)
+        self.assertFalse(fan_out.cancelled)
+
+    def test_calls_run_under_the_consumers_deadline(self):
+        """Make sure the calls inherit the deadline, and the consumer stops
+        waiting once it passes.
+        """
+
+        service = MailboxService(delay=0.5)
+        fan_out = FanOut(max_workers=2)
+        started = time.monotonic()
+
+        with deadline_scope(seconds=0.1) as deadline:
+            with self.assertRaises(DeadlineExceeded):
+                list(fan_out.run(method=service.list_user_messages, keys=["u1", "u2", "u3"]))
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertTrue(all(inner.parent is deadline for inner in service.deadlines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import json
+import logging
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.utils.logs import logger
+from ms_graph.utils.logs import JsonFormatter
+from ms_graph.utils.logs import enable_background_logging
+from ms_graph.utils.logs import disable_background_logging
+
+
+class ListHandler(logging.Handler):
+
+    """Keeps the formatted records it handles."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+
+
+class JsonFormatterTest(TestCase):
+
+    """Will perform a unit test for the `JsonFormatter` object."""
+
+    def test_extra_fields_and_exceptions_are_kept(self):
+        """Make sure a record becomes one JSON line with its extras."""
+
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = logging.LogRecord("ms_graph", logging.ERROR, __file__, 1, "GET %s", ("me",), None)
+            record.exc_info = sys.exc_info()
+
+        record.graph_request = {"status": 500, "retries": 2}
+
+        line = JsonFormatter().format(record)
+        payload = json.loads(line)
+
+        self.assertNotIn("\n", line)
+        self.assertEqual((payload["level"], payload["logger"], payload["message"]), ("ERROR", "ms_graph", "GET me"))
+        self.assertEqual(payload["graph_request"], {"status": 500, "retries": 2})
+        self.assertIn("RuntimeError: boom", payload["exception"])
+        self.assertNotIn("args", payload)
+
+
+class BackgroundLoggingTest(TestCase):
+
+    """Will perform a unit test for `enable_background_logging`."""
+
+    def setUp(self) -> None:
+        self.level = logger.level
+
+    def tearDown(self) -> None:
+        disable_background_logging()
+        logger.setLevel(self.level)
+
+    def test_records_reach_the_handler_through_the_queue(self):
+        """Make sure records are delivered, formatted, by the listener and
+        flushed when it stops.
+        """
+
+        handler = ListHandler()
+        handler.setFormatter(JsonFormatter())
+
+        enable_background_logging(handler=handler, level=logging.INFO)
+
+        logger.debug("skipped")
+        logger.info("sent %s", "request", extra={"graph_request": {"status": 200}})
+
+        disable_background_logging()
+
+        self.assertEqual(len(handler.lines), 1)
+        self.assertEqual(json.loads(handler.lines[0])["graph_request"], {"status": 200})
+
+    def test_enabling_twice_replaces_the_listener(self):
+        """Make sure only one queue handler stays installed."""
+
+        first = enable_background_logging(handler=ListHandler())
+        second = enable_background_logging(handler=ListHandler())
+
+        queued = [handler for handler in logger.handlers if type(handler).__name__ == "_DeferredQueueHandler"]
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(queued), 1)
+
+        disable_background_logging()
+
+        self.assertFalse(any(type(handler).__name__ == "_DeferredQueueHandler" for handler in logger.handlers))
+
+
+if __name__ == "__main__":
+    unittest.main()
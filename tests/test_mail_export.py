@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.mail_export import _mboxrd
+from ms_graph.mail_export import MimeExporter
+from ms_graph.utils.deadline import deadline_scope
+from ms_graph.utils.deadline import current_deadline
+
+
+class FakeResponse():
+
+    """A streamed response with a fixed body."""
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def iter_content(self, chunk_size: int) -> list:
+        return [self.body[start:start + chunk_size] for start in range(0, len(self.body), chunk_size)]
+
+
+class FakeSession():
+
+    """Lists a mailbox and serves the MIME of its messages."""
+
+    def __init__(self, message_ids: list) -> None:
+        self.message_ids = message_ids
+        self.downloaded = []
+        self.deadlines = []
+
+    def iter_items(self, endpoint: str, params: dict = None, stream: bool = False) -> list:
+        return [{"id": message_id, "receivedDateTime": "2024-01-01T00:00:00Z"} for message_id in self.message_ids]
+
+    def stream_request(self, method: str, endpoint: str) -> FakeResponse:
+        message_id = endpoint.split("/")[-2]
+        self.downloaded.append(message_id)
+        self.deadlines.append(current_deadline())
+        return FakeResponse(body=f"Subject: {message_id}\r\n\r\nbody\r\n".encode())
+
+
+class MboxrdTest(TestCase):
+
+    """Will perform a unit test for the mboxrd encoding."""
+
+    def test_from_lines_are_escaped_across_chunks(self):
+        """Make sure `From ` lines are escaped even when split between chunks."""
+
+        chunks = [b"Subject: hi\r\n\r\nFr", b"om here\r\n>From there\r\nnot From\r\nFrom end"]
+
+        encoded = b"".join(_mboxrd(chunks=chunks, separator=b"From MAILER-DAEMON\n"))
+
+        self.assertEqual(
+            encoded,
+            b"From MAILER-DAEMON\nSubject: hi\r\n\r\n>From here\r\n>>From there\r\nnot From\r\n>From end\n\n"
+        )
+
+
+class MimeExporterTest(TestCase):
+
+    """Will perform a unit test for the `MimeExporter` object."""
+
+    def test_resume_cuts_only_the_unrecorded_tail(self):
+        """Make sure a resumed export, reaching the archive through another
+        path, only cuts what was written after the last recorded message.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            exporter = MimeExporter(session=FakeSession(["a", "b"]), output_directory=directory, max_workers=1)
+            exporter.export_mailbox(user_id="8bc6")
+            exporter.close()
+
+            mailbox = os.path.join(directory, "8bc6")
+            archive = os.path.join(mailbox, "worker-0-00001.mbox")
+            foreign = os.path.join(mailbox, "notes.mbox")
+
+            size = os.path.getsize(archive)
+
+            # An interrupted run left half a message, and someone put a file of their own next to it.
+            with open(archive, "ab") as file:
+                file.write(b"From MAILER-DAEMON\nSubject: half")
+
+            with open(foreign, "wb") as file:
+                file.write(b"keep me")
+
+            session = FakeSession(["a", "b", "c"])
+            exporter = MimeExporter(
+                session=session,
+                output_directory=os.path.join(directory, ".", ""),
+                max_workers=1
+            )
+            stats = exporter.export_mailbox(user_id="8bc6")
+            exporter.close()
+
+            with open(archive, "rb") as file:
+                content = file.read()
+
+            self.assertEqual((stats["exported"], stats["skipped"]), (1, 2))
+            self.assertEqual(session.downloaded, ["c"])
+            self.assertNotIn(b"Subject: half", content)
+            self.assertEqual(content.count(b"From MAILER-DAEMON"), 3)
+            self.assertGreater(len(content), size)
+            self.assertEqual(os.path.getsize(foreign), 7)
+
+    def test_workers_download_under_the_callers_deadline(self):
+        """Make sure the worker threads inherit the deadline of the export."""
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            session = FakeSession(["a", "b", "c"])
+            exporter = MimeExporter(session=session, output_directory=directory, max_workers=2)
+
+            with deadline_scope(seconds=30.0) as deadline:
+                exporter.export_mailbox(user_id="8bc6")
+
+            exporter.close()
+
+        self.assertEqual(len(session.deadlines), 3)
+        self.assertTrue(all(inner is not None and inner.parent is deadline for inner in session.deadlines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.groups import Groups
+from ms_graph.utils.membership import USER
+from ms_graph.utils.membership import GROUP
+from ms_graph.utils.membership import MembershipIndex
+
+
+USER_TYPE = "#microsoft.graph.user"
+GROUP_TYPE = "#microsoft.graph.group"
+
+
+class DirectorySession():
+
+    """Answers `$batch` calls for the members of a fixed directory."""
+
+    def __init__(self, members: dict, transitive_members: dict) -> None:
+        self.members = members
+        self.transitive_members = transitive_members
+        self.urls = []
+
+    def make_request(self, method: str, endpoint: str, json: dict = None) -> dict:
+
+        responses = []
+
+        for request in json["requests"]:
+
+            self.urls.append(request["url"])
+
+            group_id, relationship = request["url"].split("?")[0].split("/")[2:4]
+            directory = self.transitive_members if relationship == "transitiveMembers" else self.members
+
+            if group_id not in directory:
+                responses.append({"id": request["id"], "status": 404, "body": {"error": {"code": "Request_ResourceNotFound"}}})
+                continue
+
+            value = [{"id": member, "@odata.type": kind} for member, kind in directory[group_id]]
+            responses.append({"id": request["id"], "status": 200, "body": {"value": value}})
+
+        return {"responses": responses}
+
+
+class MembershipIndexTest(TestCase):
+
+    """Will perform a unit test for the `MembershipIndex` object."""
+
+    def setUp(self) -> None:
+        """Set up two levels of nested groups with a cycle."""
+
+        self.index = MembershipIndex()
+        self.index.set_members(group_id="all", members=[("sales", GROUP), ("ceo", USER)])
+        self.index.set_members(group_id="sales", members=[("emea", GROUP), ("adele", USER)])
+        self.index.set_members(group_id="emea", members=[("alex", USER), ("all", GROUP)])
+
+    def test_transitive_membership(self):
+        """Make sure members of nested groups count, cycles included."""
+
+        self.assertTrue(self.index.contains(group_id="all", member_id="alex"))
+        self.assertFalse(self.index.contains(group_id="all", member_id="alex", transitive=False))
+        self.assertEqual(
+            sorted(self.index.members(group_id="sales", transitive=True, kind=USER)),
+            ["adele", "alex", "ceo"]
+        )
+
+    def test_changes_invalidate_the_groups_above(self):
+        """Make sure a refresh of a nested group reaches its parents."""
+
+        self.assertTrue(self.index.contains(group_id="all", member_id="alex"))
+
+        self.index.set_members(group_id="emea", members=[("megan", USER)])
+
+        self.assertFalse(self.index.contains(group_id="all", member_id="alex"))
+        self.assertTrue(self.index.contains(group_id="all", member_id="megan"))
+        self.assertEqual(sorted(self.index.groups_of(member_id="megan")), ["all", "emea", "sales"])
+
+    def test_unloaded_nested_groups_are_reported(self):
+        """Make sure nested groups without members loaded are listed."""
+
+        self.index.set_members(group_id="emea", members=[("apac", GROUP)])
+
+        self.assertEqual(self.index.nested_groups(), ["apac"])
+
+        self.index.remove_group(group_id="apac")
+
+        self.assertEqual(self.index.nested_groups(), [])
+
+    def test_transitive_only_groups_are_known(self):
+        """Make sure groups loaded with their transitive members only are
+        listed, and their direct members are not guessed.
+        """
+
+        self.index.set_transitive_members(group_id="apac", members=[("kenji", USER), ("tokyo", GROUP)])
+
+        self.assertIn("apac", self.index.known_groups)
+        self.assertEqual(self.index.groups_of(member_id="kenji"), ["apac"])
+        self.assertTrue(self.index.contains(group_id="apac", member_id="kenji"))
+
+        with self.assertRaises(ValueError):
+            self.index.contains(group_id="apac", member_id="kenji", transitive=False)
+
+        self.index.set_members(group_id="emea", members=[("apac", GROUP)])
+
+        self.assertTrue(self.index.contains(group_id="all", member_id="kenji"))
+        self.assertEqual(self.index.nested_groups(), [])
+
+
+class LoadMembershipsTest(TestCase):
+
+    """Will perform a unit test for `Groups.load_memberships`."""
+
+    def setUp(self) -> None:
+        """Set up a directory with a nested group and a deleted one."""
+
+        self.session = DirectorySession(
+            members={
+                "all": [("sales", GROUP_TYPE), ("ceo", USER_TYPE)],
+                "sales": [("adele", USER_TYPE)],
+            },
+            transitive_members={
+                "all": [("sales", GROUP_TYPE), ("ceo", USER_TYPE), ("adele", USER_TYPE)],
+            }
+        )
+        self.groups = Groups(session=self.session)
+
+    def test_nested_groups_are_expanded(self):
+        """Make sure nested groups are loaded and deleted ones forgotten."""
+
+        index = self.groups.load_memberships(group_ids=["all", "gone", "all"])
+
+        self.assertEqual(self.session.urls, [
+            "/groups/all/members?$select=id&$top=999",
+            "/groups/gone/members?$select=id&$top=999",
+            "/groups/sales/members?$select=id&$top=999",
+        ])
+        self.assertTrue(index.contains(group_id="all", member_id="adele"))
+        self.assertEqual(index.members(group_id="gone"), [])
+
+    def test_transitive_members_are_read_from_graph(self):
+        """Make sure the transitive members are stored without loading the
+        nested groups.
+        """
+
+        index = self.groups.load_memberships(group_ids=["all"], transitive=True)
+
+        self.assertEqual(len(self.session.urls), 1)
+        self.assertEqual(index.known_groups, ["all"])
+        self.assertEqual(index.groups_of(member_id="adele"), ["all"])
+        self.assertEqual(sorted(index.members(group_id="all", transitive=True, kind=USER)), ["adele", "ceo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
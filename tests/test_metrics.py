@@ -0,0 +1,213 @@
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.metrics import otel_trace
+from ms_graph.utils.metrics import RequestInfo
+from ms_graph.utils.metrics import RequestMetrics
+from ms_graph.utils.metrics import MetricsExporter
+from ms_graph.utils.metrics import OpenTelemetryHooks
+from ms_graph.utils.metrics import PrometheusExporter
+
+
+class Client():
+
+    """The parts of the client a session reads."""
+
+    RESOURCE = "https://graph.microsoft.com/"
+    api_version = "v1.0"
+    access_token = "token"
+    timeout = (1.0, 5.0)
+
+
+class ScriptedTransport():
+
+    """Answers requests with the scripted statuses, then with `200`."""
+
+    def __init__(self, statuses: list, body: bytes = b'{"value": []}') -> None:
+        self.statuses = list(statuses)
+        self.body = body
+        self.requests = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        self.requests.append(request)
+
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0) if self.statuses else 200
+        response.headers["Retry-After"] = "0"
+        response._content = self.body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class FakeSpan():
+
+    """Records what is set on a span."""
+
+    def __init__(self, name: str, attributes: dict) -> None:
+        self.name = name
+        self.attributes = dict(attributes)
+        self.status = None
+        self.ended = False
+
+    def set_attribute(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status: object) -> None:
+        self.status = status
+
+    def record_exception(self, error: Exception) -> None:
+        self.attributes["exception"] = error
+
+    def end(self) -> None:
+        self.ended = True
+
+
+class FakeTracer():
+
+    """Hands out `FakeSpan` objects."""
+
+    def __init__(self) -> None:
+        self.spans = []
+
+    def start_span(self, name: str, kind: object = None, attributes: dict = None) -> FakeSpan:
+        span = FakeSpan(name=name, attributes=attributes or {})
+        self.spans.append(span)
+        return span
+
+
+class InstrumentationTest(TestCase):
+
+    """Will perform a unit test for the `Instrumentation` object."""
+
+    def setUp(self) -> None:
+        """Set up an instrumented session that is throttled twice."""
+
+        self.session = GraphSession(client=Client(), max_retries=3)
+        self.transport = ScriptedTransport(statuses=[429, 503])
+        self.session._local.session = self.transport
+        self.instrumentation = self.session.enable_instrumentation()
+
+    def test_hooks_see_the_request_and_the_response(self):
+        """Make sure pre request hooks can add headers and post request
+        hooks see the finished request.
+        """
+
+        seen = []
+
+        self.instrumentation.add_pre_request_hook(lambda info: info.headers.update({"client-request-id": "42"}))
+        self.instrumentation.add_post_request_hook(seen.append)
+
+        self.session.make_request(method="get", endpoint="users/8bc6/messages")
+
+        self.assertEqual(self.transport.requests[0].headers["client-request-id"], "42")
+        self.assertEqual(
+            (seen[0].template, seen[0].status, seen[0].retries, seen[0].throttled),
+            ("users/{id}/messages", 200, 2, 2)
+        )
+
+    def test_metrics_count_every_attempt_and_the_bytes_read(self):
+        """Make sure retried throttles count, and the bytes are the ones read."""
+
+        self.session.make_request(method="get", endpoint="users/8bc6/messages")
+
+        entry = self.instrumentation.metrics.snapshot()[0]
+
+        self.assertEqual((entry["method"], entry["endpoint"]), ("GET", "users/{id}/messages"))
+        self.assertEqual((entry["count"], entry["statuses"]), (1, {200: 1}))
+        self.assertEqual((entry["retries"], entry["throttled"], entry["errors"]), (2, 2, 0))
+        self.assertEqual(entry["bytes"], len(self.transport.body))
+
+
+class RequestMetricsTest(TestCase):
+
+    """Will perform a unit test for the `RequestMetrics` object."""
+
+    def test_record_buckets_latency_and_errors(self):
+        """Make sure latencies land in their bucket and errors are counted."""
+
+        metrics = RequestMetrics()
+
+        for latency, status, error in ((0.02, 200, None), (0.3, None, requests.ConnectionError())):
+            info = RequestInfo(method="get", endpoint="me/messages/AQMk", url="", headers={})
+            info.latency, info.status, info.error = latency, status, error
+            metrics.record(info=info)
+
+        entry = metrics.snapshot()[0]
+
+        self.assertEqual((entry["count"], entry["errors"], entry["statuses"]), (2, 1, {200: 1}))
+        self.assertEqual(dict(entry["latency_buckets"])[0.025], 1)
+        self.assertEqual(dict(entry["latency_buckets"])[0.5], 1)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), [])
+
+
+class PrometheusExporterTest(TestCase):
+
+    """Will perform a unit test for the `PrometheusExporter` object."""
+
+    def test_render(self):
+        """Make sure the counters and the cumulative histogram are rendered."""
+
+        metrics = RequestMetrics()
+        info = RequestInfo(method="get", endpoint="me/messages", url="", headers={})
+        info.latency, info.status, info.throttled, info.retries = 0.2, 200, 1, 1
+        metrics.record(info=info)
+
+        text = PrometheusExporter(metrics).export()
+        labels = 'method="GET",endpoint="me/messages"'
+
+        self.assertIn(f'ms_graph_requests_total{{{labels},status="200"}} 1', text)
+        self.assertIn(f'ms_graph_request_duration_seconds_bucket{{{labels},le="0.1"}} 0', text)
+        self.assertIn(f'ms_graph_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', text)
+        self.assertIn(f"ms_graph_throttled_total{{{labels}}} 1", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_exporters_must_implement_export(self):
+        """Make sure the exporter interface cannot be used on its own."""
+
+        with self.assertRaises(TypeError):
+            MetricsExporter(RequestMetrics())
+
+
+class OpenTelemetryHooksTest(TestCase):
+
+    """Will perform a unit test for the `OpenTelemetryHooks` object."""
+
+    @unittest.skipIf(otel_trace is not None, "opentelemetry-api is installed")
+    def test_requires_opentelemetry(self):
+        """Make sure the hooks explain the missing package."""
+
+        with self.assertRaises(ValueError):
+            OpenTelemetryHooks()
+
+    @unittest.skipUnless(otel_trace is not None, "requires opentelemetry-api")
+    def test_spans_follow_the_requests(self):
+        """Make sure every request gets a finished client span."""
+
+        tracer = FakeTracer()
+        session = GraphSession(client=Client())
+        session._local.session = ScriptedTransport(statuses=[404], body=b'{"error": {}}')
+        OpenTelemetryHooks(tracer=tracer).install(session.enable_instrumentation())
+
+        with self.assertRaises(requests.HTTPError):
+            session.make_request(method="get", endpoint="me/messages/AQMk")
+
+        span = tracer.spans[0]
+
+        self.assertEqual(span.name, "GET me/messages/{id}")
+        self.assertEqual(span.attributes["http.response.status_code"], 404)
+        self.assertIsNotNone(span.status)
+        self.assertTrue(span.ended)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import datetime
+import unittest
+
+from unittest import TestCase
+
+from ms_graph import models
+from ms_graph.models import Field
+from ms_graph.models import Message
+from ms_graph.models import GraphModel
+from ms_graph.models import parse_datetime
+
+MESSAGE = (
+    b'{"id": "AQMk", "subject": "Q3", "isRead": false,'
+    b' "from": {"emailAddress": {"name": "Adele", "address": "adele@contoso.com"}},'
+    b' "toRecipients": [{"emailAddress": {"address": "alex@contoso.com"}}],'
+    b' "receivedDateTime": "2021-01-01T10:00:00.1234567Z"}'
+)
+
+
+class CountingCodec():
+
+    """Counts the buffers it decodes."""
+
+    def __init__(self, codec: object) -> None:
+        self.codec = codec
+        self.calls = 0
+
+    def loads(self, data: bytes) -> dict:
+        self.calls += 1
+        return self.codec.loads(data)
+
+
+class Event(GraphModel):
+
+    """A model that adds a field and a slot of its own."""
+
+    __slots__ = ("note",)
+
+    start = Field("start", parse_datetime)
+
+
+class GraphModelTest(TestCase):
+
+    """Will perform a unit test for the `GraphModel` objects."""
+
+    def setUp(self) -> None:
+        """Count the decoding done by the models' codec."""
+
+        self.codec = CountingCodec(codec=models._CODEC)
+        models._CODEC = self.codec
+
+    def tearDown(self) -> None:
+        models._CODEC = self.codec.codec
+
+    def test_buffers_are_decoded_once_with_the_codec(self):
+        """Make sure the buffer is only decoded when a field is first read."""
+
+        message = Message.from_json(MESSAGE)
+
+        self.assertEqual(self.codec.calls, 0)
+        self.assertEqual(message.subject, "Q3")
+        self.assertEqual(message.from_.email_address.address, "adele@contoso.com")
+        self.assertEqual(message.to_recipients[0].email_address.address, "alex@contoso.com")
+        self.assertEqual(message["isRead"], False)
+        self.assertEqual(self.codec.calls, 1)
+        self.assertIsNone(message._buffer)
+
+    def test_fields_are_converted_once(self):
+        """Make sure a converted value is cached in the field's slot."""
+
+        message = Message(resource={"receivedDateTime": "2021-01-01T10:00:00.1234567Z"})
+
+        received = message.received_date_time
+
+        self.assertEqual(
+            received, datetime.datetime(2021, 1, 1, 10, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+        )
+        self.assertIs(message.received_date_time, received)
+        self.assertIs(message._received_date_time, received)
+        self.assertIsNone(message.subject)
+
+    def test_meta_gives_every_field_a_slot(self):
+        """Make sure fields get slots, subclasses keep their own, and no
+        instance `__dict__` is created.
+        """
+
+        event = Event(resource={"id": "1", "start": "2021-01-01T10:00:00Z"})
+        event.note = "moved"
+
+        self.assertIn("_start", Event.__slots__)
+        self.assertIn("note", Event.__slots__)
+        self.assertIsInstance(Event.start, Field)
+        self.assertEqual(Event.start.name, "start")
+        self.assertEqual(Event._fields, {"id": "id", "odata_etag": "@odata.etag", "start": "start"})
+        self.assertEqual(event.start.year, 2021)
+        self.assertFalse(hasattr(event, "__dict__"))
+
+        with self.assertRaises(AttributeError):
+            event.unknown = True
+
+    def test_from_page_and_from_items(self):
+        """Make sure collection helpers wrap every resource."""
+
+        page = Message.from_page({"value": [{"id": "1"}, {"id": "2"}]})
+        items = Message.from_items([b'{"id": "3"}'])
+
+        self.assertEqual([message.id for message in page], ["1", "2"])
+        self.assertEqual(next(items).id, "3")
+        self.assertEqual(repr(page[0]), "Message(id='1')")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import threading
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.notes import Notes
+
+
+class ContentResponse():
+
+    """A streamed response holding a page of HTML."""
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+    def __enter__(self) -> "ContentResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+class NotebookSession():
+
+    """Serves one notebook with a nested section group."""
+
+    def __init__(self, broken: str = None) -> None:
+        self.broken = broken
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def iter_items(self, endpoint: str, params: dict = None) -> list:
+
+        with self.lock:
+            self.calls.append((endpoint, params))
+
+        if endpoint.endswith("/notebooks"):
+            return [
+                {
+                    "id": "n1",
+                    "sections": [{"id": "s1"}],
+                    "sectionGroups": [{"id": "sg1", "sections": [{"id": "s2"}], "sectionGroups": []}],
+                }
+            ]
+
+        section_id = endpoint.split("/")[-2]
+
+        return [{"id": f"{section_id}-p{number}"} for number in range(3)]
+
+    def stream_request(self, method: str, endpoint: str) -> ContentResponse:
+
+        with self.lock:
+            self.calls.append((endpoint, None))
+
+        if endpoint.split("/")[-2] == self.broken:
+            raise requests.ConnectionError("Connection aborted.")
+
+        return ContentResponse(content=f"<html>{endpoint.split('/')[-2]}</html>".encode())
+
+
+class NotesTest(TestCase):
+
+    """Will perform a unit test for the `Notes` object."""
+
+    def test_crawl_walks_the_hierarchy(self):
+        """Make sure every page of every section is yielded in order with
+        its content.
+        """
+
+        session = NotebookSession()
+        notes = Notes(session=session)
+
+        results = list(notes.crawl(group_id="g1", max_workers=2))
+
+        self.assertEqual(
+            [page["id"] for _, _, page, _ in results],
+            ["s1-p0", "s1-p1", "s1-p2", "s2-p0", "s2-p1", "s2-p2"]
+        )
+        self.assertEqual(results[4][3], b"<html>s2-p1</html>")
+        self.assertEqual(session.calls[0][0], "groups/g1/onenote/notebooks")
+        self.assertIn("$expand", session.calls[0][1])
+
+    def test_crawl_keeps_going_past_a_failed_page(self):
+        """Make sure a page that fails to download is recorded and the
+        other pages still come back.
+        """
+
+        notes = Notes(session=NotebookSession(broken="s1-p1"))
+
+        results = list(notes.crawl(group_id="g1", max_workers=1))
+
+        self.assertEqual(len(results), 6)
+        self.assertIsNone(results[1][3])
+        self.assertEqual(results[2][3], b"<html>s1-p2</html>")
+        self.assertEqual([page_id for page_id, _ in notes.failures], ["s1-p1"])
+
+    def test_one_owner_only(self):
+        """Make sure an ambiguous owner is rejected."""
+
+        with self.assertRaises(ValueError):
+            list(Notes(session=NotebookSession()).iter_notebooks(user_id="u1", site_id="s1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
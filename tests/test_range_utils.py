@@ -0,0 +1,55 @@
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.utils.range import RangeProperties
+from ms_graph.utils.range import RangeFontProperties
+from ms_graph.utils.range import RangeFormatProperties
+from ms_graph.workbooks_and_charts.enums import Underline
+
+
+class RangeUtilsTest(TestCase):
+
+    """Will perform a unit test for the `ms_graph.utils.range` dataclasses."""
+
+    def test_to_dict_uses_graph_names(self):
+        """Make sure the field names are mapped to the Graph API property names."""
+
+        range_properties = RangeProperties(
+            number_format="0.00",
+            formulas_r1c1=[["=R1C1"]]
+        )
+
+        self.assertEqual(
+            range_properties.to_dict(),
+            {"numberFormat": "0.00", "formulasR1C1": [["=R1C1"]]}
+        )
+
+    def test_to_dict_keeps_scalar_lists(self):
+        """Make sure lists of values are sent as is."""
+
+        range_properties = RangeProperties(values=[[1, "a"], [2.5, True]])
+
+        self.assertEqual(
+            range_properties.to_dict(),
+            {"values": [[1, "a"], [2.5, True]]}
+        )
+
+    def test_to_dict_converts_enums(self):
+        """Make sure `Enum` members are converted to their values."""
+
+        font_properties = RangeFontProperties(underline=Underline.SINGLE)
+
+        self.assertEqual(font_properties.to_dict()["underline"], "Single")
+
+    def test_dataclasses_use_slots(self):
+        """Make sure the dataclasses do not carry a `__dict__`."""
+
+        format_properties = RangeFormatProperties(column_width=10.0)
+
+        self.assertFalse(hasattr(format_properties, "__dict__"))
+        self.assertEqual(format_properties.to_dict()["columnWidth"], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
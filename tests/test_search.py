@@ -0,0 +1,125 @@
+import threading
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.search import Search
+from ms_graph.search import normalize_search_request
+
+
+class PagedSearchSession():
+
+    """Answers search requests with canned hits for each entity type."""
+
+    def __init__(self, totals: dict, user: str = "adele") -> None:
+        self.totals = totals
+        self.user = user
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def identity(self) -> str:
+        return self.user
+
+    def make_request(self, method: str, endpoint: str, json: dict = None) -> dict:
+
+        request = {"from": 0, "size": 25, **json["requests"][0]}
+        entity_type = request["entityTypes"][0]
+
+        with self.lock:
+            self.requests.append((entity_type, request["from"], request["size"]))
+
+        total = self.totals[entity_type]
+        ranks = range(request["from"] + 1, min(request["from"] + request["size"], total) + 1)
+
+        return {
+            "value": [
+                {
+                    "hitsContainers": [
+                        {
+                            "hits": [{"hitId": f"{entity_type}-{rank}", "rank": rank} for rank in ranks],
+                            "total": total,
+                            "moreResultsAvailable": request["from"] + request["size"] < total,
+                        }
+                    ]
+                }
+            ]
+        }
+
+
+class SearchTest(TestCase):
+
+    """Will perform a unit test for the `Search` object."""
+
+    def test_hits_are_merged_by_rank(self):
+        """Make sure every page is read and hits interleave by rank."""
+
+        session = PagedSearchSession(totals={"message": 5, "event": 2})
+        search = Search(session=session)
+
+        hits = list(search.iter_hits(query_string="contoso", entity_types=["message", "event"], page_size=2))
+
+        self.assertEqual(
+            [hit["hitId"] for hit in hits],
+            ["message-1", "event-1", "message-2", "event-2", "message-3", "message-4", "message-5"]
+        )
+        self.assertEqual(hits[1]["entityType"], "event")
+        self.assertIn(("message", 4, 2), session.requests)
+
+    def test_limit_stops_paging(self):
+        """Make sure no entity type is paged past the limit."""
+
+        session = PagedSearchSession(totals={"driveItem": 1000, "site": 1000})
+        search = Search(session=session)
+
+        hits = list(search.iter_hits(query_string="contoso", entity_types=["driveItem", "site"], limit=3))
+
+        self.assertEqual(len(hits), 3)
+        self.assertTrue(all(start == 0 and size == 3 for _, start, size in session.requests))
+
+    def test_unknown_entity_type(self):
+        """Make sure an unknown entity type is rejected."""
+
+        with self.assertRaises(ValueError):
+            Search(session=None).build_request(query_string="contoso", entity_type="person")
+
+    def test_cache_uses_normalised_requests(self):
+        """Make sure equivalent requests are answered from the cache."""
+
+        session = PagedSearchSession(totals={"message": 3, "event": 3})
+        search = Search(session=session)
+        search.enable_cache(ttl=60)
+
+        first = {"requests": [{"entityTypes": ["message", "event"], "query": {"queryString": "contoso  report"}}]}
+        second = {
+            "requests": [
+                {"entityTypes": ["event", "message"], "query": {"queryString": " contoso report"}, "from": 0, "size": 25}
+            ]
+        }
+
+        self.assertEqual(normalize_search_request(first), normalize_search_request(second))
+
+        search.query(search_request=first)
+        content = search.query(search_request=second)
+
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(content["value"][0]["hitsContainers"][0]["total"], 3)
+        self.assertEqual(search.cache.stats["hits"], 1)
+
+    def test_shared_caches_keep_callers_apart(self):
+        """Make sure a cache shared by two callers never crosses results."""
+
+        adele = Search(session=PagedSearchSession(totals={"message": 3}))
+        alex = Search(session=PagedSearchSession(totals={"message": 3}, user="alex"))
+        alex.enable_cache(cache=adele.enable_cache(ttl=60))
+
+        request = {"requests": [{"entityTypes": ["message"], "query": {"queryString": "contoso"}}]}
+
+        adele.query(search_request=request)
+        alex.query(search_request=request)
+
+        self.assertEqual(len(adele.graph_session.requests), 1)
+        self.assertEqual(len(alex.graph_session.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from urllib3.exceptions import NewConnectionError
+
+from ms_graph.send_queue import SendQueue
+from ms_graph.utils.deadline import DeadlineExceeded
+
+
+def deadline_error(request_sent: bool) -> DeadlineExceeded:
+    """Builds the error a session raises once the deadline passed."""
+
+    error = DeadlineExceeded("The deadline passed.")
+    error.request_sent = request_sent
+
+    return error
+
+
+def http_error(status: int, retry_after: str = None) -> requests.HTTPError:
+    """Builds the error a session raises for a failed request."""
+
+    response = requests.Response()
+    response.status_code = status
+
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+
+    return requests.HTTPError(f"{status} Error", response=response)
+
+
+class FakeSession():
+
+    """Sends mail, failing the first sends to a recipient as scripted."""
+
+    def __init__(self, script: dict = None) -> None:
+        self.script = script or {}
+        self.sends = []
+        self.lock = threading.Lock()
+
+    def make_request(self, method: str, endpoint: str, json: dict = None) -> None:
+
+        subject = json["message"]["subject"]
+
+        with self.lock:
+            self.sends.append((endpoint, subject, time.monotonic()))
+            errors = self.script.get(subject)
+            error = errors.pop(0) if errors else None
+
+        if error is not None:
+            raise error
+
+
+class SendQueueTest(TestCase):
+
+    """Will perform a unit test for the `SendQueue` object."""
+
+    def setUp(self) -> None:
+        """Set up a directory for the outbox."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "outbox.db")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def send(self, session: FakeSession, messages: list, **kwargs) -> SendQueue:
+        """Sends `(sender, subject, key)` messages and waits for them."""
+
+        kwargs.setdefault("messages_per_minute", 6000.0)
+        outbox = SendQueue(session=session, path=self.path, **kwargs)
+
+        for sender, subject, key in messages:
+            outbox.put(sender=sender, message={"subject": subject}, key=key)
+
+        with outbox:
+            self.assertTrue(outbox.join(timeout=5.0))
+
+        return outbox
+
+    def test_a_path_is_required(self):
+        """Make sure the outbox is never kept in memory only."""
+
+        with self.assertRaises(ValueError):
+            SendQueue(session=FakeSession(), path=":memory:")
+
+    def test_each_sender_is_paced(self):
+        """Make sure the sends of one sender are spaced out, while other
+        senders go ahead.
+        """
+
+        session = FakeSession()
+        self.send(
+            session=session,
+            messages=[("a", "one", None), ("a", "two", None), ("a", "three", None), ("b", "four", None)],
+            messages_per_minute=300.0
+        )
+
+        times = [at for endpoint, _, at in session.sends if endpoint == "/users/a/sendMail"]
+
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[2] - times[0], 0.35)
+        self.assertLess(
+            [at for endpoint, _, at in session.sends if endpoint == "/users/b/sendMail"][0] - times[0], 0.1
+        )
+
+    def test_a_key_is_only_sent_once(self):
+        """Make sure a repeated key is dropped, also after a restart."""
+
+        session = FakeSession()
+        outbox = self.send(session=session, messages=[("a", "one", "k1"), ("a", "again", "k1")])
+
+        self.assertEqual(outbox.stats()["sent"], 1)
+
+        outbox = SendQueue(session=session, path=self.path)
+        self.assertFalse(outbox.put(sender="a", message={"subject": "later"}, key="k1"))
+        outbox.close()
+
+        self.assertEqual([subject for _, subject, _ in session.sends], ["one"])
+
+    def test_only_unsent_messages_are_retried(self):
+        """Make sure a 429 and a failed connection are retried, while a
+        rejected send fails and a possibly delivered one is never retried.
+        """
+
+        connect_error = requests.ConnectionError(NewConnectionError(None, "refused"))
+
+        session = FakeSession(script={
+            "throttled": [http_error(429, retry_after="0")],
+            "unreachable": [connect_error],
+            "rejected": [http_error(400)],
+            "gateway": [http_error(504)],
+            "timeout": [requests.ReadTimeout("read timed out")],
+            "late": [deadline_error(request_sent=False)],
+            "cut_off": [deadline_error(request_sent=True)],
+        })
+
+        outbox = self.send(
+            session=session,
+            messages=[(subject, subject, subject) for subject in session.script]
+        )
+
+        outbox = SendQueue(session=session, path=self.path)
+        failures = {failure["key"]: failure for failure in outbox.failures()}
+        outbox.close()
+
+        sends = [subject for _, subject, _ in session.sends]
+
+        self.assertEqual(sends.count("throttled"), 2)
+        self.assertEqual(sends.count("unreachable"), 2)
+        self.assertEqual(sends.count("late"), 2)
+        self.assertEqual({key: failure["state"] for key, failure in failures.items()}, {
+            "rejected": "failed", "gateway": "unknown", "timeout": "unknown", "cut_off": "unknown"
+        })
+        self.assertTrue(all(sends.count(key) == 1 for key in failures))
+
+    def test_a_send_cut_short_is_never_repeated(self):
+        """Make sure a message claimed when the process died is unknown on
+        restart, and not sent again.
+        """
+
+        session = FakeSession()
+        outbox = SendQueue(session=session, path=self.path)
+        outbox.put(sender="a", message={"subject": "one"}, key="k1")
+
+        # The worker claims the message, then the process dies.
+        self.assertEqual(outbox._claim(), ("a", "k1"))
+        outbox._connection.close()
+
+        outbox = SendQueue(session=session, path=self.path)
+
+        with outbox:
+            self.assertTrue(outbox.join(timeout=5.0))
+            failures = outbox.failures()
+
+        self.assertEqual([failure["state"] for failure in failures], ["unknown"])
+        self.assertEqual(session.sends, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.utils.streaming import StreamingCollectionDecoder
+
+
+class StreamingCollectionDecoderTest(TestCase):
+
+    """Will perform a unit test for the `StreamingCollectionDecoder` object."""
+
+    def setUp(self) -> None:
+        """Set up a collection response split into small chunks."""
+
+        self.page = {
+            "@odata.context": "https://graph.microsoft.com/v1.0/$metadata#users",
+            "value": [
+                {"id": "1", "subject": "Escaped \" quote and } brace"},
+                {"id": "2", "toRecipients": [{"emailAddress": {"name": None}}]},
+                {"id": "3", "size": 12.5, "isRead": True},
+            ],
+            "@odata.nextLink": "https://graph.microsoft.com/v1.0/me/messages?$skip=3",
+        }
+
+        body = json.dumps(self.page).encode("utf-8")
+        self.chunks = [body[index:index + 5] for index in range(0, len(body), 5)]
+
+    def test_decodes_items(self):
+        """Make sure each item is decoded across chunk boundaries."""
+
+        decoder = StreamingCollectionDecoder(chunks=self.chunks)
+
+        self.assertEqual(list(decoder), self.page["value"])
+
+    def test_collects_metadata(self):
+        """Make sure the top level properties are collected."""
+
+        decoder = StreamingCollectionDecoder(chunks=self.chunks)
+        list(decoder)
+
+        self.assertEqual(
+            decoder.metadata["@odata.nextLink"], self.page["@odata.nextLink"]
+        )
+
+    def test_raw_items(self):
+        """Make sure raw mode yields the undecoded item bytes."""
+
+        decoder = StreamingCollectionDecoder(chunks=self.chunks, raw=True)
+        items = list(decoder)
+
+        self.assertIsInstance(items[0], bytes)
+        self.assertEqual(json.loads(items[0]), self.page["value"][0])
+
+    def test_truncated_body(self):
+        """Make sure a truncated body raises an error."""
+
+        decoder = StreamingCollectionDecoder(chunks=self.chunks[:10])
+
+        with self.assertRaises(ValueError):
+            list(decoder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import io
+import unittest
+
+from unittest import TestCase
+
+import requests
+
+from ms_graph.session import GraphSession
+from ms_graph.utils.throttling import RateLimiter
+
+
+class Client():
+
+    """The parts of the client a session reads."""
+
+    RESOURCE = "https://graph.microsoft.com/"
+    api_version = "v1.0"
+    access_token = "token"
+    timeout = (1.0, 5.0)
+
+
+class OkTransport():
+
+    """Answers every request with an unread `200`."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"{}")
+        response.url = request.url
+        response.request = request
+
+        return response
+
+
+class UnavailableTransport():
+
+    """Answers every request with the scripted status, counting the
+    requests by method.
+    """
+
+    def __init__(self, status: int, retry_after: str = None) -> None:
+        self.status = status
+        self.retry_after = retry_after
+        self.sent = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+
+        self.sent.append(request.method)
+
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{"error": {"code": "ServiceNotAvailable"}}'
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+
+        if self.retry_after is not None:
+            response.headers["Retry-After"] = self.retry_after
+
+        return response
+
+
+class RateLimiterTest(TestCase):
+
+    """Will perform a unit test for the `RateLimiter` object."""
+
+    def setUp(self) -> None:
+        """Set up a limiter."""
+
+        self.rate_limiter = RateLimiter(tenant_rate=100.0, mailbox_rate=10.0)
+
+    def test_throttled_mailbox_leaves_the_tenant_alone(self):
+        """Make sure a mailbox 429 slows and pauses the mailbox only."""
+
+        limits = self.rate_limiter.acquire(endpoint="users/8bc6/messages")
+        self.rate_limiter.release(limits=limits, status=429, retry_after=30.0)
+
+        mailbox = self.rate_limiter.limit_for(scope="mailbox:8bc6")
+
+        self.assertEqual(mailbox.rate, 5.0)
+        self.assertEqual(mailbox.throttled, 1)
+        self.assertEqual((self.rate_limiter.tenant.rate, self.rate_limiter.tenant.throttled), (100.0, 0))
+        self.assertEqual((mailbox.in_flight, self.rate_limiter.tenant.in_flight), (0, 0))
+
+        # The tenant is not paused, other mailboxes go right ahead.
+        self.rate_limiter.release(limits=self.rate_limiter.acquire(endpoint="users/f00d/messages", timeout=0.5))
+
+        with self.assertRaises(TimeoutError):
+            self.rate_limiter.acquire(endpoint="users/8bc6/messages", timeout=0.1)
+
+    def test_throttled_tenant_request_adapts_the_tenant(self):
+        """Make sure a request without a narrower scope adapts the tenant."""
+
+        limits = self.rate_limiter.acquire(endpoint="users")
+        self.rate_limiter.release(limits=limits, status=429)
+
+        self.assertEqual(limits, (self.rate_limiter.tenant,))
+        self.assertEqual((self.rate_limiter.tenant.rate, self.rate_limiter.tenant.throttled), (50.0, 1))
+
+
+class SessionRateLimitTest(TestCase):
+
+    """Will perform a unit test for the rate limits of `GraphSession`."""
+
+    def setUp(self) -> None:
+        """Set up a rate limited session."""
+
+        self.session = GraphSession(client=Client())
+        self.session._local.session = OkTransport()
+        self.rate_limiter = RateLimiter(mailbox_concurrency=1)
+        self.session.enable_rate_limiter(self.rate_limiter)
+
+    def test_streamed_body_holds_its_slot_until_closed(self):
+        """Make sure a streamed response counts against the mailbox
+        concurrency until it is closed.
+        """
+
+        mailbox = self.rate_limiter.limit_for(scope="mailbox:8bc6")
+        response = self.session.stream_request(method="get", endpoint="users/8bc6/messages/AQMk/$value")
+
+        self.assertEqual(mailbox.in_flight, 1)
+
+        with self.assertRaises(TimeoutError):
+            self.rate_limiter.acquire(endpoint="users/8bc6/messages", timeout=0.1)
+
+        response.close()
+        response.close()
+
+        self.assertEqual((mailbox.in_flight, self.rate_limiter.tenant.in_flight), (0, 0))
+
+    def test_buffered_response_releases_its_slot(self):
+        """Make sure a buffered response hands its slot back right away."""
+
+        self.session.make_request(method="get", endpoint="users/8bc6/messages")
+
+        self.assertEqual(self.rate_limiter.limit_for(scope="mailbox:8bc6").in_flight, 0)
+
+
+class SessionRetryTest(TestCase):
+
+    """Will perform a unit test for the retries of `GraphSession`."""
+
+    def send(self, method: str, status: int, retry_after: str = None) -> list:
+        """Sends a request over a transport that keeps failing."""
+
+        session = GraphSession(client=Client(), max_retries=1)
+        transport = UnavailableTransport(status=status, retry_after=retry_after)
+        session._local.session = transport
+
+        with self.assertRaises(requests.HTTPError):
+            session.make_request(method=method, endpoint="me/sendMail", json={})
+
+        return transport.sent
+
+    def test_unavailable_writes_are_not_repeated(self):
+        """Make sure a `503` to a `POST` is not retried, it may have been
+        applied.
+        """
+
+        self.assertEqual(self.send(method="post", status=503), ["POST"])
+
+    def test_unavailable_retries_when_it_is_safe(self):
+        """Make sure idempotent methods, `Retry-After` answers and `429`
+        are retried.
+        """
+
+        self.assertEqual(self.send(method="get", status=504), ["GET", "GET"])
+        self.assertEqual(self.send(method="post", status=503, retry_after="0"), ["POST", "POST"])
+        self.assertEqual(self.send(method="post", status=429, retry_after="0"), ["POST", "POST"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from unittest import TestCase
+
+from ms_graph.utils.work_queue import WorkQueue
+
+
+class WorkQueueTest(TestCase):
+
+    """Will perform a unit test for the `WorkQueue` object."""
+
+    def setUp(self) -> None:
+        """Set up the queue in a temporary database."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "queue.db")
+        self.queue = WorkQueue(path=self.path, max_attempts=2)
+
+    def tearDown(self) -> None:
+        """Close the queue and remove the database."""
+
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_add_skips_existing_keys(self):
+        """Make sure adding a key twice queues it once."""
+
+        self.assertTrue(self.queue.add(key="a", payload={"user_id": "a"}))
+        self.assertFalse(self.queue.add(key="a", payload={"user_id": "a"}))
+        self.assertEqual(self.queue.counts()["pending"], 1)
+
+    def test_checkpoint_survives_a_crash(self):
+        """Make sure a released item resumes from its checkpoint."""
+
+        self.queue.add(key="a", payload={})
+        item = self.queue.lease(worker="one")
+        self.queue.checkpoint(key=item.key, worker="one", checkpoint={"next_link": "page-2"})
+
+        # A new process opening the same database after a crash.
+        resumed = WorkQueue(path=self.path)
+        resumed.release_leases()
+        item = resumed.lease(worker="two")
+        resumed.close()
+
+        self.assertEqual(item.checkpoint, {"next_link": "page-2"})
+        self.assertEqual(item.attempts, 2)
+
+    def test_done_items_are_not_leased_again(self):
+        """Make sure finished items stay finished."""
+
+        self.queue.add(key="a", payload={})
+        self.queue.complete(key=self.queue.lease(worker="one").key, worker="one")
+        self.queue.release_leases()
+
+        self.assertIsNone(self.queue.lease(worker="one"))
+        self.assertFalse(self.queue.unfinished())
+
+    def test_failures_end_in_dead_letters(self):
+        """Make sure an item is dead once it runs out of attempts."""
+
+        self.queue.add(key="a", payload={})
+
+        self.assertEqual(self.queue.fail(key=self.queue.lease(worker="one").key, worker="one", error="boom"), "pending")
+        self.assertEqual(self.queue.fail(key=self.queue.lease(worker="one").key, worker="one", error="boom"), "dead")
+        self.assertEqual(self.queue.dead_letters()[0]["error"], "boom")
+
+    def test_a_lost_lease_cannot_be_written(self):
+        """Make sure a worker whose lease ran out cannot touch the item
+        once another worker leased it.
+        """
+
+        queue = WorkQueue(path=self.path, lease_seconds=0.0)
+        queue.add(key="a", payload={})
+
+        queue.lease(worker="one")
+        queue.lease(worker="two")
+
+        self.assertFalse(queue.checkpoint(key="a", worker="one", checkpoint={"offset": 10}))
+        self.assertFalse(queue.complete(key="a", worker="one"))
+        self.assertIsNone(queue.fail(key="a", worker="one", error="boom"))
+        self.assertTrue(queue.checkpoint(key="a", worker="two", checkpoint={"offset": 20}))
+        self.assertTrue(queue.complete(key="a", worker="two"))
+
+        queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()